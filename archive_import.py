@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Backfill the playlist from an offline Reddit archive
+
+Public Reddit archives hold one JSON object per line for every submission
+or comment, usually zstd-compressed (.zst). Importing from them reaches any
+time range, well past the ~1000 posts subreddit.new() can list, in two
+steps:
+
+    import    the dumps are read in batches of lines that a process pool
+              decodes, filters (subreddit, time range, upvotes) and parses
+              with title_parser. Qualifying posts and discussion-thread
+              comments go into the BackfillQueue in the shared cache
+              database; comments are held there until their thread is
+              decided. Needs no credentials.
+    backfill  the oldest queued items go through the sync's own extraction
+              and Spotify matching, and at most `--batch` tracks are added
+              to the playlist per call.
+
+Both steps can be interrupted and re-run: importing skips items already
+queued, and each queue transition is committed as it happens. Reading .zst
+dumps needs the optional zstandard package.
+
+Usage: python archive_import.py import DUMP [DUMP ...] [--days N] [--workers N]
+       python archive_import.py backfill [--batch N]
+       python archive_import.py status
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import title_parser
+from comment_walker import TrackDensity, has_track_indicator, is_discussion_candidate
+from media_metadata import embedded_metadata
+from sync_cache import BackfillQueue
+
+logger = logging.getLogger(__name__)
+
+# Dump lines per work item sent to the process pool
+BATCH_LINES = 5000
+
+# Tracks pushed to the playlist per backfill call
+BACKFILL_BATCH = 100
+
+# Archives use long zstd windows that the decompressor rejects by default
+ZSTD_MAX_WINDOW = 2 ** 31
+
+
+def open_dump(path: str) -> io.TextIOBase:
+    """Open an NDJSON dump as text, decompressing .zst files on the fly"""
+    if not path.endswith('.zst'):
+        return open(path, encoding='utf-8', errors='replace')
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(f"Reading {path} needs the zstandard package (pip install zstandard)") from None
+    reader = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW).stream_reader(open(path, 'rb'))
+    return io.TextIOWrapper(reader, encoding='utf-8', errors='replace')
+
+
+def read_batches(path: str, batch_lines: int = BATCH_LINES) -> Iterator[List[str]]:
+    """Lines of a dump in lists of `batch_lines`"""
+    with open_dump(path) as dump:
+        batch = []
+        for line in dump:
+            batch.append(line)
+            if len(batch) >= batch_lines:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def parse_submission(data: Dict, options: Dict) -> Optional[Dict]:
+    """Queue item for a submission with enough upvotes, or None"""
+    score = int(data.get('score') or 0)
+    if score < options['min_upvotes'] or data.get('removed_by_category'):
+        return None
+
+    title = data.get('title') or ''
+    url = data.get('url') or ''
+    source_type = title_parser.source_type(url)
+    skip_reason = title_parser.non_music_reason(title, source_type, is_self=bool(data.get('is_self')),
+                                                flair=data.get('link_flair_text'))
+    return {
+        'key': f"post:{data['id']}",
+        'kind': 'post',
+        'id': data['id'],
+        'title': title,
+        'url': url,
+        'score': score,
+        'created_utc': float(data['created_utc']),
+        'num_comments': int(data.get('num_comments') or 0),
+        'embed': embedded_metadata(data.get('secure_media') or data.get('media')),
+        'skip_reason': skip_reason,
+        # Title-only posts are parsed here; links are extracted (embed first) at backfill time
+        'music_info': title_parser.parse_title(title) if source_type == 'title' and not skip_reason else None,
+    }
+
+
+def parse_comment(data: Dict, options: Dict) -> Optional[Dict]:
+    """Queue item for a comment that could share a track, or None (same bar as the live thread walk)"""
+    score = int(data.get('score') or 0)
+    body = data.get('body') or ''
+    if score < options['min_comment_upvotes'] or len(body.strip()) <= 10:
+        return None
+
+    cleaned = title_parser.process_comment_text(body)
+    url = title_parser.find_comment_url(cleaned) or ''
+    music_info = None
+    if not url:
+        music_info = title_parser.parse_title(cleaned)
+        music_info.update(source='comment_text', comment_score=score)
+    return {
+        'key': f"comment:{data['id']}",
+        'kind': 'comment',
+        'id': data['id'],
+        'body': body,
+        'score': score,
+        'url': url,
+        'parent_post_id': data['link_id'].split('_')[-1],
+        'created_utc': float(data['created_utc']),
+        'music_info': music_info,
+    }
+
+
+def parse_lines(lines: List[str], options: Dict) -> Tuple[List[Dict], Dict[str, List[int]]]:
+    """Decode, filter and parse one batch of dump lines (runs in the worker processes)
+
+    Returns the candidate posts and comments, plus [comments, track-sharing
+    comments] per thread over every comment seen, for the discussion-thread
+    check. Lines that are not JSON objects are ignored.
+    """
+    records = []
+    density = {}
+    for line in lines:
+        try:
+            data = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or (data.get('subreddit') or '').lower() != options['subreddit']:
+            continue
+        created_utc = float(data.get('created_utc') or 0)
+
+        if 'title' in data:
+            if options['since_utc'] <= created_utc < options['until_utc']:
+                record = parse_submission(data, options)
+                if record:
+                    records.append(record)
+        elif data.get('link_id') and created_utc >= options['since_utc']:
+            counts = density.setdefault(data['link_id'].split('_')[-1], [0, 0])
+            counts[0] += 1
+            counts[1] += has_track_indicator(data.get('body') or '')
+            record = parse_comment(data, options)
+            if record:
+                records.append(record)
+    return records, density
+
+
+class ArchiveImporter:
+    """Streams dumps through a process pool into a BackfillQueue
+
+    Posts are queued as their batches come back. Comments are held in the
+    queue's database until every dump has been read, since whether a thread
+    is a discussion thread depends on all of its comments; only comments of
+    threads that qualify (as in iter_discussion_thread_comments) are then
+    released to the queue. Only per-thread titles and track density stay
+    in memory, however many comments the dumps hold.
+    """
+
+    def __init__(self, queue: BackfillQueue, subreddit: str = 'theoverload', since_utc: float = 0.0,
+                 until_utc: Optional[float] = None, min_upvotes: int = 3, min_comment_upvotes: int = 3,
+                 workers: Optional[int] = None, batch_lines: int = BATCH_LINES):
+        self.queue = queue
+        self.options = {
+            'subreddit': subreddit.lower(),
+            'since_utc': since_utc,
+            'until_utc': until_utc or time.time(),
+            'min_upvotes': min_upvotes,
+            'min_comment_upvotes': min_comment_upvotes,
+        }
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_lines = batch_lines
+        self.stats = Counter()
+        self.skipped = Counter()
+        self._threads: Dict[str, Dict] = {}
+        self._density: Dict[str, TrackDensity] = defaultdict(TrackDensity)
+
+    def run(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Import every dump (submissions and comments, in any order); returns the import counts"""
+        batches = (batch for path in paths for batch in read_batches(path, self.batch_lines))
+        for records, density in self.parse_batches(batches):
+            self.add(records, density)
+        self.release_threads()
+
+        logger.info(f"Queued {self.stats['posts.queued']} post(s) and {self.stats['comments.queued']} comment(s) "
+                    f"from {self.stats['threads.discussion']} discussion thread(s)")
+        if self.skipped:
+            logger.info(f"Skipped as non-music: {dict(self.skipped)}")
+        return dict(self.stats, **{f"skipped.{reason}": n for reason, n in self.skipped.items()})
+
+    def parse_batches(self, batches: Iterator[List[str]]) -> Iterator[Tuple[List[Dict], Dict[str, List[int]]]]:
+        """parse_lines over every batch, in order, spread over `workers` processes
+
+        At most two batches per worker are in flight, so memory stays bounded
+        however large the dump is.
+        """
+        parse = partial(parse_lines, options=self.options)
+        if self.workers == 1:
+            yield from map(parse, batches)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = deque()
+            for batch in batches:
+                in_flight.append(pool.submit(parse, batch))
+                if len(in_flight) >= 2 * self.workers:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def add(self, records: List[Dict], density: Dict[str, List[int]]):
+        """Queue one parsed batch's posts and hold its comments back by thread"""
+        posts = []
+        comments = []
+        for record in records:
+            if record['kind'] == 'comment':
+                comments.append(record)
+                continue
+            if is_discussion_candidate(record['num_comments'], record['score']):
+                self._threads[record['id']] = {'title': record['title']}
+            if record['skip_reason']:
+                self.skipped[record['skip_reason']] += 1
+            else:
+                posts.append(record)
+        self.stats['posts.queued'] += self.queue.enqueue(posts)
+        self.queue.hold(comments)
+
+        for thread_id, (total, indicating) in density.items():
+            self._density[thread_id].total += total
+            self._density[thread_id].indicating += indicating
+
+    def release_threads(self):
+        """Queue the held comments of every thread that qualifies as a discussion thread, drop the rest"""
+        for thread_id in self.queue.held_threads():
+            thread = self._threads.get(thread_id)
+            density = self._density[thread_id]
+            if not thread or density.density < density.threshold:
+                continue
+            self.stats['threads.discussion'] += 1
+            self.stats['comments.queued'] += self.queue.release(thread_id, {'parent_post_title': thread['title']})
+        self.queue.discard_held()
+
+
+def resolve_items(sync, queue: BackfillQueue, items: List[Dict]):
+    """Resolve queued items with the sync's extraction and matching, recording each outcome
+
+    Items the daily run has already resolved are answered from the
+    resolution cache; the rest are extracted in parallel (links only; text
+    was parsed at import), hydrated in one batch and matched in order.
+    """
+    for item in items:
+        item['cached'] = sync.resolution_cache.lookup(item['key'], item['url'])
+
+    def extract(item):
+        if item['music_info']:
+            return item['music_info']
+        if item['kind'] == 'post':
+            return sync.extract_music_info(item, hydrate_spotify=False)
+        return sync.extract_music_info_from_comment(item, hydrate_spotify=False)
+
+    infos = sync.hydrate_spotify_infos(sync.extract_music_info_batch(items, extract, url_of=lambda item: item['url']))
+    for item, music_info in zip(items, infos):
+        if item['kind'] == 'post':
+            track_id = sync.resolve_post(item, music_info)
+        else:
+            track_id = sync.resolve_comment(item, music_info)
+        queue.mark_resolved(item['key'], track_id)
+
+
+def backfill(sync, queue: BackfillQueue, batch_size: int = BACKFILL_BATCH) -> List[str]:
+    """Resolve queued items, oldest first, and add the next `batch_size` tracks to the playlist
+
+    Resolution stops once `batch_size` tracks are waiting (or the queue is
+    empty). Those tracks are added in one call, oldest first, skipping any
+    already in the playlist. Returns the track IDs pushed.
+    """
+    def waiting() -> List[str]:
+        return list(dict.fromkeys(track_id for _, track_id in queue.matched()))
+
+    while len(waiting()) < batch_size:
+        items = queue.pending(batch_size)
+        if not items:
+            break
+        resolve_items(sync, queue, items)
+
+    track_ids = waiting()[:batch_size]
+    if not track_ids:
+        logger.info("Backfill queue has no tracks waiting")
+        return []
+
+    sync.add_tracks_to_playlist(sync.get_or_create_playlist(), track_ids)
+    pushed = set(track_ids)
+    queue.mark_added([key for key, track_id in queue.matched() if track_id in pushed])
+    logger.info(f"Backfill: pushed {len(track_ids)} track(s); queue now {queue.counts()}")
+    return track_ids
+
+
+def main():
+    from dotenv import load_dotenv
+    from overload_spotify_sync import configure_logging
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help="queue posts and comments from NDJSON/.zst dumps")
+    import_parser.add_argument('dumps', nargs='+', metavar='DUMP')
+    import_parser.add_argument('--days', type=float, help="only posts from the last N days (default: all)")
+    import_parser.add_argument('--subreddit', default='theoverload')
+    import_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    backfill_parser = commands.add_parser('backfill', help="resolve queued items and push one batch of tracks")
+    backfill_parser.add_argument('--batch', type=int, default=BACKFILL_BATCH)
+    commands.add_parser('status', help="print the number of queued items in each state")
+    args = parser.parse_args()
+
+    cache_path = os.getenv('SYNC_CACHE_PATH', '.sync_cache.db')
+    if args.command == 'status':
+        print(json.dumps(BackfillQueue(cache_path).counts()))
+        return
+
+    configure_logging()
+    if args.command == 'import':
+        importer = ArchiveImporter(
+            BackfillQueue(cache_path),
+            subreddit=args.subreddit,
+            since_utc=time.time() - args.days * 86400 if args.days else 0.0,
+            min_upvotes=int(os.getenv('MIN_UPVOTES', '3')),
+            min_comment_upvotes=int(os.getenv('MIN_COMMENT_UPVOTES', '3')),
+            workers=args.workers
+        )
+        print(json.dumps(importer.run(args.dumps)))
+        return
+
+    from overload_spotify_sync import OverloadSpotifySync
+    sync = OverloadSpotifySync()
+    status = 'error'
+    try:
+        backfill(sync, BackfillQueue(sync.config.cache_path), args.batch)
+        status = 'ok'
+    finally:
+        sync.ytdlp_pool.close()
+        sync.write_run_report(status, 'backfill')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+asyncio pipeline for a sync run (enabled with --async)
+
+Posts and discussion-thread comments flow through bounded queues:
+
+    list posts and comments -> extract -> hydrate Spotify links -> resolve on Spotify
+
+so extraction starts on the first listing page, and Spotify searches for
+early items overlap with metadata extraction for later ones, instead of
+each stage waiting for the previous one to finish. The blocking work
+itself (PRAW, yt-dlp, HTTP, spotipy) runs on a thread pool
+through the same OverloadSpotifySync methods the serial path uses, and
+results are reassembled in input order, so the track IDs added to the
+playlist are identical to a serial run.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+# Spotify's several-tracks endpoint takes at most 50 IDs per request
+HYDRATE_BATCH_SIZE = 50
+
+
+class AsyncPipeline:
+    """Runs one sync's extraction and resolution stages concurrently
+
+    `queue_size` bounds every inter-stage queue, so a fast producer cannot run
+    arbitrarily far ahead of Spotify resolution. Extraction keeps the per-source
+    limits from Config.extraction_workers; `resolve_workers` items are resolved
+    against Spotify at once.
+    """
+
+    def __init__(self, sync, queue_size: int = 32, resolve_workers: int = 4):
+        self.sync = sync
+        self.queue_size = queue_size
+        self.resolve_workers = resolve_workers
+        self.extract_workers = sum(sync.config.extraction_workers.values()) + 1
+        self.counts = {'post': 0, 'comment': 0}
+
+    async def run(self, posts: Iterable[Dict]) -> Tuple[List[str], List[str]]:
+        """Return (post track IDs, comment track IDs), each in input order
+
+        `posts` may be a lazy listing such as sync.iter_recent_posts(); it is
+        consumed off the event loop as the first stage. Afterwards `counts`
+        holds the number of posts and comments that went through the pipeline.
+        """
+        workers = self.extract_workers + self.resolve_workers + 2
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline")
+        self._limits = {source: asyncio.Semaphore(n) for source, n in self.sync.config.extraction_workers.items()}
+        self._limits['title'] = asyncio.Semaphore(1)
+        self._results: Dict[Tuple[str, int], object] = {}
+        self.counts = {'post': 0, 'comment': 0}
+
+        to_extract = asyncio.Queue(self.queue_size)
+        to_hydrate = asyncio.Queue(self.queue_size)
+        to_resolve = asyncio.Queue(self.queue_size)
+
+        extractors = [asyncio.create_task(self._extract(to_extract, to_hydrate))
+                      for _ in range(self.extract_workers)]
+        hydrator = asyncio.create_task(self._hydrate(to_hydrate, to_resolve))
+        resolvers = [asyncio.create_task(self._resolve(to_resolve))
+                     for _ in range(self.resolve_workers)]
+
+        async def drive():
+            # Shut the stages down in order once the producer is exhausted
+            await self._produce(posts, to_extract)
+            for _ in extractors:
+                await to_extract.put(_DONE)
+            await asyncio.gather(*extractors)
+            await to_hydrate.put(_DONE)
+            await hydrator
+            for _ in resolvers:
+                await to_resolve.put(_DONE)
+
+        tasks = [asyncio.create_task(drive()), *extractors, hydrator, *resolvers]
+        try:
+            # The first failure in any stage aborts the run, as it would serially
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._executor.shutdown(wait=True)
+
+        post_track_ids = self._ordered('post')
+        comment_track_ids = self._ordered('comment')
+        return post_track_ids, comment_track_ids
+
+    def _ordered(self, kind: str) -> List[str]:
+        track_ids = (self._results.get((kind, i)) for i in range(self.counts[kind]))
+        return [track_id for track_id in track_ids if track_id]
+
+    def _call(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _produce(self, posts: Iterable[Dict], queue: asyncio.Queue):
+        # Listing and the comment walk are blocking PRAW I/O; pull them one item at a time off the loop
+        listed = []
+        posts = iter(posts)
+        while True:
+            post = await self._call(next, posts, _DONE)
+            if post is _DONE:
+                break
+            listed.append(post)
+            await queue.put(('post', self._next_index('post'), post))
+
+        comments = self.sync.iter_discussion_comments(listed)
+        while True:
+            comment = await self._call(next, comments, _DONE)
+            if comment is _DONE:
+                break
+            await queue.put(('comment', self._next_index('comment'), comment))
+
+    def _next_index(self, kind: str) -> int:
+        index = self.counts[kind]
+        self.counts[kind] += 1
+        return index
+
+    async def _extract(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        sync = self.sync
+        while True:
+            job = await inbox.get()
+            if job is _DONE:
+                return
+            kind, index, item = job
+
+            if item.get('cached'):
+                music_info = item['cached']['music_info']
+            elif item.get('skip_reason'):
+                music_info = None
+            else:
+                if kind == 'post':
+                    extractor = lambda: sync.extract_music_info(item, hydrate_spotify=False)
+                else:
+                    extractor = lambda: sync.extract_music_info_from_comment(item, hydrate_spotify=False)
+                async with self._limits[sync.get_source_type(item['url'] or '')]:
+                    try:
+                        music_info = await self._call(extractor)
+                    except Exception as e:
+                        logger.warning(f"Metadata extraction failed: {e}")
+                        music_info = None
+
+            await outbox.put((kind, index, item, music_info))
+
+    async def _hydrate(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        """Forward extracted items, collecting Spotify links into several-tracks batches
+
+        A batch is flushed when it is full or when nothing else is waiting, so
+        links are never held back behind extraction that is still in progress.
+        """
+        pending = []
+        while True:
+            job = await inbox.get()
+            if job is not _DONE:
+                kind, index, item, music_info = job
+                if self.sync.is_spotify_placeholder(music_info):
+                    pending.append(job)
+                else:
+                    await outbox.put(job)
+
+            if pending and (job is _DONE or len(pending) >= HYDRATE_BATCH_SIZE or inbox.empty()):
+                infos = await self._call(self.sync.hydrate_spotify_infos, [info for *_, info in pending])
+                for (kind, index, item, _), music_info in zip(pending, infos):
+                    await outbox.put((kind, index, item, music_info))
+                pending = []
+
+            if job is _DONE:
+                return
+
+    async def _resolve(self, inbox: asyncio.Queue):
+        while True:
+            job = await inbox.get()
+            if job is _DONE:
+                return
+            kind, index, item, music_info = job
+            resolve = self.sync.resolve_post if kind == 'post' else self.sync.resolve_comment
+            self._results[(kind, index)] = await self._call(resolve, item, music_info)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: archive import throughput (dump lines/sec) in-process vs a process pool
+
+Writes a synthetic NDJSON dump of --lines records (submissions titled from
+benchmarks/fixtures/overload_titles.txt, comments spread over discussion
+threads, plus other subreddits' records to filter out, as in a full monthly
+dump) and imports it into a throwaway backfill queue with one worker and
+with --workers processes. Both runs must queue the same items.
+
+Usage: python benchmarks/bench_archive_import.py [--lines N] [--workers N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from archive_import import ArchiveImporter
+from sync_cache import BackfillQueue
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'fixtures', 'overload_titles.txt')
+NOW = 1_760_000_000
+
+
+def load_titles():
+    with open(CORPUS, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def write_dump(path, lines):
+    rng = random.Random(0)
+    titles = load_titles()
+    threads = [f"thread{i}" for i in range(max(1, lines // 500))]
+    with open(path, 'w', encoding='utf-8') as dump:
+        for i in range(len(threads)):
+            dump.write(json.dumps({'id': threads[i], 'title': 'What are you listening to?', 'subreddit': 'theoverload',
+                                   'score': 50, 'num_comments': 500, 'created_utc': NOW - 86400, 'is_self': True,
+                                   'url': ''}) + '\n')
+        for i in range(lines - len(threads)):
+            subreddit = 'theoverload' if rng.random() < 0.3 else 'electronicmusic'
+            title = rng.choice(titles)
+            if rng.random() < 0.5:
+                record = {'id': f"p{i}", 'title': title, 'subreddit': subreddit, 'score': rng.randint(0, 40),
+                          'num_comments': rng.randint(0, 10), 'created_utc': NOW - rng.randint(0, 90) * 86400,
+                          'is_self': True, 'url': f"https://www.reddit.com/r/{subreddit}/comments/p{i}/"}
+            else:
+                record = {'id': f"c{i}", 'link_id': f"t3_{rng.choice(threads)}", 'body': f"check out: {title}",
+                          'subreddit': subreddit, 'score': rng.randint(0, 20), 'created_utc': NOW - 3600}
+            dump.write(json.dumps(record) + '\n')
+
+
+def measure(path, workers, workdir):
+    queue = BackfillQueue(os.path.join(workdir, f"queue-{workers}.db"))
+    importer = ArchiveImporter(queue, since_utc=NOW - 90 * 86400, until_utc=NOW, workers=workers)
+    start = time.perf_counter()
+    stats = importer.run([path])
+    return time.perf_counter() - start, stats, sorted(item['key'] for item in queue.pending(10 ** 9))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--lines', type=int, default=200_000, help="records in the synthetic dump")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench-archive-') as workdir:
+        path = os.path.join(workdir, 'dump.ndjson')
+        write_dump(path, args.lines)
+        serial_seconds, stats, serial_keys = measure(path, 1, workdir)
+        pooled_seconds, _, pooled_keys = measure(path, args.workers, workdir)
+
+    if pooled_keys != serial_keys:
+        print("Queued items differ between the process pool and in-process import")
+        sys.exit(1)
+
+    print(f"Dump: {args.lines:,} lines; queued {stats.get('posts.queued', 0):,} posts and "
+          f"{stats.get('comments.queued', 0):,} comments")
+    print(f"  in-process:   {args.lines / serial_seconds:>10,.0f} lines/sec")
+    print(f"  process pool: {args.lines / pooled_seconds:>10,.0f} lines/sec ({args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs --async wall time of a full run replayed from the corpus
+
+Replays the recorded corpus (by default benchmarks/fixtures/replay/synthetic)
+through sync.run() in both modes, with --latency added to every replayed
+Reddit, Spotify and metadata call. Everything a run does is timed, from the
+Reddit listing to the playlist update; with --async the listing is the
+pipeline's first stage. Both modes must resolve every item the same way and
+add the same track IDs in the same order.
+
+Usage: python benchmarks/bench_async_pipeline.py [--corpus DIR] [--rounds N] [--latency SECONDS]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from replay import replay_run
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'fixtures', 'replay', 'synthetic')
+
+
+def replay(corpus, latency, use_async):
+    # A fresh cache each round so no run benefits from another's searches
+    cache_dir = tempfile.mkdtemp(prefix='bench-async-')
+    try:
+        return replay_run(corpus, latency=latency, use_async=use_async, cache_dir=cache_dir)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument('--corpus', default=CORPUS)
+    arg_parser.add_argument('--rounds', type=int, default=3)
+    arg_parser.add_argument('--latency', type=float, default=0.02, help="seconds per replayed API call")
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    times = {'serial': [], 'async': []}
+    results = {}
+    for _ in range(args.rounds):
+        for mode in times:
+            results[mode] = replay(args.corpus, args.latency, mode == 'async')
+            times[mode].append(results[mode].seconds)
+
+    serial, concurrent = results['serial'], results['async']
+    if concurrent.added != serial.added or concurrent.resolutions != serial.resolutions:
+        print("Resolutions or track IDs differ between serial and async runs")
+        sys.exit(1)
+
+    print(f"Replay of {args.corpus}: {args.rounds} rounds, {args.latency * 1000:.0f}ms per API call, "
+          f"{serial.report['counters'].get('posts', 0)} posts")
+    for mode, seconds in times.items():
+        spans = results[mode].report['spans']
+        listing = spans.get('reddit.listing', {}).get('total_seconds', 0.0)
+        print(f"  {mode + ':':<7} mean {statistics.mean(seconds):>6.2f}s  min {min(seconds):>6.2f}s  "
+              f"(listing {listing:.2f}s)")
+    speedup = statistics.mean(times['serial']) / statistics.mean(times['async'])
+    print(f"  speedup: {speedup:.2f}x ({len(serial.added)} identical tracks added)")
+
+
+if __name__ == "__main__":
+    main()
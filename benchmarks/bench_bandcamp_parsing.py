@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: Bandcamp page metadata extraction (pages/sec, bytes read)
+
+Runs over the saved pages in benchmarks/fixtures/bandcamp. The "legacy"
+column is the previous approach (full BeautifulSoup tree over the whole page,
+then find_all for ld+json scripts and <title>); "streaming" feeds the page to
+BandcampPageScanner in 16 KiB chunks, the way it arrives from the network,
+and stops as soon as the scanner has what it needs. Both must agree on
+artist/track for every fixture.
+
+Usage: python benchmarks/bench_bandcamp_parsing.py [--rounds N]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bs4 import BeautifulSoup
+
+from media_metadata import BandcampPageScanner
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'bandcamp')
+CHUNK_SIZE = 16384
+
+
+def load_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def legacy_extract(content):
+    """extract_bandcamp_info's page handling before the streaming scanner"""
+    soup = BeautifulSoup(content, 'html.parser')
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string)
+            if '@type' in data and data['@type'] == 'MusicRecording':
+                track_name = data.get('name', '').strip()
+                artist_name = None
+                if 'byArtist' in data:
+                    if isinstance(data['byArtist'], dict):
+                        artist_name = data['byArtist'].get('name', '').strip()
+                    elif isinstance(data['byArtist'], list) and len(data['byArtist']) > 0:
+                        artist_name = data['byArtist'][0].get('name', '').strip()
+                if track_name:
+                    return (artist_name or '', track_name), len(content)
+        except json.JSONDecodeError:
+            continue
+
+    title_tag = soup.find('title')
+    if title_tag:
+        page_title = title_tag.get_text().strip()
+        if ' | ' in page_title:
+            parts = page_title.split(' | ')
+            return (parts[1].strip(), parts[0].strip()), len(content)
+    return None, len(content)
+
+
+def streaming_extract(content):
+    scanner = BandcampPageScanner()
+    for start in range(0, len(content), CHUNK_SIZE):
+        if scanner.feed(content[start:start + CHUNK_SIZE]):
+            break
+    page = scanner.metadata()
+    return ((page['artist'], page['track']) if page else None), scanner.bytes_read
+
+
+def measure(extract, pages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content in pages.values():
+            extract(content)
+    elapsed = time.perf_counter() - start
+    return len(pages) * rounds / elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument('--rounds', type=int, default=20)
+    args = arg_parser.parse_args()
+
+    pages = load_pages()
+    print(f"Fixtures: {len(pages)} pages x {args.rounds} rounds")
+    for name, content in pages.items():
+        legacy, legacy_bytes = legacy_extract(content)
+        current, current_bytes = streaming_extract(content)
+        if legacy != current:
+            print(f"Results differ for {name}: {legacy!r} vs {current!r}")
+            sys.exit(1)
+        print(f"  {name:<14} {current!r}: read {current_bytes:,} of {legacy_bytes:,} bytes")
+
+    legacy_rate = measure(lambda content: legacy_extract(content), pages, args.rounds)
+    current_rate = measure(lambda content: streaming_extract(content), pages, args.rounds)
+
+    print(f"  legacy (full BeautifulSoup tree): {legacy_rate:>8,.1f} pages/sec")
+    print(f"  streaming (ld+json scanner):      {current_rate:>8,.1f} pages/sec")
+    print(f"  speedup: {current_rate / legacy_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
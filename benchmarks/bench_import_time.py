@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of importing overload_spotify_sync and of the first parse
+
+Each round starts a fresh interpreter with `-X importtime`, imports the
+module and parses one title, and reports:
+
+  - wall time for `import overload_spotify_sync` (min/mean/max over rounds)
+  - the slowest modules in the import tree (cumulative microseconds)
+  - which of the heavy client libraries got imported along the way
+
+praw, spotipy, yt_dlp, bs4 and requests should all be absent: they are
+imported when a sync first talks to Reddit/Spotify or fetches metadata.
+
+Usage: python benchmarks/bench_import_time.py [--rounds N] [--top N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+HEAVY_MODULES = ('praw', 'spotipy', 'yt_dlp', 'bs4', 'requests')
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import overload_spotify_sync
+imported = time.perf_counter() - start
+parsed = overload_spotify_sync.parse_title('Burial - Archangel')
+print(json.dumps({{
+    'import_seconds': imported,
+    'parse_seconds': time.perf_counter() - start - imported,
+    'parsed': bool(parsed),
+    'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_probe():
+    # No credentials in the environment: importing and parsing must not need them
+    env = {key: value for key, value in os.environ.items() if not key.startswith(('REDDIT_', 'SPOTIFY_'))}
+    env['PYTHONPATH'] = ROOT
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE],
+                               capture_output=True, text=True, env=env, cwd=ROOT, check=True)
+    return json.loads(completed.stdout), completed.stderr
+
+
+def slowest_imports(importtime_log, top):
+    """(cumulative_us, module) for the top-level-ish entries of an -X importtime log"""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument('--rounds', type=int, default=5)
+    arg_parser.add_argument('--top', type=int, default=10)
+    args = arg_parser.parse_args()
+
+    results = []
+    for _ in range(args.rounds):
+        result, importtime_log = run_probe()
+        results.append(result)
+
+    import_times = [r['import_seconds'] * 1000 for r in results]
+    parse_times = [r['parse_seconds'] * 1000 for r in results]
+    print(f"import overload_spotify_sync: {args.rounds} rounds")
+    print(f"  import: min {min(import_times):.1f}ms  mean {statistics.mean(import_times):.1f}ms  "
+          f"max {max(import_times):.1f}ms")
+    print(f"  first parse_title: mean {statistics.mean(parse_times):.2f}ms")
+    heavy = results[-1]['heavy']
+    print(f"  heavy client libraries imported: {', '.join(heavy) if heavy else 'none'}")
+
+    print("  slowest imports (last round, cumulative):")
+    for cumulative, name in slowest_imports(importtime_log, args.top):
+        print(f"    {cumulative / 1000:>8.1f}ms {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak RSS of a run with large discussion threads, dict posts vs compact records
+
+Simulates a listing of --posts posts plus --threads discussion threads of
+--comments comments each, with fake PRAW objects that, like PRAW's, load the
+whole comment forest on first access and keep it (bodies, HTML, parent
+links) for as long as the submission is referenced. Each mode runs in a
+fresh interpreter and holds what a run holds until the playlist update:
+every post, qualifying comment and music_info.
+
+    dicts    the previous shapes: post dicts keeping the listed submission,
+             comment and music_info dicts
+    records  get_recent_posts / iter_discussion_comments as they are now:
+             __slots__ records, each thread re-fetched by ID for its walk and
+             freed after it
+
+Usage: python benchmarks/bench_memory.py [--posts N] [--threads N] [--comments N]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+TITLES = os.path.join(os.path.dirname(__file__), 'fixtures', 'overload_titles.txt')
+
+
+def load_titles():
+    with open(TITLES, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+class FakeComment:
+    """A comment with the fields (and references) a PRAW Comment carries"""
+
+    def __init__(self, comment_id, body, submission, parent):
+        self.id = comment_id
+        self.body = body
+        self.body_html = f'<div class="md"><p>{body}</p></div>'
+        self.score = 5
+        self.author = f"user{comment_id}"
+        self.permalink = f"/r/theoverload/comments/{submission.id}/_/{comment_id}/"
+        self.submission = submission
+        self.parent = parent
+        self.replies = []
+
+
+class FakeSubmission:
+    """Loads its comment forest lazily on first access and keeps it, as PRAW does"""
+
+    def __init__(self, sid, title, num_comments, titles):
+        self.id = sid
+        self.title = title
+        self.url = f"https://www.reddit.com/r/theoverload/comments/{sid}/"
+        self.score = 50
+        self.created_utc = time.time() - 3600
+        self.is_self = True
+        self.num_comments = num_comments
+        self.selftext = title * 20
+        self._titles = titles
+        self._comments = None
+
+    @property
+    def comments(self):
+        if self._comments is None:
+            top_level = []
+            for i in range(self.num_comments):
+                # Every top-level comment gets nine replies
+                parent = top_level[-1] if i % 10 else self
+                comment = FakeComment(f"{self.id}_{i}", f"check out: {self._titles[i % len(self._titles)]}",
+                                      self, parent)
+                if parent is self:
+                    top_level.append(comment)
+                else:
+                    parent.replies.append(comment)
+            self._comments = top_level
+        return self._comments
+
+
+class FakeReddit:
+    def __init__(self, posts, threads, comments, titles):
+        self.listing = {f"p{i}": (titles[i % len(titles)], 4) for i in range(posts)}
+        for i in range(threads):
+            self.listing[f"thread{i}"] = (f"Weekly share thread {i}", comments)
+        self.titles = titles
+
+    def subreddit(self, name):
+        return self
+
+    def new(self, limit=None):
+        for sid, (title, num_comments) in self.listing.items():
+            yield FakeSubmission(sid, title, num_comments, self.titles)
+
+    def submission(self, id):
+        return FakeSubmission(id, *self.listing[id], self.titles)
+
+
+def run_dicts(reddit):
+    """The run's working set as it was held before records"""
+    from comment_walker import CommentWalker
+    from title_parser import find_comment_url, parse_title, process_comment_text
+
+    posts = [{'title': s.title, 'url': s.url, 'score': s.score, 'id': s.id, 'num_comments': s.num_comments,
+              'submission': s, 'cached': None} for s in reddit.new()]
+    comments = []
+    for post in posts:
+        submission = post['submission']
+        if submission.num_comments > 20 and submission.score > 5:
+            for comment in CommentWalker(submission):
+                if comment.score >= 3 and len(comment.body.strip()) > 10:
+                    comments.append({'body': comment.body, 'score': comment.score, 'id': comment.id,
+                                     'url': find_comment_url(process_comment_text(comment.body)) or '',
+                                     'parent_post_title': post['title'], 'parent_post_id': post['id'],
+                                     'cached': None})
+    infos = [dict(parse_title(post['title'])) for post in posts]
+    infos += [dict(parse_title(process_comment_text(comment['body']))) for comment in comments]
+    return posts, comments, infos
+
+
+def run_records(reddit):
+    """The run's working set as held now"""
+    import logging
+    from overload_spotify_sync import OverloadSpotifySync
+    from replay import replay_config
+    from title_parser import parse_title, process_comment_text
+
+    logging.disable(logging.CRITICAL)
+    cache_path = os.path.join(tempfile.mkdtemp(prefix='bench-memory-'), 'cache.db')
+    sync = OverloadSpotifySync(config=replay_config(cache_path), reddit=reddit)
+    posts = sync.get_recent_posts()
+    comments = list(sync.iter_discussion_comments(posts))
+    infos = [parse_title(post['title']) for post in posts]
+    infos += [parse_title(process_comment_text(comment['body'])) for comment in comments]
+    return posts, comments, infos
+
+
+def child(mode, posts, threads, comments):
+    reddit = FakeReddit(posts, threads, comments, load_titles())
+    start = time.perf_counter()
+    posts, comments, infos = (run_dicts if mode == 'dicts' else run_records)(reddit)
+    print(json.dumps({
+        'seconds': time.perf_counter() - start,
+        'comments': len(comments),
+        'infos': len(infos),
+        # Linux reports kilobytes
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=3, help="discussion threads in the listing")
+    parser.add_argument('--comments', type=int, default=30_000, help="comments per discussion thread")
+    parser.add_argument('--child', choices=('dicts', 'records'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.posts, args.threads, args.comments)
+        return
+
+    # A fresh interpreter per mode: ru_maxrss never goes down
+    results = {}
+    for mode in ('dicts', 'records'):
+        completed = subprocess.run([sys.executable, __file__, '--child', mode, '--posts', str(args.posts),
+                                    '--threads', str(args.threads), '--comments', str(args.comments)],
+                                   capture_output=True, text=True, check=True)
+        results[mode] = json.loads(completed.stdout)
+
+    if results['dicts']['comments'] != results['records']['comments']:
+        print("Both modes must keep the same comments")
+        sys.exit(1)
+
+    print(f"{args.posts} posts + {args.threads} thread(s) of {args.comments:,} comments "
+          f"({results['records']['comments']:,} comments kept)")
+    for mode, result in results.items():
+        print(f"  {mode:8} peak RSS {result['peak_rss_mb']:>8.1f} MB   {result['seconds']:.2f}s")
+    print(f"  reduction: {1 - results['records']['peak_rss_mb'] / results['dicts']['peak_rss_mb']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full sync runs replayed from a recorded corpus (no network)
+
+Replays a tape recorded with `overload_spotify_sync.py --record DIR` (by
+default the frozen corpus in benchmarks/fixtures/replay/synthetic) through
+sync.run() several times and reports, in the manner of pytest-benchmark:
+
+  - end-to-end run time (min/mean/max/stddev over rounds)
+  - per-stage throughput from the run report spans (calls, seconds, calls/sec)
+  - match accuracy against the corpus's expected.json labels
+
+--latency adds a fixed delay to every replayed API call, to compare the
+serial and --async paths under realistic network conditions.
+
+Usage: python benchmarks/bench_replay.py [--corpus DIR] [--rounds N] [--latency SECONDS] [--async]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from replay import load_expected, replay_run, score_resolutions
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'fixtures', 'replay', 'synthetic')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument('--corpus', default=CORPUS)
+    arg_parser.add_argument('--rounds', type=int, default=5)
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="seconds per replayed API call")
+    arg_parser.add_argument('--async', dest='use_async', action='store_true')
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    times = []
+    for _ in range(args.rounds):
+        cache_dir = tempfile.mkdtemp(prefix='bench-replay-')
+        try:
+            result = replay_run(args.corpus, latency=args.latency, use_async=args.use_async, cache_dir=cache_dir)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        times.append(result.seconds)
+
+    mode = 'async' if args.use_async else 'serial'
+    print(f"Replay of {args.corpus}: {args.rounds} rounds, {mode}, {args.latency * 1000:.0f}ms per API call")
+    stddev = statistics.stdev(times) if len(times) > 1 else 0.0
+    print(f"  run time: min {min(times):.3f}s  mean {statistics.mean(times):.3f}s  "
+          f"max {max(times):.3f}s  stddev {stddev:.3f}s")
+
+    print("  per-stage throughput (last round):")
+    for name, stats in result.report['spans'].items():
+        rate = stats['count'] / stats['total_seconds'] if stats['total_seconds'] else float('inf')
+        print(f"    {name:<26} {stats['count']:>5} calls {stats['total_seconds']:>8.3f}s {rate:>10,.1f}/s")
+
+    expected = load_expected(args.corpus)
+    score = score_resolutions(result.resolutions, expected)
+    print(f"  accuracy: {score['correct']}/{score['labeled']} ({score['accuracy']:.1%}), "
+          f"{len(result.added)} tracks added")
+    for key, miss in score['wrong'].items():
+        print(f"    {key}: expected {miss['expected']}, got {miss['got']}")
+    skipped = result.report['skipped_posts']
+    print(f"  pre-filter skipped {len(skipped)} non-music post(s)")
+    for post in skipped:
+        print(f"    {post['id']}: {post['title'][:50]!r} ({post['reason']})")
+
+    if result.misses:
+        # Queries the tape has no answer for: the code now asks Spotify something new
+        print(f"  {len(result.misses)} call(s) not on the tape, e.g. {result.misses[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: title parsing throughput (titles/sec)
+
+Runs the parsing helpers used per post and per Spotify candidate over the
+title corpus in benchmarks/fixtures/overload_titles.txt. The "legacy" column
+re-implements the previous approach (pattern lists rebuilt and compiled via
+the re module cache on every call) so before/after can be compared on the
+same machine; both must produce identical results.
+
+It then times title_parser.parse_many over the corpus repeated to --batch
+titles, in this process and across a process pool of --workers processes.
+
+Usage: python benchmarks/bench_title_parsing.py [--rounds N] [--batch N] [--workers N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import title_parser
+from patterns import REMIX_PATTERNS
+from track_matcher import has_version_suffix, tracks_match_with_variations
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'fixtures', 'overload_titles.txt')
+
+
+def load_titles():
+    with open(CORPUS, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+class LegacyParser:
+    """The per-call pattern lists as they were before patterns.py existed"""
+
+    def is_non_music_post(self, title):
+        title_lower = title.lower()
+        for pattern in [
+            r'\b(what|who|where|when|why|how|does|anyone|any\s+\w+\s+heads)\b',
+            r'\b(question|help|looking\s+for|recommend|suggestion)\b',
+            r'\b(thoughts|opinion|discussion|thread|post)\b',
+            r'\b(tonight|today|tomorrow|this\s+weekend|next\s+week)\b',
+            r'\b(event|show|concert|festival|party|club|venue)\b',
+            r'\b(tickets|sold\s+out|presale)\b',
+            r'\b(tracks?\s+that|music\s+that|songs?\s+that)\b',
+            r'\b(playlist|mix|set)\s+(for|that|to)\b',
+            r'\b(this\s+sub|subreddit|community|weekly|daily)\b',
+            r'\b(rules|guidelines|announcement)\b',
+            r'^A\s+\w+[\w\-]*\s+remix\s+of\s+',
+            r'^An\s+\w+[\w\-]*\s+remix\s+of\s+',
+        ]:
+            if re.search(pattern, title_lower, re.IGNORECASE):
+                return True
+        return False
+
+    def remix_match(self, title):
+        for pattern in [
+            r'\((.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)\)',
+            r'\[(.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)\]',
+            r'feat\.?\s+(.+?)\s*[\(\[](.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)[\)\]]',
+            r'ft\.?\s+(.+?)\s*[\(\[](.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)[\)\]]',
+        ]:
+            match = re.search(pattern, title, re.IGNORECASE)
+            if match:
+                return match.groups()
+        return None
+
+    def clean_title_for_parsing(self, title):
+        clean_title = title
+        for pattern in [r'\s*[\(\[].*?(remix|mix|edit|rework|vip|bootleg|flip).*?[\)\]]',
+                        r'\s*[\(\[].*?remix.*?[\)\]]']:
+            clean_title = re.sub(pattern, '', clean_title, flags=re.IGNORECASE)
+        for pattern in [r'\s*\[.*?\d{4}.*?\]', r'\s*\(.*?\d{4}.*?\)', r'\s*\[.*?Records.*?\]',
+                        r'\s*\(.*?Records.*?\)', r'\s*\[.*?Label.*?\]', r'\s*\(.*?Label.*?\)']:
+            clean_title = re.sub(pattern, '', clean_title, flags=re.IGNORECASE)
+        return clean_title.strip()
+
+    def artist_track(self, clean_title):
+        for pattern in [r'^(.+?)\s*[-–—]\s*(.+)$', r'^(.+?)\s*:\s*(.+)$', r'^(.+?)\s+by\s+(.+)$',
+                        r'^\[(.+?)\]\s*(.+)$', r'^(.+?)\s*\|\s*(.+)$', r'^(.+?)\s*"(.+?)"']:
+            match = re.match(pattern, clean_title.strip(), re.IGNORECASE)
+            if match:
+                return match.group(1).strip(), match.group(2).strip()
+        return '', clean_title.strip()
+
+    def process_comment_text(self, text):
+        cleaned = text.strip()
+        for pattern in [r'^check\s+out\s*:?\s*', r'^listening\s+to\s*:?\s*', r'^currently\s+playing\s*:?\s*',
+                        r'^now\s+playing\s*:?\s*', r'^this\s+is\s+good\s*:?\s*', r'^recommend\s*:?\s*',
+                        r'^try\s+this\s*:?\s*']:
+            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+        return cleaned.strip('"\'')
+
+    def has_version_suffix(self, title):
+        for pattern in [r'-\s+(.*?)\s+(version|mix|edit|remix)', r'-\s+(extended|radio|instrumental|live)',
+                        r'-\s+(remaster|remastered|deluxe)', r'\(\s*(.*?)\s*(version|mix|edit)\s*\)']:
+            if re.search(pattern, title.lower()):
+                return True
+        return False
+
+    def tracks_match_with_variations(self, track1, track2):
+        def clean_track(text):
+            text = text.replace('’', "'").replace('“', '"').replace('”', '"')
+            text = re.sub(r'\s*\(\d{4}\)\s*', '', text)
+            text = re.sub(r'\s*\[\d{4}\]\s*', '', text)
+            text = re.sub(r'\s*\(remaster\w*\)\s*', '', text, flags=re.IGNORECASE)
+            text = re.sub(r'\s*\(original mix\)\s*', '', text, flags=re.IGNORECASE)
+            text = re.sub(r'\s*\(radio edit\)\s*', '', text, flags=re.IGNORECASE)
+            return text.strip()
+        clean1, clean2 = clean_track(track1), clean_track(track2)
+        return clean1 in clean2 or clean2 in clean1
+
+
+class CurrentParser:
+    """Adapter exposing the same operations on the current implementation"""
+
+    def is_non_music_post(self, title):
+        return title_parser.is_non_music_post(title)
+
+    def remix_match(self, title):
+        for pattern in REMIX_PATTERNS:
+            match = pattern.search(title)
+            if match:
+                return match.groups()
+        return None
+
+    def clean_title_for_parsing(self, title):
+        return title_parser.clean_title_for_parsing(title)
+
+    def artist_track(self, clean_title):
+        return title_parser.split_artist_track(clean_title)
+
+    def process_comment_text(self, text):
+        return title_parser.process_comment_text(text)
+
+    def has_version_suffix(self, title):
+        return has_version_suffix(title)
+
+    def tracks_match_with_variations(self, track1, track2):
+        return tracks_match_with_variations(track1, track2)
+
+
+def parse_title(parser, title):
+    """One post's worth of parsing plus one candidate comparison"""
+    clean_title = parser.clean_title_for_parsing(title)
+    artist, track = parser.artist_track(clean_title)
+    return (
+        parser.is_non_music_post(title),
+        parser.remix_match(title),
+        clean_title,
+        artist,
+        track,
+        parser.process_comment_text(f"check out: {title}"),
+        parser.has_version_suffix(title),
+        parser.tracks_match_with_variations(track.lower(), title.lower()),
+    )
+
+
+def measure(parser, titles, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for title in titles:
+            parse_title(parser, title)
+    elapsed = time.perf_counter() - start
+    return len(titles) * rounds / elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument('--rounds', type=int, default=200)
+    arg_parser.add_argument('--batch', type=int, default=100_000, help="titles per parse_many batch")
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = arg_parser.parse_args()
+
+    titles = load_titles()
+    legacy, current = LegacyParser(), CurrentParser()
+
+    mismatches = [t for t in titles if parse_title(legacy, t) != parse_title(current, t)]
+    if mismatches:
+        print(f"Results differ for {len(mismatches)} title(s), e.g. {mismatches[0]!r}")
+        sys.exit(1)
+
+    legacy_rate = measure(legacy, titles, args.rounds)
+    current_rate = measure(current, titles, args.rounds)
+
+    print(f"Corpus: {len(titles)} titles x {args.rounds} rounds")
+    print(f"  legacy (per-call pattern lists): {legacy_rate:>10,.0f} titles/sec")
+    print(f"  current (compiled registry):     {current_rate:>10,.0f} titles/sec")
+    print(f"  speedup: {current_rate / legacy_rate:.2f}x")
+
+    batch = (titles * (args.batch // len(titles) + 1))[:args.batch]
+    start = time.perf_counter()
+    serial = title_parser.parse_many(batch, workers=1)
+    serial_rate = len(batch) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    pooled = title_parser.parse_many(batch, workers=args.workers)
+    pooled_rate = len(batch) / (time.perf_counter() - start)
+    if pooled != serial:
+        print("parse_many results differ between the process pool and in-process parsing")
+        sys.exit(1)
+
+    print(f"parse_many: {len(batch):,} titles")
+    print(f"  in-process:   {serial_rate:>10,.0f} titles/sec")
+    print(f"  process pool: {pooled_rate:>10,.0f} titles/sec ({args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
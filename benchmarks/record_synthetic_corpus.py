@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Build the frozen replay corpus in benchmarks/fixtures/replay/synthetic
+
+A live recording (overload_spotify_sync.py --record) can't be checked in
+with known-correct answers, so this records a run against simulated
+services instead: a week of r/theoverload posts and one discussion thread
+built from labeled titles, a small Spotify catalogue that contains each
+correct track alongside decoys (live versions, the original of a remix,
+tribute covers), YouTube video titles and the Bandcamp fixture pages. Link
+posts carry Reddit's oEmbed block as live ones do; the Bandcamp album's names
+the album rather than the track, so that page is still scraped. The run goes
+through replay.Recorder exactly as a live one would, and
+expected.json is then overwritten with the ground-truth labels, so replay
+accuracy measures the matcher rather than agreement with itself.
+
+Usage: python benchmarks/record_synthetic_corpus.py [--output DIR]
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from media_metadata import TieredMetadataResolver
+from overload_spotify_sync import OverloadSpotifySync
+from replay import EXPECTED_FILE, Recorder, ReplayHttp, Tape, replay_config
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+OUTPUT = os.path.join(FIXTURES, 'replay', 'synthetic')
+
+# (title, link, correct (artists, track name) or None when nothing should be added)
+# Links: 'self' (reddit post), 'youtube:<video title>', 'spotify', 'spotify-album',
+# 'bandcamp:<fixture>' (a track) or 'bandcamp:<fixture>:<album title>'
+POSTS = [
+    ("Dexter - I Don't Care [Klakson, 2000]", 'self', (['Dexter'], "I Don't Care")),
+    ("DJ Qu - Prayer [Strength Music, 2011]", 'self', (['DJ Qu'], 'Prayer')),
+    ("If We Ever — High Contrast (Overmono Remix)", 'self', (['High Contrast'], 'If We Ever - Overmono Remix')),
+    ("Surgeon - Badger Bite [Dynamic Tension, 2010]", 'youtube:Surgeon - Badger Bite', (['Surgeon'], 'Badger Bite')),
+    ("Beatrice Dillon and Call Super - Inkjet", 'self', (['Beatrice Dillon', 'Call Super'], 'Inkjet')),
+    ("Random misleading title that says nothing about music", 'youtube:Jeff Mills - The Bells',
+     (['Jeff Mills'], 'The Bells')),
+    ("Deadmau5 - Strobe (Eric Prydz Remix)", 'self', (['deadmau5'], 'Strobe - Eric Prydz Remix')),
+    ("Disclosure - Latch", 'youtube:Disclosure - Latch (Official Video)', (['Disclosure'], 'Latch')),
+    ("Kerri Chandler: Rain", 'self', (['Kerri Chandler'], 'Rain')),
+    ("Moodymann | Shades of Jae", 'self', (['Moodymann'], 'Shades of Jae')),
+    ('Theo Parrish "Summertime Is Here"', 'self', (['Theo Parrish'], 'Summertime Is Here')),
+    ("Sweet Exorcist by Testone", 'self', (['Sweet Exorcist'], 'Testone')),
+    ("Joy Orbison - Hyph Mngo [Hotflush Recordings]", 'youtube:Joy Orbison - Hyph Mngo',
+     (['Joy Orbison'], 'Hyph Mngo')),
+    ("Ricardo Villalobos – Dexter (Original Mix)", 'self', (['Ricardo Villalobos'], 'Dexter')),
+    ("Overmono - So U Kno (Extended Mix)", 'spotify', (['Overmono'], 'So U Kno - Extended Mix')),
+    ("Lone - Pineapple Crush [R&S Records, 2012]", 'spotify-album', (['Lone'], 'Pineapple Crush')),
+    ("Octex - Bubblin (2022)", 'bandcamp:track.html', (['Octex'], 'Bubblin')),
+    ("Drexciya - Bubble Metropolis", "bandcamp:album.html:Neptune's Lair", (['Drexciya'], 'Bubble Metropolis')),
+    ("Burial - Archangel (Hyperdub Records)", 'self', (['Burial'], 'Archangel')),
+    ("Marcel Dettmann - Seduction (Ben Klock Remix)", 'self', (['Marcel Dettmann'], 'Seduction - Ben Klock Remix')),
+    ("Robert Hood — Minus", 'self', (['Robert Hood'], 'Minus')),
+    ("Unknown Producer - Never Released Dubplate", 'self', None),
+    ("Any dub techno heads here? Looking for recommendations", 'self', None),
+    ("Tickets for the festival sold out already", 'self', None),
+]
+
+THREAD_TITLE = "What are you listening to this week? Weekly thread"
+
+# Discussion thread comments: (body, correct (artists, track name) or None)
+COMMENTS = [
+    ("Basic Channel - Phylyps Trak, still sounds like the future", (['Basic Channel'], 'Phylyps Trak')),
+    ("Laurent Garnier - The Man With The Red Face", (['Laurent Garnier'], 'The Man With The Red Face')),
+    ("Model 500 - No UFO's (Vocal Mix)", (['Model 500'], "No UFO's - Vocal Mix")),
+    ("Anton Zap - Mind Rotation", (['Anton Zap'], 'Mind Rotation')),
+    ("Floating Points - Nuits Sonores", (['Floating Points'], 'Nuits Sonores')),
+    ("Call Super - Arpo Sunder on repeat all week", (['Call Super'], 'Arpo Sunder')),
+    ("Daniel Avery - Drone Logic", (['Daniel Avery'], 'Drone Logic')),
+    ("DJ Stingray 313 - Kill Switch", (['DJ Stingray 313'], 'Kill Switch')),
+    ("Jeff Mills - Gamma Player", (['Jeff Mills'], 'Gamma Player')),
+    ("Diern - Alchemy (Mano Le Tough Remix)", (['Diern'], 'Alchemy - Mano Le Tough Remix')),
+    ("Porter Robinson - Language", (['Porter Robinson'], 'Language')),
+    ("Flume - Never Be Like You", (['Flume'], 'Never Be Like You')),
+    ("Moderat - A New Error", (['Moderat'], 'A New Error')),
+    ("Justice - Genesis", (['Justice'], 'Genesis')),
+    ("Caroline Polachek - Pretty In Possible", (['Caroline Polachek'], 'Pretty In Possible')),
+    ("Prime Minister of Doom - Deep In Your Heart", (['Prime Minister of Doom'], 'Deep In Your Heart')),
+    ("Aphex Twin - Windowlicker", (['Aphex Twin'], 'Windowlicker')),
+    ("Paranoid London - Eating Glue", (['Paranoid London'], 'Eating Glue')),
+    ("Surgeon - Klonk", (['Surgeon'], 'Klonk')),
+    ("Rhythm & Sound - Never Tell You", (['Rhythm & Sound'], 'Never Tell You')),
+    ("great thread as always, thanks everyone", None),
+    ("Nothing new from me this week sadly", None),
+    ("Some Bedroom Act - Demo That Never Came Out", None),
+    ("Omar S - Here's Your Trance Now Dance", (['Omar S'], "Here's Your Trance Now Dance")),
+    ("Burial - Untrue, forever", (['Burial'], 'Untrue')),
+    # Tracks mentioned again: resolved once, their scores pooled
+    ("kerri chandler - rain", (['Kerri Chandler'], 'Rain')),
+    ("Jeff Mills – Gamma Player", (['Jeff Mills'], 'Gamma Player')),
+]
+
+# Catalogue entries that must not be picked: (artists, track name)
+DECOYS = [
+    (['Dexter'], "I Don't Care - Live"),
+    (['deadmau5'], 'Strobe'),
+    (['Disclosure'], 'Latch - Sam Smith VIP Mix'),
+    (['Tribute Players'], 'Latch'),
+    (['Burial'], 'Archangel - Live at Fabric'),
+    (['Marcel Dettmann'], 'Seduction'),
+    (['Jeff Mills'], 'The Bells - 2011 Remaster'),
+    (['Karaoke Stars'], 'Windowlicker'),
+    (['Model 500'], "No UFO's"),
+    (['High Contrast'], 'If We Ever'),
+]
+
+
+def track_id(artists, name):
+    return re.sub(r'[^a-z0-9]+', '', f"{artists[0]}{name}".lower())[:22]
+
+
+class SimSpotify:
+    """Spotify Web API over a small in-memory catalogue"""
+
+    def __init__(self, catalogue):
+        self.catalogue = catalogue
+        self.albums_by_id = {}
+        self.playlist_track_ids = []
+
+    def search(self, q, type, limit):
+        fields = dict(re.findall(r'(artist|track):"([^"]*)"', q))
+        free = re.sub(r'(artist|track):"[^"]*"', ' ', q).lower().split()
+        items = []
+        for track in self.catalogue:
+            artists = ' '.join(artist['name'] for artist in track['artists']).lower()
+            text = f"{artists} {track['name'].lower()}"
+            if 'artist' in fields and fields['artist'].lower() not in artists:
+                continue
+            if 'track' in fields and fields['track'].lower() not in track['name'].lower():
+                continue
+            if all(word in text for word in free):
+                items.append(track)
+        return {'tracks': {'items': items[:limit]}}
+
+    def tracks(self, ids):
+        by_id = {track['id']: track for track in self.catalogue}
+        return {'tracks': [by_id.get(i) for i in ids]}
+
+    def albums(self, ids):
+        return {'albums': [self.albums_by_id.get(i) for i in ids]}
+
+    def playlist(self, playlist_id, fields=None):
+        return {'name': 'notes from r/theoverload', 'snapshot_id': 'sim-1',
+                'tracks': {'total': len(self.playlist_track_ids)}}
+
+    def playlist_items(self, playlist_id, fields=None, offset=0, additional_types=('track',)):
+        return {'items': [{'track': {'id': i}} for i in self.playlist_track_ids[offset:]], 'next': None}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        self.playlist_track_ids.extend(items)
+        return {'snapshot_id': f"sim-{len(self.playlist_track_ids)}"}
+
+
+class SimComment:
+    def __init__(self, comment_id, body, score):
+        self.id = comment_id
+        self.body = body
+        self.score = score
+        self.replies = []
+
+
+class SimSubmission:
+    def __init__(self, submission_id, title, url, created_utc, score=12, comments=(), media=None):
+        self.id = submission_id
+        self.title = title
+        self.url = url
+        self.created_utc = created_utc
+        self.score = score
+        self.comments = list(comments)
+        self.num_comments = len(self.comments)
+        self.is_self = url.startswith('https://www.reddit.com/')
+        self.link_flair_text = None
+        self.media = self.secure_media = media
+
+
+class SimReddit:
+    def __init__(self, submissions):
+        self.submissions = submissions
+
+    def subreddit(self, name):
+        return self
+
+    def new(self, limit=None):
+        return iter(self.submissions)
+
+    def submission(self, id):
+        return next(submission for submission in self.submissions if submission.id == id)
+
+    def info(self, fullnames):
+        return iter([])
+
+
+def build(output):
+    now = time.time()
+    catalogue, expected, submissions, videos, pages = [], {}, [], {}, {}
+
+    def add_track(artists, name):
+        track = {'id': track_id(artists, name), 'name': name, 'artists': [{'name': a} for a in artists]}
+        if not any(existing['id'] == track['id'] for existing in catalogue):
+            catalogue.append(track)
+        return track
+
+    spotify = SimSpotify(catalogue)
+    for i, (title, link, truth) in enumerate(POSTS):
+        post_id = f"p{i:02d}"
+        track = add_track(*truth) if truth else None
+        url = f"https://www.reddit.com/r/theoverload/comments/{post_id}/"
+        media = None
+        if link.startswith('youtube:'):
+            url = f"https://www.youtube.com/watch?v=vid{i:02d}"
+            videos[url] = {'title': link.split(':', 1)[1], 'uploader': 'Uploads'}
+            media = {'type': 'youtube.com', 'oembed': {
+                'provider_name': 'YouTube', 'title': videos[url]['title'], 'author_name': 'Uploads'}}
+        elif link == 'spotify':
+            url = f"https://open.spotify.com/track/{track['id']}"
+        elif link == 'spotify-album':
+            album_id = f"album{i:02d}"
+            spotify.albums_by_id[album_id] = {'id': album_id, 'tracks': {'items': [track]}}
+            url = f"https://open.spotify.com/album/{album_id}"
+        elif link.startswith('bandcamp:'):
+            _, fixture, *album = link.split(':')
+            kind = 'album' if album else 'track'
+            url = f"https://artist{i:02d}.bandcamp.com/{kind}/{fixture[:-5]}"
+            with open(os.path.join(FIXTURES, 'bandcamp', fixture), 'rb') as f:
+                pages[url] = {'status': 200, 'body': base64.b64encode(f.read()).decode('ascii')}
+            artist = truth[0][0]
+            name = album[0] if album else truth[1]
+            media = {'type': 'bandcamp.com', 'oembed': {
+                'provider_name': 'BandCamp', 'title': f"{name}, by {artist}", 'author_name': artist}}
+        submissions.append(SimSubmission(post_id, title, url, now - 3600 * (i + 1), media=media))
+        expected[f"post:{post_id}"] = track['id'] if track else None
+
+    comments = []
+    for i, (body, truth) in enumerate(COMMENTS):
+        track = add_track(*truth) if truth else None
+        comments.append(SimComment(f"c{i:02d}", body, score=5))
+        expected[f"comment:c{i:02d}"] = track['id'] if track else None
+    submissions.append(SimSubmission('thread', THREAD_TITLE, 'https://www.reddit.com/r/theoverload/comments/thread/',
+                                     now - 1800, score=30, comments=comments))
+    expected['post:thread'] = None
+    submissions.sort(key=lambda submission: submission.created_utc, reverse=True)
+
+    for artists, name in DECOYS:
+        add_track(artists, name)
+
+    cache_dir = tempfile.mkdtemp(prefix='synthetic-')
+    sync = OverloadSpotifySync(config=replay_config(os.path.join(cache_dir, 'cache.db')),
+                               reddit=SimReddit(submissions), spotify=spotify)
+    sync.metadata_resolver = TieredMetadataResolver([
+        ('embed', sync.embedded_metadata.fetch),
+        ('oembed', lambda url, host: videos.get(url)),
+    ])
+    page_tape = Tape()
+    page_tape.pages = pages
+    sync.http = ReplayHttp(page_tape)
+
+    recorder = Recorder(sync)
+    sync.run()
+    recorder.tape.recorded_at = now
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    recorder.save(output)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    # Replace what this run resolved with the ground truth
+    with open(os.path.join(output, EXPECTED_FILE), 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(expected.items())), f, indent=1, ensure_ascii=False)
+        f.write('\n')
+
+    recorded = recorder.resolutions
+    correct = sum(1 for key, want in expected.items() if recorded.get(key) == want)
+    print(f"Recorded {len(submissions)} submissions, {len(COMMENTS)} comments, "
+          f"{len(recorder.tape.spotify)} Spotify calls to {output}")
+    print(f"Accuracy of this run against the labels: {correct}/{len(expected)}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument('--output', default=OUTPUT)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    build(args.output)
+
+
+if __name__ == "__main__":
+    main()
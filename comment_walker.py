@@ -0,0 +1,100 @@
+"""
+Streaming traversal of Reddit comment trees for discussion-thread detection
+"""
+
+import math
+import time
+from collections import deque
+from typing import Iterator, Optional
+
+# Substrings that suggest a comment shares a track (link, "Artist - Track", "Track by Artist")
+TRACK_LINK_MARKERS = ('youtube.com', 'youtu.be', 'spotify.com', 'soundcloud.com', 'bandcamp.com', 'http', 'www.')
+
+
+def has_track_indicator(text: str) -> bool:
+    """Whether a comment body contains a URL or an artist/track separator"""
+    if not text:
+        return False
+    text = text.lower()
+    return any(marker in text for marker in TRACK_LINK_MARKERS) or ' - ' in text or ' by ' in text
+
+
+def is_discussion_candidate(num_comments: int, score: int) -> bool:
+    """Cheap criteria for a discussion thread: comment count > 20 and post upvotes > 5"""
+    return num_comments > 20 and score > 5
+
+
+class CommentWalker:
+    """Breadth-first walk over a submission's comments, expanding MoreComments lazily
+
+    Comments are yielded in the same order as CommentForest.list(), but
+    "load more" stubs are only fetched when the walk actually reaches them,
+    so a consumer that stops early never pays for the rest of the tree. At
+    most `max_expansions` stubs are fetched (like replace_more(limit=...)).
+    """
+
+    def __init__(self, submission, max_expansions: int = 10):
+        self.submission = submission
+        self.max_expansions = max_expansions
+        self.expansions = 0
+        self.expansion_seconds = 0.0
+
+    def __iter__(self) -> Iterator:
+        from praw.models import MoreComments
+
+        queue = deque(self.submission.comments)
+        seen = set()
+        while queue:
+            item = queue.popleft()
+            if isinstance(item, MoreComments):
+                if self.expansions < self.max_expansions:
+                    self.expansions += 1
+                    start = time.perf_counter()
+                    queue.extend(item.comments())
+                    self.expansion_seconds += time.perf_counter() - start
+                continue
+
+            # Expanded batches can repeat comments that are already in the tree
+            if item.id in seen:
+                continue
+            seen.add(item.id)
+            yield item
+            queue.extend(item.replies)
+
+
+class TrackDensity:
+    """Running share of comments that look like track shares
+
+    decision() reports whether the density is clearly above or below the
+    threshold: once `min_sample` comments are in, the observed share must sit
+    more than `z` standard errors (of a binomial proportion at the threshold)
+    away from it. Returns None while the sample is still inconclusive.
+    """
+
+    def __init__(self, threshold: float = 0.25, min_sample: int = 20, z: float = 2.0):
+        self.threshold = threshold
+        self.min_sample = min_sample
+        self.z = z
+        self.total = 0
+        self.indicating = 0
+
+    def add(self, text: str) -> bool:
+        self.total += 1
+        indicating = has_track_indicator(text)
+        if indicating:
+            self.indicating += 1
+        return indicating
+
+    @property
+    def density(self) -> float:
+        return self.indicating / self.total if self.total else 0.0
+
+    def decision(self) -> Optional[bool]:
+        if self.total < self.min_sample:
+            return None
+        margin = self.z * math.sqrt(self.threshold * (1 - self.threshold) / self.total)
+        if self.density >= self.threshold + margin:
+            return True
+        if self.density < self.threshold - margin:
+            return False
+        return None
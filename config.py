@@ -22,6 +22,50 @@ class Config:
         self.min_upvotes = int(self._get_env_var('MIN_UPVOTES', '3'))
         self.playlist_name = self._get_env_var('PLAYLIST_NAME', 'notes from r/theoverload')
         
+        # Extraction concurrency (worker threads per source type)
+        self.extraction_workers = {
+            'youtube': int(self._get_env_var('YOUTUBE_WORKERS', '4')),
+            'soundcloud': int(self._get_env_var('SOUNDCLOUD_WORKERS', '2')),
+            'bandcamp': int(self._get_env_var('BANDCAMP_WORKERS', '2')),
+            'spotify': int(self._get_env_var('SPOTIFY_WORKERS', '2')),
+        }
+        
+        # Long-lived yt-dlp workers and how many queued URLs each takes at once
+        self.ytdlp_workers = int(self._get_env_var('YTDLP_WORKERS', '4'))
+        self.ytdlp_batch_size = int(self._get_env_var('YTDLP_BATCH_SIZE', '4'))
+        
+        # Minimum seconds between requests to each host
+        self.host_rate_limits = {
+            'youtube': float(self._get_env_var('YOUTUBE_MIN_INTERVAL', '0.2')),
+            'soundcloud': float(self._get_env_var('SOUNDCLOUD_MIN_INTERVAL', '0.2')),
+            'bandcamp': float(self._get_env_var('BANDCAMP_MIN_INTERVAL', '0.5')),
+        }
+        
+        # Spotify Web API token bucket: sustained requests/second and burst size, shared by all threads
+        self.spotify_requests_per_second = float(self._get_env_var('SPOTIFY_REQUESTS_PER_SECOND', '10'))
+        self.spotify_burst = int(self._get_env_var('SPOTIFY_BURST', '5'))
+        self.spotify_max_retries = int(self._get_env_var('SPOTIFY_MAX_RETRIES', '3'))
+        
+        # Maximum Spotify searches spent resolving one post/comment (across all fallbacks)
+        self.spotify_query_budget = int(self._get_env_var('SPOTIFY_QUERY_BUDGET', '15'))
+        
+        # --async pipeline: bound on each inter-stage queue, and concurrent Spotify resolutions
+        self.async_queue_size = int(self._get_env_var('ASYNC_QUEUE_SIZE', '32'))
+        self.async_resolve_workers = int(self._get_env_var('ASYNC_RESOLVE_WORKERS', '4'))
+        
+        # Persistent cache (shared SQLite file carried between runs)
+        self.cache_path = self._get_env_var('SYNC_CACHE_PATH', '.sync_cache.db')
+        self.negative_cache_ttl_hours = float(self._get_env_var('NEGATIVE_CACHE_TTL_HOURS', '24'))
+        self.search_cache_ttl_hours = float(self._get_env_var('SEARCH_CACHE_TTL_HOURS', '168'))
+        self.http_cache_ttl_hours = float(self._get_env_var('HTTP_CACHE_TTL_HOURS', '168'))
+        
+        # Retries (with backoff) for outbound HTTP on 429/5xx
+        self.http_retries = int(self._get_env_var('HTTP_RETRIES', '3'))
+        
+        # Run report (stage timings and counters); empty paths disable the output
+        self.run_report_path = self._get_env_var('RUN_REPORT_PATH', 'run_report.json')
+        self.prometheus_textfile_path = self._get_env_var('PROMETHEUS_TEXTFILE_PATH', '')
+        
         # Validation
         self._validate_config()
     
@@ -41,6 +85,50 @@ class Config:
         
         if not self.playlist_name.strip():
             raise ValueError("PLAYLIST_NAME cannot be empty")
+        
+        if self.negative_cache_ttl_hours < 0:
+            raise ValueError("NEGATIVE_CACHE_TTL_HOURS must be non-negative")
+        
+        if self.search_cache_ttl_hours < 0:
+            raise ValueError("SEARCH_CACHE_TTL_HOURS must be non-negative")
+        
+        if self.http_cache_ttl_hours < 0:
+            raise ValueError("HTTP_CACHE_TTL_HOURS must be non-negative")
+        
+        if self.http_retries < 0:
+            raise ValueError("HTTP_RETRIES must be non-negative")
+        
+        if self.spotify_requests_per_second <= 0:
+            raise ValueError("SPOTIFY_REQUESTS_PER_SECOND must be positive")
+        
+        if self.spotify_burst < 1:
+            raise ValueError("SPOTIFY_BURST must be at least 1")
+        
+        if self.spotify_max_retries < 0:
+            raise ValueError("SPOTIFY_MAX_RETRIES must be non-negative")
+        
+        if self.spotify_query_budget < 1:
+            raise ValueError("SPOTIFY_QUERY_BUDGET must be at least 1")
+        
+        for source, workers in self.extraction_workers.items():
+            if workers < 1:
+                raise ValueError(f"{source.upper()}_WORKERS must be at least 1")
+        
+        if self.async_queue_size < 1:
+            raise ValueError("ASYNC_QUEUE_SIZE must be at least 1")
+        
+        if self.async_resolve_workers < 1:
+            raise ValueError("ASYNC_RESOLVE_WORKERS must be at least 1")
+        
+        if self.ytdlp_workers < 1:
+            raise ValueError("YTDLP_WORKERS must be at least 1")
+        
+        if self.ytdlp_batch_size < 1:
+            raise ValueError("YTDLP_BATCH_SIZE must be at least 1")
+        
+        for host, interval in self.host_rate_limits.items():
+            if interval < 0:
+                raise ValueError(f"{host.upper()}_MIN_INTERVAL must be non-negative")
     
     def __str__(self) -> str:
         """String representation (hiding sensitive information)"""
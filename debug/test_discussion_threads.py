@@ -17,7 +17,7 @@ def test_discussion_threads():
     
     print("=== TESTING DISCUSSION THREAD DETECTION ===")
     
-    # Get recent posts (including submission objects)
+    # Get recent posts (records carry the comment count, not the submission)
     posts = sync.get_recent_posts()
     
     if not posts:
@@ -30,16 +30,15 @@ def test_discussion_threads():
     discussion_threads = []
     
     for post in posts:
-        submission = post['submission']
         title = post['title']
         
         print(f"\n--- Post: {title[:60]}... ---")
-        print(f"  Comments: {submission.num_comments}")
-        print(f"  Upvotes: {submission.score}")
+        print(f"  Comments: {post['num_comments']}")
+        print(f"  Upvotes: {post['score']}")
         
         # Test each criterion individually
-        meets_comment_count = submission.num_comments > 20
-        meets_upvote_threshold = submission.score > 5
+        meets_comment_count = post['num_comments'] > 20
+        meets_upvote_threshold = post['score'] > 5
         
         print(f"  ✓ Comment count > 20: {meets_comment_count}")
         print(f"  ✓ Upvotes > 5: {meets_upvote_threshold}")
@@ -47,7 +46,7 @@ def test_discussion_threads():
         if meets_comment_count and meets_upvote_threshold:
             print("  → Checking track sharing density...")
             try:
-                density = sync.calculate_track_sharing_density(submission)
+                density = sync.calculate_track_sharing_density(sync.reddit.submission(id=post['id']))
                 meets_density = density >= 0.25
                 print(f"  ✓ Track sharing density ≥ 25%: {meets_density} ({density:.1%})")
                 
@@ -69,7 +68,7 @@ def test_discussion_threads():
     if discussion_threads:
         print(f"\nDiscussion threads:")
         for dt in discussion_threads:
-            print(f"  • {dt['title'][:50]}... ({dt['submission'].num_comments} comments, {dt['score']} upvotes)")
+            print(f"  • {dt['title'][:50]}... ({dt['num_comments']} comments, {dt['score']} upvotes)")
             
         # Test comment extraction
         print(f"\n=== TESTING COMMENT EXTRACTION ===")
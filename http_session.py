@@ -0,0 +1,144 @@
+"""
+Shared HTTP session for outbound requests made outside the API clients
+
+One requests.Session (and so one set of per-host keep-alive connection pools)
+carries Bandcamp scraping, oEmbed lookups and the Spotify token refresh.
+Requests are retried with exponential backoff on 429/5xx, honouring
+Retry-After, and get_conditional() revalidates cached pages with
+If-None-Match/If-Modified-Since so an unchanged page costs a 304.
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def retrying_session(pool_maxsize: int = 10, retries: int = 3, backoff_factor: float = 0.5,
+                     statuses=RETRY_STATUSES, methods=('GET', 'HEAD', 'POST')) -> 'requests.Session':
+    """requests.Session with pooled connections and urllib3 retries on `statuses`
+
+    Retry-After is only honoured here when 429 is one of `statuses`; callers
+    that pace themselves (ThrottledSpotify) leave it out and see the 429.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,  # a read error may mean the request was processed; don't replay it
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=statuses,
+        allowed_methods=frozenset(methods),
+        respect_retry_after_header=429 in statuses,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class HttpResponse:
+    """The parts of a response the scrapers read, whether fetched or served from cache"""
+
+    def __init__(self, status_code: int, content: bytes, headers: Optional[Dict] = None, from_cache: bool = False):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+
+class HttpClient:
+    """Pooled, retrying requests.Session with an optional conditional-GET body cache
+
+    `pool_maxsize` is the number of keep-alive connections kept per host; it
+    should match the number of workers that may hit one host at once.
+    """
+
+    def __init__(self, cache=None, pool_maxsize: int = 10, retries: int = 3, backoff_factor: float = 0.5,
+                 timeout: float = 10, user_agent: str = USER_AGENT):
+        self.cache = cache
+        self.timeout = timeout
+
+        self.session = retrying_session(pool_maxsize, retries, backoff_factor)
+        self.session.headers['User-Agent'] = user_agent
+
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.not_modified = 0
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> 'requests.Response':
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.post(url, **kwargs)
+
+    def get_conditional(self, url: str, headers: Optional[Dict] = None,
+                        until: Optional[Callable[[bytes], bool]] = None, chunk_size: int = 16384,
+                        **kwargs) -> HttpResponse:
+        """GET a page, revalidating a cached copy when there is one
+
+        A 304 is returned as a 200 carrying the cached body (from_cache=True).
+        Fresh 200 responses with an ETag or Last-Modified header are cached.
+
+        With `until`, the body is streamed in `chunk_size` pieces, each passed
+        to until(chunk) as it arrives, and reading stops once it returns True.
+        Only the bytes read so far are returned (and cached), which is enough
+        for the same caller to find what it was looking for next time.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        request_headers = dict(headers or {})
+        if entry:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.get(url, headers=request_headers, stream=until is not None, **kwargs)
+        try:
+            if response.status_code == 304 and entry:
+                self.cache.touch(url)
+                with self._lock:
+                    self.not_modified += 1
+                return HttpResponse(200, entry['body'], response.headers, from_cache=True)
+
+            if until is None or response.status_code != 200:
+                content = response.content
+            else:
+                chunks = []
+                for chunk in response.iter_content(chunk_size):
+                    chunks.append(chunk)
+                    if until(chunk):
+                        break
+                content = b''.join(chunks)
+        finally:
+            response.close()
+
+        with self._lock:
+            self.fetched += 1
+        if response.status_code == 200 and self.cache:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.cache.store(url, etag, last_modified, content)
+        return HttpResponse(response.status_code, content, response.headers)
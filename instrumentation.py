@@ -0,0 +1,172 @@
+"""
+Per-stage timing and counters for a sync run
+
+Spans time named stages (Reddit listing, comment expansion, yt-dlp, Bandcamp,
+each Spotify query, playlist paging, ...) and counters record API calls and
+cache hits. At the end of a run the totals are written as a JSON run report
+and, optionally, as a Prometheus textfile for node_exporter's textfile
+collector, so daily runs can be compared against each other.
+
+Span times are inclusive: a resolve span contains the Spotify search spans
+made inside it, and concurrent spans (worker threads, --async) each count
+their own wall time.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class SpanStats:
+    """Call count, total and slowest wall time of one named span"""
+
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float, count: int = 1):
+        self.count += count
+        self.total += seconds
+        self.max = max(self.max, seconds / count if count else 0.0)
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_seconds': round(self.total / self.count, 6) if self.count else 0.0,
+            'max_seconds': round(self.max, 6),
+        }
+
+
+class Instrumentation:
+    """Thread-safe span timings and counters for one run"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under `name` (recorded even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float, count: int = 1):
+        """Record `count` occurrences of span `name` that took `seconds` between them"""
+        if count <= 0:
+            return
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds, count)
+
+    def count(self, name: str, n: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name: str, value: float):
+        """Set a counter outright, e.g. from a component's own running total"""
+        with self._lock:
+            self.counters[name] = value
+
+    def report(self, **extra) -> Dict:
+        """Run report: spans, counters and any extra top-level fields"""
+        with self._lock:
+            spans = {name: stats.as_dict() for name, stats in sorted(self.spans.items())}
+            counters = dict(sorted(self.counters.items()))
+        report = {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+            'duration_seconds': round(time.perf_counter() - self._started, 3),
+        }
+        report.update(extra)
+        report['spans'] = spans
+        report['counters'] = counters
+        return report
+
+    def write_json(self, path: str, report: Dict):
+        _write_atomic(path, json.dumps(report, indent=2, sort_keys=False) + '\n')
+
+    def write_prometheus(self, path: str, report: Dict, prefix: str = 'overload_sync'):
+        """Write the report in Prometheus text exposition format
+
+        Every value is a gauge describing the last run; node_exporter reads the
+        file as a whole, so it is replaced atomically.
+        """
+        lines = [
+            f"# HELP {prefix}_last_run_timestamp_seconds Unix time the last sync run started",
+            f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+            f"{prefix}_last_run_timestamp_seconds {self.started_at:.0f}",
+            f"# HELP {prefix}_run_duration_seconds Wall time of the last sync run",
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {report['duration_seconds']}",
+            f"# HELP {prefix}_run_success Whether the last sync run completed",
+            f"# TYPE {prefix}_run_success gauge",
+            f"{prefix}_run_success {1 if report.get('status') == 'ok' else 0}",
+        ]
+
+        for metric, field, help_text in (
+            ('span_count', 'count', 'Times each stage ran in the last sync run'),
+            ('span_seconds', 'total_seconds', 'Total wall time per stage in the last sync run'),
+            ('span_max_seconds', 'max_seconds', 'Slowest single run of each stage in the last sync run'),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} gauge")
+            for name, stats in report['spans'].items():
+                lines.append(f'{prefix}_{metric}{{span="{_escape_label(name)}"}} {stats[field]}')
+
+        for name, value in report['counters'].items():
+            metric = f"{prefix}_{_metric_name(name)}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        _write_atomic(path, '\n'.join(lines) + '\n')
+
+
+def traced(name: str):
+    """Method decorator: time calls under span `name` via self.instrumentation
+
+    Objects without an `instrumentation` attribute (or with it set to None)
+    run the method untimed, so partially constructed instances in tests work.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            instrumentation: Optional[Instrumentation] = getattr(self, 'instrumentation', None)
+            if instrumentation is None:
+                return func(self, *args, **kwargs)
+            with instrumentation.span(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path: str, text: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,466 @@
+"""
+Metadata lookups for YouTube, SoundCloud and Bandcamp links
+
+YouTube/SoundCloud lookups go through tiers: the oEmbed block Reddit already
+embedded in the post, then the platform's oEmbed endpoint (one small JSON
+request), then a pooled, metadata-only yt-dlp when neither has anything
+usable. Bandcamp pages are scanned for their ld+json metadata while they
+download, unless the post's embed already names artist and track.
+
+requests, yt_dlp and bs4 are imported where they are first needed, so
+importing this module (e.g. for title parsing) stays cheap.
+"""
+
+import html
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from http_session import USER_AGENT
+from patterns import HTML_TITLE_PATTERN, LD_JSON_SCRIPT_PATTERN, SCRIPT_OPEN_PATTERN, TITLE_OPEN_PATTERN
+from title_parser import has_artist_track
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# Only the title and uploader are read, so skip everything that exists to pick a
+# downloadable format: no format checks, no DASH/HLS manifests, no playlist expansion.
+YTDLP_METADATA_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'noplaylist': True,
+    'extract_flat': 'in_playlist',
+    'check_formats': False,
+    'lazy_playlist': True,
+    'extractor_args': {'youtube': {'skip': ['dash', 'hls', 'translated_subs']}},
+    'user_agent': USER_AGENT,
+    'headers': {
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-us,en;q=0.5',
+        'Sec-Fetch-Mode': 'navigate',
+    },
+}
+
+OEMBED_ENDPOINTS = {
+    'youtube': 'https://www.youtube.com/oembed',
+    'soundcloud': 'https://soundcloud.com/oembed',
+}
+
+# Placeholder titles that say nothing about the track
+GENERIC_TITLES = {'youtube', 'soundcloud', 'untitled', 'private video', 'deleted video'}
+
+# Result types that only point at another URL; followed once to reach the real entry
+REDIRECT_TYPES = ('url', 'url_transparent')
+
+_STOP = object()
+
+
+class YtDlpMetadataPool:
+    """Long-lived yt-dlp workers that look up title/uploader for media URLs
+
+    Each worker thread owns one YoutubeDL instance for the lifetime of the pool
+    (YoutubeDL is not thread-safe, and building one per URL re-initialises
+    every extractor). Workers take up to `batch_size` queued URLs at a time and
+    process them back to back. Results are memoized per URL, so a link shared
+    in several posts is only looked up once per run. Empty URLs never reach
+    yt-dlp.
+
+    Workers start on the first submit and are stopped by close(); submitting
+    again afterwards starts a fresh set.
+    """
+
+    def __init__(self, workers: int = 4, batch_size: int = 4, rate_limiter=None, options: Optional[Dict] = None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.rate_limiter = rate_limiter
+        self.options = dict(options or YTDLP_METADATA_OPTIONS)
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._results: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.batches = 0
+
+    def submit(self, url: str, host: str = '') -> Future:
+        """Queue a lookup; the future resolves to {'title', 'uploader'} or None"""
+        if not url:
+            future = Future()
+            future.set_result(None)
+            return future
+
+        with self._lock:
+            future = self._results.get(url)
+            if future is not None:
+                return future
+            future = Future()
+            self._results[url] = future
+            if not self._threads:
+                self._start()
+        self._queue.put((url, host, future))
+        return future
+
+    def fetch(self, url: str, host: str = '') -> Optional[Dict]:
+        """Blocking lookup of one URL"""
+        return self.submit(url, host).result()
+
+    def close(self):
+        """Stop the workers once the queued lookups are done"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    def _start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ytdlp-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_batch(self) -> Tuple[List, bool]:
+        """Block for one job, then take whatever else is queued up to batch_size"""
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        stop = any(job is _STOP for job in batch)
+        jobs = [job for job in batch if job is not _STOP]
+        if stop and len(batch) > 1:
+            # Hand extra stop signals back to the other workers
+            for _ in range(sum(job is _STOP for job in batch) - 1):
+                self._queue.put(_STOP)
+        return jobs, stop
+
+    def _work(self):
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(self.options) as ydl:
+            while True:
+                jobs, stop = self._next_batch()
+                if jobs:
+                    with self._lock:
+                        self.batches += 1
+                for url, host, future in jobs:
+                    try:
+                        future.set_result(self._lookup(ydl, url, host))
+                    except Exception as e:
+                        future.set_exception(e)
+                if stop:
+                    return
+
+    def _lookup(self, ydl, url: str, host: str) -> Optional[Dict]:
+        if self.rate_limiter and host:
+            self.rate_limiter.wait(host)
+        with self._lock:
+            self.lookups += 1
+        try:
+            info = ydl.extract_info(url, download=False, process=False)
+            if info and info.get('_type') in REDIRECT_TYPES and not info.get('title'):
+                info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+        except Exception as e:
+            logger.debug(f"Failed to extract metadata for {url}: {e}")
+            return None
+
+        if not info:
+            return None
+        return {
+            'title': (info.get('title') or '').strip(),
+            'uploader': (info.get('uploader') or '').strip(),
+        }
+
+
+def is_ambiguous_title(title: str) -> bool:
+    """Whether a title is unusable as-is: empty, a placeholder, or truncated"""
+    title = (title or '').strip()
+    return not title or title.lower() in GENERIC_TITLES or title.endswith(('...', '…'))
+
+
+def strip_uploader_suffix(title: str, uploader: str) -> str:
+    """Drop the " by Uploader" SoundCloud appends to its oEmbed titles"""
+    suffix = f" by {uploader}"
+    if uploader and title.endswith(suffix):
+        return title[:-len(suffix)].strip()
+    return title
+
+
+def embedded_metadata(media: Optional[Dict]) -> Optional[Dict]:
+    """{'title', 'uploader'} from a submission's media/secure_media oEmbed block, or None
+
+    Bandcamp embeds title tracks "Track, by Artist"; that is rewritten to the
+    "Artist - Track" layout the title parser expects. SoundCloud's "Track by
+    Uploader" loses the uploader, as in OEmbedClient.
+    """
+    media = media or {}
+    oembed = media.get('oembed') or {}
+    title = html.unescape(oembed.get('title') or '').strip()
+    if not title:
+        return None
+    uploader = html.unescape(oembed.get('author_name') or '').strip()
+    if media.get('type') == 'soundcloud.com' or oembed.get('provider_name') == 'SoundCloud':
+        title = strip_uploader_suffix(title, uploader)
+    track, by, artist = title.rpartition(', by ')
+    if by and track and artist:
+        title = f"{artist} - {track}"
+    return {'title': title, 'uploader': uploader}
+
+
+class EmbeddedMetadata:
+    """Metadata tier answered from the oEmbed blocks Reddit embeds in link posts
+
+    Posts register their embed by URL (see embedded_metadata), so a lookup
+    costs no request. Only titles that split into artist and track are
+    returned; anything else falls through to the next tier.
+    """
+
+    def __init__(self):
+        self._by_url: Dict[str, Dict] = {}
+
+    def add(self, url: str, metadata: Optional[Dict]):
+        if url and metadata:
+            self._by_url[url] = metadata
+
+    def fetch(self, url: str, host: str) -> Optional[Dict]:
+        metadata = self._by_url.get(url)
+        if metadata and has_artist_track(metadata['title']):
+            return metadata
+        return None
+
+
+class OEmbedClient:
+    """Title/author lookups through YouTube's and SoundCloud's oEmbed JSON endpoints"""
+
+    def __init__(self, endpoints: Optional[Dict[str, str]] = None, session: Optional['requests.Session'] = None,
+                 rate_limiter=None, timeout: float = 5):
+        self.endpoints = dict(OEMBED_ENDPOINTS if endpoints is None else endpoints)
+        self._session = session
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+
+    @property
+    def session(self) -> 'requests.Session':
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def fetch(self, url: str, host: str) -> Optional[Dict]:
+        """Return {'title', 'uploader'} in the same shape as the yt-dlp tier, or None"""
+        endpoint = self.endpoints.get(host)
+        if not endpoint or not url:
+            return None
+
+        import requests
+
+        if self.rate_limiter:
+            self.rate_limiter.wait(host)
+        try:
+            response = self.session.get(endpoint, params={'url': url, 'format': 'json'}, timeout=self.timeout)
+            if response.status_code != 200:
+                return None
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"oEmbed lookup failed for {url}: {e}")
+            return None
+
+        title = (data.get('title') or '').strip()
+        author = (data.get('author_name') or '').strip()
+
+        # SoundCloud reports "Track by Artist"; yt-dlp gives just the track title
+        if host == 'soundcloud':
+            title = strip_uploader_suffix(title, author)
+
+        return {'title': title, 'uploader': author}
+
+
+class TieredMetadataResolver:
+    """Try metadata tiers in order until one returns an unambiguous title
+
+    Each tier is a (name, fetch) pair where fetch(url, host) returns
+    {'title', 'uploader'} or None. Per-tier attempts, hits and cumulative
+    latency are recorded for the run summary.
+    """
+
+    def __init__(self, tiers: List[Tuple[str, Callable[[str, str], Optional[Dict]]]]):
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self.stats = {name: {'attempts': 0, 'hits': 0, 'seconds': 0.0} for name, _ in tiers}
+
+    def resolve(self, url: str, host: str) -> Optional[Dict]:
+        if not url:
+            return None
+
+        fallback = None
+        for name, fetch in self.tiers:
+            start = time.perf_counter()
+            try:
+                metadata = fetch(url, host)
+            except Exception as e:
+                logger.debug(f"{name} metadata tier failed for {url}: {e}")
+                metadata = None
+            elapsed = time.perf_counter() - start
+
+            hit = bool(metadata) and not is_ambiguous_title(metadata['title'])
+            with self._lock:
+                tier_stats = self.stats[name]
+                tier_stats['attempts'] += 1
+                tier_stats['seconds'] += elapsed
+                if hit:
+                    tier_stats['hits'] += 1
+
+            if hit:
+                return metadata
+            # Keep an ambiguous answer in case no later tier does better
+            if metadata and metadata['title'] and fallback is None:
+                fallback = metadata
+        return fallback
+
+    def summary(self) -> str:
+        parts = []
+        with self._lock:
+            for name, tier_stats in self.stats.items():
+                attempts = tier_stats['attempts']
+                if not attempts:
+                    continue
+                parts.append(f"{name}: {tier_stats['hits']}/{attempts} hits "
+                             f"({tier_stats['hits'] / attempts:.0%}), "
+                             f"avg {tier_stats['seconds'] / attempts * 1000:.0f}ms")
+        return '; '.join(parts)
+
+
+def _type_names(data: Dict) -> List[str]:
+    types = data.get('@type')
+    return types if isinstance(types, list) else [types]
+
+
+def _artist_name(by_artist) -> str:
+    if isinstance(by_artist, dict):
+        return (by_artist.get('name') or '').strip()
+    if isinstance(by_artist, list) and by_artist and isinstance(by_artist[0], dict):
+        return (by_artist[0].get('name') or '').strip()
+    return ''
+
+
+def track_from_ld_json(data) -> Optional[Dict]:
+    """{'artist', 'track'} from a Bandcamp ld+json object, or None if it names no track
+
+    Track pages describe a MusicRecording. Album pages describe a MusicAlbum
+    whose track listing is used for its first track, the same way Spotify
+    album links resolve to their first track.
+    """
+    if not isinstance(data, dict):
+        return None
+    types = _type_names(data)
+
+    if 'MusicRecording' in types:
+        track_name = (data.get('name') or '').strip()
+        if track_name:
+            return {'artist': _artist_name(data.get('byArtist')), 'track': track_name}
+
+    if 'MusicAlbum' in types:
+        listing = data.get('track')
+        items = listing.get('itemListElement') if isinstance(listing, dict) else listing
+        if isinstance(items, list) and items:
+            first = items[0].get('item', items[0]) if isinstance(items[0], dict) else None
+            track_name = (first.get('name') or '').strip() if isinstance(first, dict) else ''
+            if track_name:
+                artist = _artist_name(first.get('byArtist')) or _artist_name(data.get('byArtist'))
+                return {'artist': artist, 'track': track_name}
+    return None
+
+
+def track_from_page_title(page_title: str) -> Optional[Dict]:
+    """Bandcamp page titles are often "Track | Artist" """
+    if ' | ' not in page_title:
+        return None
+    parts = page_title.split(' | ')
+    return {'artist': parts[1].strip(), 'track': parts[0].strip()}
+
+
+class BandcampPageScanner:
+    """Incrementally scans a Bandcamp page for track metadata as bytes arrive
+
+    feed() each chunk as it is downloaded; it returns True once an ld+json
+    block naming a track has been seen, at which point the rest of the page
+    need not be read. metadata() then gives {'artist', 'track', 'via'}, falling
+    back to the <title> tag, and only builds a full BeautifulSoup tree when the
+    byte-level scan found neither ld+json nor a title.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._title_pos = 0
+        self._script_pos = 0
+        self.title: Optional[str] = None
+        self.ld_json_blocks = 0
+        self.found: Optional[Dict] = None
+
+    @property
+    def bytes_read(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, chunk: bytes) -> bool:
+        self._buffer += chunk
+
+        if self.title is None:
+            match = HTML_TITLE_PATTERN.search(self._buffer, self._title_pos)
+            if match:
+                self.title = html.unescape(match.group(1).decode('utf-8', errors='replace')).strip()
+            else:
+                self._title_pos = self._resume_from(TITLE_OPEN_PATTERN, self._title_pos)
+
+        while self.found is None:
+            match = LD_JSON_SCRIPT_PATTERN.search(self._buffer, self._script_pos)
+            if not match:
+                self._script_pos = self._resume_from(SCRIPT_OPEN_PATTERN, self._script_pos)
+                break
+            self._script_pos = match.end()
+            self.ld_json_blocks += 1
+            try:
+                self.found = track_from_ld_json(json.loads(match.group(1)))
+            except ValueError:
+                continue
+
+        return self.found is not None
+
+    def _resume_from(self, opening_tag, pos: int) -> int:
+        """Where to rescan once more bytes arrive: the last (possibly unfinished) opening tag"""
+        last = None
+        for last in opening_tag.finditer(self._buffer, pos):
+            pass
+        if last:
+            return last.start()
+        # Keep enough of the tail to catch an opening tag split across chunks
+        return max(pos, len(self._buffer) - 8)
+
+    def metadata(self) -> Optional[Dict]:
+        if self.found:
+            return dict(self.found, via='ld+json')
+
+        page_title = self.title
+        if page_title is None and not self.ld_json_blocks:
+            # Markup the byte scan could not make sense of: let the real parser try
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(bytes(self._buffer), 'html.parser')
+            for script in soup.find_all('script', type='application/ld+json'):
+                try:
+                    found = track_from_ld_json(json.loads(script.string or ''))
+                except ValueError:
+                    continue
+                if found:
+                    return dict(found, via='ld+json')
+            title_tag = soup.find('title')
+            page_title = title_tag.get_text().strip() if title_tag else None
+
+        found = track_from_page_title(page_title) if page_title else None
+        return dict(found, via='title') if found else None
@@ -2,58 +2,257 @@
 """
 Overload Spotify Sync
 Fetches music posts from r/theoverload and adds them to a Spotify playlist
+
+praw, spotipy, yt_dlp, bs4 and requests are imported when first used, so
+title parsing (`parse_title`, `--parse`) needs neither credentials nor the
+API client stack. The parsers themselves live in title_parser.py.
 """
 
-import praw
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-import re
+import argparse
+import json
 import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
 from datetime import datetime, timedelta
 import logging
-from typing import List, Dict, Optional
-import time
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
 from config import Config
-import yt_dlp
-import requests
-from bs4 import BeautifulSoup
-import json
+from rate_limit import HostRateLimiter, ThrottledSpotify, TokenBucket
+from comment_walker import CommentWalker, TrackDensity, is_discussion_candidate
+from http_session import HttpClient, retrying_session
+from instrumentation import Instrumentation, traced
+from media_metadata import (
+    BandcampPageScanner, EmbeddedMetadata, OEmbedClient, TieredMetadataResolver, YtDlpMetadataPool, embedded_metadata,
+)
+from patterns import (
+    BANDCAMP_TITLE_PATTERNS, LABEL_AS_ARTIST_PATTERN, POST_TITLE_PATTERNS, QUERY_FIELD_PATTERN,
+    SPOTIFY_ALBUM_PATTERN, SPOTIFY_HIGHLIGHT_PATTERN, SPOTIFY_TRACK_PATTERN, TRAILING_BRACKET_PATTERN,
+    TRAILING_PAREN_PATTERN,
+)
+from track_matcher import (
+    TrackMatcher, has_version_suffix, is_clean_title, normalize_for_matching, tracks_match_with_variations,
+)
+from sync_cache import HttpCache, IngestionState, PlaylistIndex, ResolutionCache, SearchCache
+from records import Comment, MusicInfo, Post
+import title_parser
+from title_parser import parse_title
 
 # Load environment variables
 load_dotenv()
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('overload_spotify_sync.log'),
-        logging.StreamHandler()
-    ]
-)
+LOG_FILE = 'overload_spotify_sync.log'
+
 logger = logging.getLogger(__name__)
 
+def configure_logging(log_file: Optional[str] = LOG_FILE):
+    """Log to stderr and (unless log_file is None) to the run's log file
+    
+    Called when a sync is created rather than at import, so importing the
+    module does not create a log file. Does nothing if logging is already set up.
+    """
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file))
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+class ResolutionState:
+    """Per-item bookkeeping shared by every search strategy tried while resolving one post/comment
+    
+    Tracks which queries were already sent, which candidates were already scored
+    (per artist/track context, since fallbacks score against different metadata)
+    and how much of the query budget has been used.
+    """
+    
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.queries = 0
+        self.sent_queries = set()
+        self.scored = set()
+        self.exhausted_families = set()
+    
+    @staticmethod
+    def query_family(query: str) -> frozenset:
+        """Bag of search terms, ignoring field filters and quoting"""
+        return frozenset(QUERY_FIELD_PATTERN.sub(' ', query.lower()).split())
+    
+    @property
+    def exhausted(self) -> bool:
+        return self.queries >= self.budget
+
+class TrackMentions:
+    """Posts/comments that mention the same track, resolved on Spotify once
+    
+    Mentions are grouped by title_parser.track_key. The first mention of a key
+    runs the search; later ones (including concurrent ones in the async
+    pipeline) reuse its answer. Every mention's post/comment score is added to
+    its track's combined score, which orders the tracks added to the playlist.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resolved: Dict[str, Future] = {}
+        self.scores: Dict[str, int] = {}
+        self.shared = 0
+    
+    def resolve(self, key: Optional[str], search: Callable[[], Optional[str]]) -> Optional[str]:
+        """Track ID for `key`, calling search() only for its first mention"""
+        if key is None:
+            return search()
+        with self._lock:
+            pending = self._resolved.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._resolved[key] = Future()
+            else:
+                self.shared += 1
+        if not owner:
+            return pending.result()
+        try:
+            track_id = search()
+        except Exception as e:
+            # Let a later mention try again rather than inherit the failure
+            with self._lock:
+                del self._resolved[key]
+            pending.set_exception(e)
+            raise
+        pending.set_result(track_id)
+        return track_id
+    
+    def mention(self, track_id: Optional[str], score: int) -> Optional[str]:
+        """Credit one mention's score to its track; returns track_id"""
+        if track_id:
+            with self._lock:
+                self.scores[track_id] = self.scores.get(track_id, 0) + (score or 0)
+        return track_id
+    
+    def ranked(self, track_ids: List[str]) -> List[str]:
+        """Unique track IDs by combined score, highest first (ties in first-seen order)"""
+        unique = list(dict.fromkeys(track_ids))
+        return sorted(unique, key=lambda track_id: -self.scores.get(track_id, 0))
+
 class OverloadSpotifySync:
-    def __init__(self, debug=False):
-        self.config = Config()
+    # Guards first use of the lazily created Reddit/Spotify clients
+    _client_lock = threading.Lock()
+    
+    def __init__(self, debug=False, config: Optional[Config] = None, reddit=None, spotify=None):
+        """Clients passed in (replay, tests) are used as given instead of being created
+        
+        The Reddit and Spotify clients are otherwise created on first use (see
+        the `reddit`/`spotify` properties), so constructing a sync makes no
+        network calls. An injected `spotify` client is not wrapped in the token bucket.
+        """
+        configure_logging()
+        self.config = config or Config()
         self.debug = debug or os.getenv('DEBUG') == '1'
         
         if self.debug:
             logger.setLevel(logging.DEBUG)
         
-        # Reddit API setup
-        self.reddit = praw.Reddit(
-            client_id=self.config.reddit_client_id,
-            client_secret=self.config.reddit_client_secret,
-            user_agent='overload-spotify-sync/1.0'
+        # Stage timings and counters, written out as the run report
+        self.instrumentation = Instrumentation()
+        
+        # API clients, created on first use unless injected
+        self._reddit = reddit
+        self._spotify = spotify
+        
+        # One pooled, retrying session for all other outbound HTTP (scraping, oEmbed, token refresh)
+        self.http_cache = HttpCache(self.config.cache_path, ttl=self.config.http_cache_ttl_hours * 3600)
+        self.http_cache.prune()
+        self.http = HttpClient(
+            cache=self.http_cache,
+            pool_maxsize=max(self.config.extraction_workers.values()),
+            retries=self.config.http_retries
         )
         
-        # Spotify API setup
-        self.spotify = self.setup_spotify_client()
+        # Every Spotify call (any thread) takes a token from one shared bucket
+        self.spotify_bucket = TokenBucket(self.config.spotify_requests_per_second, self.config.spotify_burst)
+        
+        # Per-host pacing for outbound requests (replaces fixed per-item sleeps)
+        self.rate_limiter = HostRateLimiter(self.config.host_rate_limits)
+        
+        # Shared metadata-only yt-dlp workers for YouTube/SoundCloud links
+        self.ytdlp_pool = YtDlpMetadataPool(
+            workers=self.config.ytdlp_workers,
+            batch_size=self.config.ytdlp_batch_size,
+            rate_limiter=self.rate_limiter
+        )
         
+        # The post's own Reddit embed first (no request), then oEmbed (one small JSON
+        # request), yt-dlp only when neither has a usable title
+        self.embedded_metadata = EmbeddedMetadata()
+        self.metadata_resolver = TieredMetadataResolver([
+            ('embed', self.embedded_metadata.fetch),
+            ('oembed', OEmbedClient(session=self.http.session, rate_limiter=self.rate_limiter).fetch),
+            ('yt-dlp', self.ytdlp_pool.fetch),
+        ])
+        
+        # Resolutions from previous runs, so only new content costs network calls
+        self.resolution_cache = ResolutionCache(
+            self.config.cache_path,
+            negative_ttl=self.config.negative_cache_ttl_hours * 3600
+        )
+        self.ingestion_state = IngestionState(self.config.cache_path)
+        self.playlist_index = PlaylistIndex(self.config.cache_path)
+        self.search_cache = SearchCache(
+            self.config.cache_path,
+            ttl=self.config.search_cache_ttl_hours * 3600,
+            negative_ttl=self.config.negative_cache_ttl_hours * 3600
+        )
+        self.search_cache.prune()
+        self.queries_per_resolution = []
+        # Posts the pre-filter skipped, listed in the run report for auditing
+        self.skipped_posts = []
+        # Duplicate mentions of a track share one resolution and pool their scores
+        self.track_mentions = TrackMentions()
+        
+    @property
+    def reddit(self):
+        """praw client, created on first use"""
+        if getattr(self, '_reddit', None) is None:
+            with self._client_lock:
+                if getattr(self, '_reddit', None) is None:
+                    import praw
+                    self._reddit = praw.Reddit(
+                        client_id=self.config.reddit_client_id,
+                        client_secret=self.config.reddit_client_secret,
+                        user_agent='overload-spotify-sync/1.0'
+                    )
+        return self._reddit
+    
+    @reddit.setter
+    def reddit(self, client):
+        self._reddit = client
+    
+    @property
+    def spotify(self):
+        """Rate-limited Spotify client, authenticated on first use"""
+        if getattr(self, '_spotify', None) is None:
+            with self._client_lock:
+                if getattr(self, '_spotify', None) is None:
+                    self._spotify = ThrottledSpotify(
+                        self.setup_spotify_client(),
+                        self.spotify_bucket,
+                        max_retries=self.config.spotify_max_retries
+                    )
+        return self._spotify
+    
+    @spotify.setter
+    def spotify(self, client):
+        self._spotify = client
+    
     def setup_spotify_client(self):
         """Setup Spotify client with refresh token support for GitHub Actions"""
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
+        
         refresh_token = os.getenv('SPOTIFY_REFRESH_TOKEN')
         
         if refresh_token and refresh_token.strip():
@@ -61,7 +260,6 @@ class OverloadSpotifySync:
             
             try:
                 # Use the refresh token to get a fresh access token
-                import requests
                 token_url = "https://accounts.spotify.com/api/token"
                 
                 data = {
@@ -71,14 +269,14 @@ class OverloadSpotifySync:
                     'client_secret': self.config.spotify_client_secret
                 }
                 
-                response = requests.post(token_url, data=data)
+                response = self.http.post(token_url, data=data)
                 
                 if response.status_code == 200:
                     token_data = response.json()
                     logger.info("Successfully refreshed access token")
                     
                     # Create Spotify client directly with the access token (bypass SpotifyOAuth)
-                    spotify_client = spotipy.Spotify(auth=token_data['access_token'])
+                    spotify_client = spotipy.Spotify(auth=token_data['access_token'], requests_session=self.spotify_session())
                     
                     # Test the connection
                     try:
@@ -108,60 +306,194 @@ class OverloadSpotifySync:
             client_secret=self.config.spotify_client_secret,
             redirect_uri=self.config.spotify_redirect_uri,
             scope='playlist-modify-public playlist-modify-private'
-        ))
+        ), requests_session=self.spotify_session())
+    
+    def spotify_session(self):
+        """Session for spotipy: 5xx are retried, 429s are left to ThrottledSpotify
         
-    def get_recent_posts(self) -> List[Dict]:
-        """Fetch recent posts from r/theoverload with minimum upvotes"""
-        posts = []
+        spotipy's own session would sleep out a 429's Retry-After inside the
+        one thread that was refused while the others kept sending.
+        """
+        return retrying_session(
+            pool_maxsize=self.config.async_resolve_workers + max(self.config.extraction_workers.values()),
+            retries=self.config.http_retries,
+            backoff_factor=0.3,
+            statuses=(500, 502, 503, 504),
+            methods=('GET', 'POST', 'PUT', 'DELETE')
+        )
+        
+    def get_recent_posts(self) -> List[Post]:
+        """Fetch recent posts from r/theoverload with minimum upvotes, newest first
+        
+        See iter_recent_posts; this is its output as a list.
+        """
+        return list(self.iter_recent_posts())
+    
+    def iter_recent_posts(self) -> Iterator[Post]:
+        """Yield recent posts from r/theoverload with minimum upvotes, newest first
+        
+        Only submissions newer than the stored high-water mark are listed. Posts
+        seen on earlier runs that are still inside the time window get their
+        scores refreshed in bulk instead, so posts that reach MIN_UPVOTES late
+        are still picked up.
+        
+        Posts are yielded as listing pages arrive, so a consumer (the async
+        pipeline's first stage) can start on them while later pages load. The
+        high-water mark only moves once the generator is exhausted.
+        """
         subreddit = self.reddit.subreddit('theoverload')
         
         # Get posts from the last week
         time_window = 7
         cutoff_date = datetime.now() - timedelta(days=time_window)
+        cutoff_utc = cutoff_date.timestamp()
         logger.info(f"Looking for posts from last {time_window} day(s)")
         
-        for submission in subreddit.new(limit=100):
-            created_time = datetime.fromtimestamp(submission.created_utc)
-            
-            if created_time < cutoff_date:
-                continue
-                
-            if submission.score >= self.config.min_upvotes:
-                posts.append({
-                    'title': submission.title,
-                    'url': submission.url,
-                    'score': submission.score,
-                    'id': submission.id,
-                    'created': created_time,
-                    'submission': submission  # Keep submission object for comment access
-                })
-                
-        logger.info(f"Found {len(posts)} posts with {self.config.min_upvotes}+ upvotes")
-        return posts
+        tracked = self.ingestion_state.tracked_posts(cutoff_utc)
+        newest = None
+        new_ids = set()
+        found = cached_count = 0
+        
+        for submission in self.iter_new_submissions(subreddit, cutoff_utc):
+            newest = newest or (submission.id, submission.created_utc)
+            new_ids.add(submission.id)
+            post = self.record_submission(submission, tracked, cutoff_date)
+            if post:
+                found += 1
+                cached_count += bool(post['cached'])
+                yield post
+        
+        # Every tracked post is older than the newest listed one, so newest-first order holds
+        refreshed = self.refresh_tracked_submissions([sid for sid in tracked if sid not in new_ids])
+        for submission in sorted(refreshed, key=lambda submission: submission.created_utc, reverse=True):
+            post = self.record_submission(submission, tracked, cutoff_date)
+            if post:
+                found += 1
+                cached_count += bool(post['cached'])
+                yield post
+        
+        # Only once every listed submission is recorded: a failure above lists them again next run
+        if newest:
+            self.ingestion_state.set_high_water_mark(*newest)
+        self.ingestion_state.prune(cutoff_utc)
+        
+        logger.info(f"Found {found} posts with {self.config.min_upvotes}+ upvotes ({cached_count} already resolved)")
+    
+    def record_submission(self, submission, tracked: Dict[str, bool], cutoff_date: datetime) -> Optional[Post]:
+        """Record a listed submission's score; return its Post if it is in the window and qualifies"""
+        created_time = datetime.fromtimestamp(submission.created_utc)
+        if created_time < cutoff_date:
+            return None
+        
+        qualified = submission.score >= self.config.min_upvotes
+        self.ingestion_state.record_post(submission.id, submission.created_utc, submission.score, qualified)
+        if not qualified:
+            return None
+        
+        if submission.id in tracked and not tracked[submission.id]:
+            logger.info(f"  → Now qualifies ({submission.score} upvotes): {submission.title[:50]}")
+        # Fields only: the submission (and its comment forest) is not kept alive for the run
+        return Post(
+            title=submission.title,
+            url=submission.url,
+            score=submission.score,
+            id=submission.id,
+            created=created_time,
+            num_comments=getattr(submission, 'num_comments', 0),
+            # oEmbed block Reddit attached to link posts; often saves the metadata lookup
+            embed=embedded_metadata(getattr(submission, 'secure_media', None)
+                                    or getattr(submission, 'media', None)),
+            cached=self.resolution_cache.lookup(f"post:{submission.id}", submission.url),
+            skip_reason=self.non_music_reason(submission)
+        )
+    
+    def iter_new_submissions(self, subreddit, cutoff_utc: float) -> Iterator:
+        """Page through subreddit.new() until reaching the high-water mark or the cutoff
+        
+        The listing is newest-first and PRAW follows the `after` cursor, so a
+        steady-state run reads one page. Stopping on timestamp rather than
+        requesting `before=<last id>` keeps working when that post gets deleted.
+        
+        Submissions are yielded as PRAW pages them in; the caller moves the
+        high-water mark to the first one once they are all recorded. Only the
+        time spent waiting on Reddit counts towards the reddit.listing span.
+        """
+        high_water_mark = self.ingestion_state.high_water_mark()
+        stop_utc = cutoff_utc
+        if high_water_mark:
+            stop_utc = max(cutoff_utc, high_water_mark['created_utc'])
+        
+        listing = iter(subreddit.new(limit=None))
+        listed = 0
+        waited = 0.0
+        while True:
+            start = time.perf_counter()
+            submission = next(listing, None)
+            waited += time.perf_counter() - start
+            if submission is None or submission.created_utc < stop_utc or (
+                    high_water_mark and submission.id == high_water_mark['id']):
+                break
+            listed += 1
+            yield submission
+        
+        self.instrumentation.add_time('reddit.listing', waited)
+        logger.info(f"Listed {listed} new submission(s) since last run")
+    
+    @traced('reddit.refresh_scores')
+    def refresh_tracked_submissions(self, submission_ids: List[str]) -> List:
+        """Re-fetch known submissions in bulk (100 per request) to get current scores"""
+        if not submission_ids:
+            return []
+        
+        refreshed = list(self.reddit.info(fullnames=[f"t3_{sid}" for sid in submission_ids]))
+        logger.info(f"Refreshed scores for {len(refreshed)} submission(s) still in the time window")
+        return refreshed
+    
+    def walk_comments(self, submission, max_expansions: int = 10) -> Iterator:
+        """CommentWalker over a submission, recording its "load more" fetches as a span"""
+        walker = CommentWalker(submission, max_expansions=max_expansions)
+        try:
+            yield from walker
+        finally:
+            self.instrumentation.add_time('reddit.more_comments', walker.expansion_seconds, walker.expansions)
+    
+    def is_discussion_candidate(self, submission) -> bool:
+        """Cheap criteria for a discussion thread (see comment_walker.is_discussion_candidate)"""
+        return is_discussion_candidate(submission.num_comments, submission.score)
+    
+    def thread_submission(self, post: Dict):
+        """The submission to walk for a post that may be a discussion thread, or None
+        
+        Post records keep only the comment count, so candidates are re-fetched
+        by ID. PRAW loads a submission lazily together with its first comments,
+        so this is the one request the walk would make anyway, and the comment
+        forest is freed as soon as the walk ends.
+        """
+        if not is_discussion_candidate(post['num_comments'], post['score']):
+            return None
+        submission = self.reddit.submission(id=post['id'])
+        return submission if self.is_discussion_candidate(submission) else None
     
+    @traced('reddit.discussion_check')
     def is_discussion_thread(self, submission) -> bool:
         """Check if a submission qualifies as a discussion thread based on 3 criteria:
         1. Comment count > 20
         2. Post upvotes > 5 
         3. Over 25% of comments contain URLs or dashes (track indicators)
+        
+        The comment walk stops as soon as criterion 3 is clearly met or missed.
         """
-        # Criterion 1: Comment count > 20
-        if submission.num_comments <= 20:
-            return False
-            
-        # Criterion 2: Post upvotes > 5
-        if submission.score <= 5:
+        if not self.is_discussion_candidate(submission):
             return False
-            
-        # Criterion 3: Calculate track sharing density
+        
         try:
-            track_density = self.calculate_track_sharing_density(submission)
-            if track_density < 0.25:  # Less than 25%
-                return False
-                
-            logger.info(f"  → Discussion thread detected: {submission.num_comments} comments, "
-                       f"{submission.score} upvotes, {track_density:.1%} track sharing density")
-            return True
+            density = TrackDensity()
+            for comment in self.walk_comments(submission):
+                density.add(getattr(comment, 'body', ''))
+                decision = density.decision()
+                if decision is not None:
+                    return decision
+            return density.density >= density.threshold
             
         except Exception as e:
             logger.debug(f"  → Error checking track density: {e}")
@@ -170,81 +502,109 @@ class OverloadSpotifySync:
     def calculate_track_sharing_density(self, submission) -> float:
         """Calculate percentage of comments containing URLs or dashes (track indicators)"""
         try:
-            # Get a sample of comments efficiently (don't load all nested comments)
-            submission.comments.replace_more(limit=5)  # Limited to avoid performance issues
-            all_comments = submission.comments.list()
+            density = TrackDensity()
+            for comment in self.walk_comments(submission, max_expansions=5):
+                density.add(getattr(comment, 'body', ''))
             
-            if not all_comments:
-                return 0.0
-                
-            track_indicating_comments = 0
-            total_comments = len(all_comments)
-            
-            for comment in all_comments:
-                if hasattr(comment, 'body') and comment.body:
-                    comment_text = comment.body.lower()
-                    # Check for URLs or dash patterns indicating track sharing
-                    has_url = any(domain in comment_text for domain in [
-                        'youtube.com', 'youtu.be', 'spotify.com', 'soundcloud.com', 
-                        'bandcamp.com', 'http', 'www.'
-                    ])
-                    has_dash = ' - ' in comment_text
-                    has_by = ' by ' in comment_text
-                    
-                    if has_url or has_dash or has_by:
-                        track_indicating_comments += 1
-            
-            density = track_indicating_comments / total_comments if total_comments > 0 else 0.0
-            logger.debug(f"  → Track sharing density: {track_indicating_comments}/{total_comments} = {density:.1%}")
-            return density
+            logger.debug(f"  → Track sharing density: {density.indicating}/{density.total} = {density.density:.1%}")
+            return density.density
             
         except Exception as e:
             logger.debug(f"  → Error calculating track density: {e}")
             return 0.0
     
-    def get_comments_from_discussion_threads(self, posts: List[Dict]) -> List[Dict]:
-        """Extract comments from posts that qualify as discussion threads"""
-        comments_data = []
+    def iter_discussion_thread_comments(self, post: Dict) -> Iterator[Dict]:
+        """Stream qualifying comments from a post if it turns out to be a discussion thread
+        
+        A single walk over the comment tree both measures track sharing density
+        and collects comments. Qualifying comments seen before the density is
+        conclusive are held back; they are released once the thread qualifies,
+        and everything after that is yielded as it arrives. If the thread
+        clearly falls below the threshold the walk stops there.
+        """
+        submission = self.thread_submission(post)
+        if submission is None:
+            return
         
-        for post in posts:
-            submission = post['submission']
+        min_comment_upvotes = int(os.getenv('MIN_COMMENT_UPVOTES', '3'))
+        density = TrackDensity()
+        held_back = []
+        qualifies = None
+        yielded = 0
+        
+        for comment in self.walk_comments(submission):
+            body = getattr(comment, 'body', '')
+            density.add(body)
             
-            if self.is_discussion_thread(submission):
-                logger.info(f"Processing discussion thread: {post['title'][:50]}...")
-                
-                try:
-                    # Get comments with limited depth for performance
-                    submission.comments.replace_more(limit=10)
-                    all_comments = submission.comments.list()
-                    
-                    # Filter comments by upvote threshold
-                    min_comment_upvotes = int(os.getenv('MIN_COMMENT_UPVOTES', '3'))
-                    qualifying_comments = [
-                        comment for comment in all_comments 
-                        if (hasattr(comment, 'score') and comment.score >= min_comment_upvotes and
-                            hasattr(comment, 'body') and comment.body and 
-                            len(comment.body.strip()) > 10)  # Avoid very short comments
-                    ]
-                    
-                    logger.info(f"  → Found {len(qualifying_comments)} comments with {min_comment_upvotes}+ upvotes")
-                    
-                    for comment in qualifying_comments:
-                        comments_data.append({
-                            'body': comment.body,
-                            'score': comment.score,
-                            'id': comment.id,
-                            'parent_post_title': post['title'],
-                            'parent_post_id': post['id']
-                        })
-                        
-                except Exception as e:
-                    logger.error(f"  → Error processing comments: {e}")
-                    continue
+            # Filter comments by upvote threshold, avoiding very short comments
+            if getattr(comment, 'score', 0) >= min_comment_upvotes and body and len(body.strip()) > 10:
+                if qualifies:
+                    yield self.build_comment_data(comment, post)
+                    yielded += 1
+                else:
+                    held_back.append(comment)
+            
+            if qualifies is None:
+                qualifies = density.decision()
+                if qualifies is False:
+                    break
+                if qualifies:
+                    logger.info(f"Processing discussion thread: {post['title'][:50]}...")
+                    logger.info(f"  → Discussion thread detected: {submission.num_comments} comments, "
+                               f"{submission.score} upvotes, {density.density:.1%} track sharing density "
+                               f"after {density.total} comments")
+                    for held in held_back:
+                        yield self.build_comment_data(held, post)
+                    yielded += len(held_back)
+                    held_back = []
+        
+        # Walk exhausted before the density was conclusive: decide on the full sample
+        if qualifies is None and density.density >= density.threshold:
+            qualifies = True
+            logger.info(f"Processing discussion thread: {post['title'][:50]}...")
+            logger.info(f"  → Discussion thread detected: {submission.num_comments} comments, "
+                       f"{submission.score} upvotes, {density.density:.1%} track sharing density")
+            for held in held_back:
+                yield self.build_comment_data(held, post)
+            yielded += len(held_back)
+        
+        if qualifies:
+            self.instrumentation.count('reddit.discussion_threads')
+            self.instrumentation.count('reddit.discussion_comments', yielded)
+            logger.info(f"  → Found {yielded} comments with {min_comment_upvotes}+ upvotes")
+    
+    def build_comment_data(self, comment, post: Dict) -> Comment:
+        """Comment record consumed by extract_music_info_from_comment and run()"""
+        comment_url = self.find_comment_url(self.process_comment_text(comment.body))
+        return Comment(
+            body=comment.body,
+            score=comment.score,
+            id=comment.id,
+            url=comment_url or '',
+            parent_post_title=post['title'],
+            parent_post_id=post['id'],
+            cached=self.resolution_cache.lookup(f"comment:{comment.id}", comment_url or '')
+        )
+    
+    def iter_discussion_comments(self, posts: List[Dict]) -> Iterator[Comment]:
+        """Stream qualifying comments from every post that is a discussion thread"""
+        count = 0
+        for post in posts:
+            try:
+                for comment in self.iter_discussion_thread_comments(post):
+                    count += 1
+                    yield comment
+            except Exception as e:
+                logger.error(f"  → Error processing comments: {e}")
+                continue
         
-        logger.info(f"Total qualifying comments from discussion threads: {len(comments_data)}")
-        return comments_data
+        logger.info(f"Total qualifying comments from discussion threads: {count}")
+    
+    def get_comments_from_discussion_threads(self, posts: List[Dict]) -> List[Dict]:
+        """Extract comments from posts that qualify as discussion threads"""
+        return list(self.iter_discussion_comments(posts))
     
-    def extract_music_info_from_comment(self, comment: Dict) -> Optional[Dict]:
+    def extract_music_info_from_comment(self, comment: Dict, hydrate_spotify: bool = True) -> Optional[Dict]:
         """Extract artist and track info from comment text"""
         comment_text = comment['body']
         
@@ -252,12 +612,11 @@ class OverloadSpotifySync:
         cleaned_text = self.process_comment_text(comment_text)
         
         # Try to extract URLs first
-        url_match = re.search(r'(https?://[^\s\)]+)', cleaned_text)
-        if url_match:
-            url = url_match.group(1)
+        url = self.find_comment_url(cleaned_text)
+        if url:
             # Use existing URL extraction logic
             fake_post = {'url': url, 'title': cleaned_text}
-            music_info = self.extract_music_info(fake_post)
+            music_info = self.extract_music_info(fake_post, hydrate_spotify=hydrate_spotify)
             if music_info:
                 music_info['source'] = 'comment_url'
                 music_info['comment_score'] = comment['score']
@@ -272,419 +631,292 @@ class OverloadSpotifySync:
         
         return None
     
+    def find_comment_url(self, text: str) -> Optional[str]:
+        """Return the first URL in a comment, if any"""
+        return title_parser.find_comment_url(text)
+    
     def process_comment_text(self, text: str) -> str:
         """Clean comment text for track extraction"""
-        # Remove common prefixes
-        prefixes_to_remove = [
-            r'^check\s+out\s*:?\s*',
-            r'^listening\s+to\s*:?\s*', 
-            r'^currently\s+playing\s*:?\s*',
-            r'^now\s+playing\s*:?\s*',
-            r'^this\s+is\s+good\s*:?\s*',
-            r'^recommend\s*:?\s*',
-            r'^try\s+this\s*:?\s*'
-        ]
-        
-        cleaned = text.strip()
-        for pattern in prefixes_to_remove:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        
-        # Remove quotes and clean up
-        cleaned = cleaned.strip('"\'')
-        
-        return cleaned
-    
-    def extract_music_info(self, post: Dict) -> Optional[Dict]:
-        """Extract artist and track info from various music platforms"""
+        return title_parser.process_comment_text(text)
+    
+    def get_source_type(self, url: str) -> str:
+        """Classify a URL by the platform its metadata is fetched from (see title_parser.source_type)"""
+        return title_parser.source_type(url)
+    
+    def extract_music_info(self, post: Dict, hydrate_spotify: bool = True) -> Optional[Dict]:
+        """Extract artist and track info from various music platforms
+        
+        With hydrate_spotify=False, Spotify links only get their IDs parsed and
+        the caller is expected to fill them in with hydrate_spotify_infos().
+        """
         url = post['url']
         title = post['title']
+        if post.get('embed'):
+            self.embedded_metadata.add(url, post['embed'])
         
         # Let all posts through - we'll determine if they're music during metadata extraction
+        source_type = self.get_source_type(url)
         
-        # YouTube
-        if 'youtube.com' in url or 'youtu.be' in url:
+        if source_type == 'youtube':
             return self.extract_youtube_info(url, title)
-        
-        # Spotify
-        elif 'spotify.com' in url:
+        elif source_type == 'spotify':
+            if not hydrate_spotify:
+                return self.parse_spotify_url(url)
             return self.extract_spotify_info(url)
-        
-        # SoundCloud
-        elif 'soundcloud.com' in url:
+        elif source_type == 'soundcloud':
             return self.extract_soundcloud_info(url, title)
-        
-        # Bandcamp
-        elif 'bandcamp.com' in url:
+        elif source_type == 'bandcamp':
             return self.extract_bandcamp_info(url, title)
         
         # Try to parse from title if no recognized URL
-        else:
-            return self.extract_from_title(title)
+        return self.extract_from_title(title)
+    
+    def extract_music_info_batch(self, items: Iterable[Dict], extractor: Callable[[Dict], Optional[Dict]],
+                                 url_of: Callable[[Dict], str],
+                                 consumed: Optional[List[Dict]] = None) -> List[Optional[Dict]]:
+        """Run `extractor` over many posts/comments concurrently, preserving input order
+        
+        Each source type gets its own bounded worker pool (see Config.extraction_workers)
+        so a slow platform cannot starve the others. Items without a recognised
+        platform URL share a single worker since they need no network access.
+        
+        `items` may be a generator: each item is submitted as soon as it is
+        produced. Pass a list as `consumed` to get the items back in order.
+        """
+        def safe_extract(item):
+            # Previously resolved items skip straight to their cached answer
+            if item.get('cached'):
+                return item['cached']['music_info']
+            if item.get('skip_reason'):
+                return None
+            try:
+                return extractor(item)
+            except Exception as e:
+                logger.warning(f"Metadata extraction failed: {e}")
+                return None
+        
+        pools = {
+            source: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"extract-{source}")
+            for source, workers in self.config.extraction_workers.items()
+        }
+        pools['title'] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="extract-title")
+        try:
+            futures = []
+            for item in items:
+                if consumed is not None:
+                    consumed.append(item)
+                local = item.get('cached') or item.get('skip_reason')
+                pool = pools['title' if local else self.get_source_type(url_of(item) or '')]
+                futures.append(pool.submit(safe_extract, item))
+            return [future.result() for future in futures]
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+    
+    def non_music_reason(self, submission) -> Optional[str]:
+        """Pre-filter: why a submission needs no extraction or search, or None
+        
+        Uses only the title, link domain, flair and self-post flag, so it costs
+        no network I/O. Discussion threads skipped here still have their
+        comments processed (see iter_discussion_comments).
+        """
+        return title_parser.non_music_reason(
+            submission.title,
+            self.get_source_type(submission.url or ''),
+            is_self=bool(getattr(submission, 'is_self', False)),
+            flair=getattr(submission, 'link_flair_text', None)
+        )
     
     def is_non_music_post(self, title: str) -> bool:
-        """Check if post is clearly not about music"""
-        title_lower = title.lower()
-        
-        # Common patterns that indicate non-music posts
-        non_music_patterns = [
-            # Questions and discussions
-            r'\b(what|who|where|when|why|how|does|anyone|any\s+\w+\s+heads)\b',
-            r'\b(question|help|looking\s+for|recommend|suggestion)\b',
-            r'\b(thoughts|opinion|discussion|thread|post)\b',
-            
-            # Event announcements  
-            r'\b(tonight|today|tomorrow|this\s+weekend|next\s+week)\b',
-            r'\b(event|show|concert|festival|party|club|venue)\b',
-            r'\b(tickets|sold\s+out|presale)\b',
-            
-            # Generic/vague titles
-            r'\b(tracks?\s+that|music\s+that|songs?\s+that)\b',
-            r'\b(playlist|mix|set)\s+(for|that|to)\b',
-            
-            # Meta/community posts
-            r'\b(this\s+sub|subreddit|community|weekly|daily)\b',
-            r'\b(rules|guidelines|announcement)\b',
-            
-            # Descriptive remix posts (not actual remix titles)
-            r'^A\s+\w+[\w\-]*\s+remix\s+of\s+',  # "A house remix of...", "A trip-hop remix of..."
-            r'^An\s+\w+[\w\-]*\s+remix\s+of\s+', # "An electronic remix of..."
-        ]
-        
-        for pattern in non_music_patterns:
-            if re.search(pattern, title_lower, re.IGNORECASE):
-                return True
-                
-        return False
+        """Check if post is clearly not about music (see title_parser.is_non_music_post)"""
+        return title_parser.is_non_music_post(title)
     
+    @traced('metadata.youtube')
     def extract_youtube_info(self, url: str, title: str) -> Optional[Dict]:
-        """Extract info from YouTube URL using yt-dlp for accurate metadata"""
+        """Extract info from YouTube URL using yt-dlp for accurate metadata
         
+        With an empty URL this only parses `title` (see extract_from_title).
+        """
         # First try to get metadata directly from YouTube
-        try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-                'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'headers': {
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'en-us,en;q=0.5',
-                    'Sec-Fetch-Mode': 'navigate',
-                },
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                yt_title = info.get('title', '').strip()
-                uploader = info.get('uploader', '').strip()
+        title_to_parse = title
+        if url:
+            metadata = self.metadata_resolver.resolve(url, self.get_source_type(url))
+            if metadata and metadata['title']:
+                if self.debug:
+                    logger.debug(f"YouTube metadata - Title: {metadata['title']}, Uploader: {metadata['uploader']}")
                 
-                if yt_title:
-                    if self.debug:
-                        logger.debug(f"YouTube metadata - Title: {yt_title}, Uploader: {uploader}")
-                    
-                    # Use YouTube title for parsing instead of post title
-                    title_to_parse = yt_title
-                else:
-                    # Fall back to post title
-                    title_to_parse = title
-                    
-        except Exception as e:
-            if self.debug:
-                logger.debug(f"Failed to extract YouTube metadata: {e}")
-            # Fall back to post title
-            title_to_parse = title
-        
-        # Check for remix patterns and extract remix info
-        remix_info = self.extract_remix_info(title_to_parse)
-        
-        # Clean title by removing remix information for main parsing
-        clean_title = self.clean_title_for_parsing(title_to_parse)
-        
-        # Common patterns for artist - track in titles
-        patterns = [
-            r'^(.+?)\s*[-–—]\s*(.+)$',           # Artist - Track
-            r'^(.+?)\s*:\s*(.+)$',               # Artist: Track  
-            r'^(.+?)\s+by\s+(.+)$',              # Track by Artist
-            r'^\[(.+?)\]\s*(.+)$',               # [Artist] Track
-            r'^(.+?)\s*\|\s*(.+)$',              # Artist | Track
-            r'^(.+?)\s*"(.+?)"',                 # Artist "Track"
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, clean_title.strip(), re.IGNORECASE)
-            if match:
-                result = {
-                    'artist': match.group(1).strip(),
-                    'track': match.group(2).strip(),
-                    'source': 'youtube'
-                }
-                # Add remix information
-                result.update(remix_info)
-                return result
-        
-        # Fallback: assume title is track name
-        result = {
-            'artist': '',
-            'track': clean_title.strip(),
-            'source': 'youtube'
-        }
-        result.update(remix_info)
-        return result
+                # Use YouTube title for parsing instead of post title
+                title_to_parse = metadata['title']
+        
+        return title_parser.parse_title(title_to_parse, 'youtube')
+    
+    def parse_spotify_url(self, url: str) -> Optional[Dict]:
+        """Parse a Spotify link into an un-hydrated music_info placeholder
+        
+        Handles track links (including /intl-xx/ paths and spotify: URIs), album
+        or playlist links that highlight a specific track, and plain album links,
+        which resolve to the album's first track once hydrated.
+        """
+        highlight = SPOTIFY_HIGHLIGHT_PATTERN.search(url)
+        track = SPOTIFY_TRACK_PATTERN.search(url)
+        album = SPOTIFY_ALBUM_PATTERN.search(url)
+        
+        placeholder = MusicInfo(artist='', track='', source='spotify')
+        if highlight or track:
+            placeholder['spotify_id'] = (highlight or track).group(1)
+        elif album:
+            placeholder['spotify_album_id'] = album.group(1)
+        else:
+            return None
+        return placeholder
+    
+    def is_spotify_placeholder(self, info: Optional[Dict]) -> bool:
+        """Whether a music_info is a parsed Spotify link still waiting for hydrate_spotify_infos()"""
+        return bool(info and not info.get('track') and (info.get('spotify_id') or info.get('spotify_album_id')))
+    
+    @traced('spotify.hydrate')
+    def hydrate_spotify_infos(self, infos: List[Optional[Dict]]) -> List[Optional[Dict]]:
+        """Fill in artist/track for parsed Spotify links using the several-tracks/albums endpoints
+        
+        All pending IDs across the run are looked up together, so N links cost
+        ceil(N/50) track requests plus ceil(M/20) album requests. Entries that
+        cannot be hydrated (deleted or unavailable IDs) become None.
+        """
+        pending = [info for info in infos if self.is_spotify_placeholder(info)]
+        if not pending:
+            return infos
+        
+        album_ids = list(dict.fromkeys(info['spotify_album_id'] for info in pending if info.get('spotify_album_id')))
+        album_tracks = {}
+        for i in range(0, len(album_ids), 20):
+            try:
+                albums = self.spotify.albums(album_ids[i:i+20])['albums']
+            except Exception as e:
+                logger.warning(f"Failed to fetch Spotify albums: {e}")
+                continue
+            for album in albums:
+                if album and album['tracks']['items']:
+                    album_tracks[album['id']] = album['tracks']['items'][0]['id']
+        
+        for info in pending:
+            if info.get('spotify_album_id') in album_tracks:
+                info['spotify_id'] = album_tracks[info['spotify_album_id']]
+        
+        track_ids = list(dict.fromkeys(info['spotify_id'] for info in pending if info.get('spotify_id')))
+        tracks = {}
+        for i in range(0, len(track_ids), 50):
+            try:
+                batch = self.spotify.tracks(track_ids[i:i+50])['tracks']
+            except Exception as e:
+                logger.warning(f"Failed to fetch Spotify tracks: {e}")
+                continue
+            for track in batch:
+                if track:
+                    tracks[track['id']] = track
+        
+        pending_ids = {id(info) for info in pending}
+        hydrated = []
+        for info in infos:
+            if info is None or id(info) not in pending_ids:
+                hydrated.append(info)
+                continue
+            
+            track = tracks.get(info.get('spotify_id'))
+            if not track:
+                logger.warning(f"Failed to extract Spotify info for {info.get('spotify_id') or info.get('spotify_album_id')}")
+                hydrated.append(None)
+                continue
+            
+            info['artist'] = track['artists'][0]['name']
+            info['track'] = track['name']
+            info.pop('spotify_album_id', None)
+            hydrated.append(info)
+        
+        logger.info(f"Hydrated {len(tracks)} Spotify track(s) in {-(-len(track_ids) // 50)} request(s)")
+        return hydrated
     
     def extract_spotify_info(self, url: str) -> Optional[Dict]:
         """Extract info from Spotify URL"""
         try:
-            # Extract Spotify track ID from URL
-            match = re.search(r'spotify\.com/track/([a-zA-Z0-9]+)', url)
-            if match:
-                track_id = match.group(1)
-                track = self.spotify.track(track_id)
-                return {
-                    'artist': track['artists'][0]['name'],
-                    'track': track['name'],
-                    'source': 'spotify',
-                    'spotify_id': track_id
-                }
+            placeholder = self.parse_spotify_url(url)
+            if placeholder:
+                return self.hydrate_spotify_infos([placeholder])[0]
         except Exception as e:
             logger.warning(f"Failed to extract Spotify info: {e}")
         
         return None
     
+    @traced('metadata.soundcloud')
     def extract_soundcloud_info(self, url: str, title: str) -> Optional[Dict]:
         """Extract info from SoundCloud (similar to YouTube)"""
         return self.extract_youtube_info(url, title)
     
+    @traced('metadata.bandcamp')
     def extract_bandcamp_info(self, url: str, title: str) -> Optional[Dict]:
         """Extract info from Bandcamp URL using web scraping for accurate metadata"""
         
+        # A track's Reddit embed ("Track, by Artist") makes the page fetch unnecessary. An
+        # album's embed names the album, so album pages are still scanned for the featured track.
+        embedded = self.embedded_metadata.fetch(url, 'bandcamp') if '/track/' in urlparse(url).path else None
+        if embedded:
+            self.instrumentation.count('metadata.bandcamp.embed_hits')
+            return title_parser.parse_title(embedded['title'], 'bandcamp', BANDCAMP_TITLE_PATTERNS)
+        
         # First try to get metadata directly from Bandcamp
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
+            # The page is scanned as it downloads and reading stops at the ld+json track data.
+            # Revisits are revalidated with ETag/Last-Modified and cost a 304.
+            scanner = BandcampPageScanner()
+            self.rate_limiter.wait('bandcamp')
+            response = self.http.get_conditional(url, timeout=10, until=scanner.feed)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                if response.from_cache:
+                    scanner.feed(response.content)
                 
-                # Look for structured data in script tags
-                script_tags = soup.find_all('script', type='application/ld+json')
-                
-                for script in script_tags:
-                    try:
-                        data = json.loads(script.string)
-                        if '@type' in data and data['@type'] == 'MusicRecording':
-                            track_name = data.get('name', '').strip()
-                            artist_name = None
-                            
-                            # Look for artist in byArtist
-                            if 'byArtist' in data:
-                                if isinstance(data['byArtist'], dict):
-                                    artist_name = data['byArtist'].get('name', '').strip()
-                                elif isinstance(data['byArtist'], list) and len(data['byArtist']) > 0:
-                                    artist_name = data['byArtist'][0].get('name', '').strip()
-                            
-                            if track_name:
-                                if self.debug:
-                                    logger.debug(f"Bandcamp metadata - Artist: {artist_name}, Track: {track_name}")
-                                
-                                # Check for remix info in track name
-                                remix_info = self.extract_remix_info(track_name)
-                                
-                                result = {
-                                    'artist': artist_name or '',
-                                    'track': track_name,
-                                    'source': 'bandcamp'
-                                }
-                                result.update(remix_info)
-                                return result
-                                
-                    except json.JSONDecodeError:
-                        continue
-                
-                # Fallback: try to extract from page title
-                title_tag = soup.find('title')
-                if title_tag:
-                    page_title = title_tag.get_text().strip()
+                page = scanner.metadata()
+                if page:
+                    if self.debug:
+                        logger.debug(f"Bandcamp metadata ({page['via']}) - Artist: {page['artist']}, Track: {page['track']}")
                     
-                    # Bandcamp titles are often "Track | Artist"
-                    if ' | ' in page_title:
-                        parts = page_title.split(' | ')
-                        if len(parts) >= 2:
-                            track_name = parts[0].strip()
-                            artist_name = parts[1].strip()
-                            
-                            if self.debug:
-                                logger.debug(f"Bandcamp fallback - Artist: {artist_name}, Track: {track_name}")
-                            
-                            remix_info = self.extract_remix_info(track_name)
-                            
-                            result = {
-                                'artist': artist_name,
-                                'track': track_name,
-                                'source': 'bandcamp'
-                            }
-                            result.update(remix_info)
-                            return result
+                    # Check for remix info in track name
+                    remix_info = self.extract_remix_info(page['track'])
+                    
+                    result = MusicInfo(artist=page['artist'], track=page['track'], source='bandcamp')
+                    result.update(remix_info)
+                    return result
                             
         except Exception as e:
             if self.debug:
                 logger.debug(f"Failed to extract Bandcamp metadata: {e}")
         
         # Fall back to parsing the post title like YouTube
-        remix_info = self.extract_remix_info(title)
-        clean_title = self.clean_title_for_parsing(title)
-        
-        # Try common patterns
-        patterns = [
-            r'^(.+?)\s*[-–—]\s*(.+)$',           # Artist - Track
-            r'^(.+?)\s*:\s*(.+)$',               # Artist: Track  
-            r'^(.+?)\s+by\s+(.+)$',              # Track by Artist
-            r'^\[(.+?)\]\s*(.+)$',               # [Artist] Track
-            r'^(.+?)\s*\|\s*(.+)$',              # Artist | Track
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, clean_title.strip(), re.IGNORECASE)
-            if match:
-                result = {
-                    'artist': match.group(1).strip(),
-                    'track': match.group(2).strip(),
-                    'source': 'bandcamp'
-                }
-                result.update(remix_info)
-                return result
-        
-        # Final fallback
-        result = {
-            'artist': '',
-            'track': clean_title.strip(),
-            'source': 'bandcamp'
-        }
-        result.update(remix_info)
-        return result
+        return title_parser.parse_title(title, 'bandcamp', BANDCAMP_TITLE_PATTERNS)
     
     def extract_from_title(self, title: str) -> Optional[Dict]:
         """Try to extract artist/track from Reddit post title"""
-        return self.extract_youtube_info('', title)
+        return title_parser.parse_title(title)
     
     def extract_remix_info(self, title: str) -> Dict:
         """Extract remix information from title"""
-        remix_patterns = [
-            # (Remixer Remix) - but not if remixer contains "not"
-            r'\((.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)\)',
-            # [Remixer Remix]
-            r'\[(.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)\]',
-            # feat./ft. patterns
-            r'feat\.?\s+(.+?)\s*[\(\[](.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)[\)\]]',
-            r'ft\.?\s+(.+?)\s*[\(\[](.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)[\)\]]',
-        ]
-        
-        for pattern in remix_patterns:
-            match = re.search(pattern, title, re.IGNORECASE)
-            if match:
-                if len(match.groups()) == 2:  # Simple (Remixer Type) pattern
-                    remixer = match.group(1).strip()
-                    remix_type = match.group(2).strip()
-                    
-                    # Skip false positives
-                    if self.is_false_positive_remix(remixer, remix_type):
-                        continue
-                    
-                    return {
-                        'is_remix': True,
-                        'remixer': remixer,
-                        'remix_type': remix_type.lower(),
-                        'original_artist': None,
-                        'original_track': None
-                    }
-                elif len(match.groups()) == 3:  # feat. pattern
-                    featured_artist = match.group(1).strip()
-                    remixer = match.group(2).strip()
-                    remix_type = match.group(3).strip()
-                    
-                    # Skip false positives
-                    if self.is_false_positive_remix(remixer, remix_type):
-                        continue
-                        
-                    return {
-                        'is_remix': True,
-                        'remixer': remixer,
-                        'remix_type': remix_type.lower(),
-                        'featured_artist': featured_artist,
-                        'original_artist': None,
-                        'original_track': None
-                    }
-        
-        return {
-            'is_remix': False,
-            'remixer': None,
-            'remix_type': None,
-            'featured_artist': None,
-            'original_artist': None,
-            'original_track': None
-        }
+        return title_parser.extract_remix_info(title)
     
     def is_false_positive_remix(self, remixer: str, remix_type: str) -> bool:
         """Check if this is a false positive remix detection"""
-        remixer_lower = remixer.lower()
-        remix_type_lower = remix_type.lower()
-        
-        # Skip if remixer contains negative words (but "Not" in artist names like "What So Not" is OK)
-        negative_phrases = ['something not a', 'not a remix', 'not remix', 'no remix', 'never remix']
-        if any(phrase in remixer_lower for phrase in negative_phrases):
-            return True
-            
-        # Skip "Original Mix" - this is typically not a remix
-        if remixer_lower == 'original' and remix_type_lower == 'mix':
-            return True
-            
-        # Skip common false positives (exact matches only)
-        false_positives = [
-            'radio edit',
-            'extended mix',
-            'club mix',
-            'original mix',
-            'vocal mix',
-            'instrumental mix',
-        ]
-        
-        full_text = f"{remixer_lower} {remix_type_lower}"
-        if full_text in false_positives:
-            return True
-            
-        return False
+        return title_parser.is_false_positive_remix(remixer, remix_type)
     
     def clean_title_for_parsing(self, title: str) -> str:
         """Remove remix information and metadata to get clean artist - track"""
-        # Remove remix patterns first
-        remix_patterns = [
-            r'\s*[\(\[].*?(remix|mix|edit|rework|vip|bootleg|flip).*?[\)\]]',
-            r'\s*[\(\[].*?remix.*?[\)\]]',  # catch variations
-        ]
-        
-        clean_title = title
-        for pattern in remix_patterns:
-            clean_title = re.sub(pattern, '', clean_title, flags=re.IGNORECASE)
-        
-        # Remove common metadata patterns
-        metadata_patterns = [
-            r'\s*\[.*?\d{4}.*?\]',  # [Label, 2000] or [2000]
-            r'\s*\(.*?\d{4}.*?\)',  # (Label, 2000) or (2000)  
-            r'\s*\[.*?Records.*?\]',  # [Some Records]
-            r'\s*\(.*?Records.*?\)',  # (Some Records)
-            r'\s*\[.*?Label.*?\]',   # [Some Label]
-            r'\s*\(.*?Label.*?\)',   # (Some Label)
-        ]
-        
-        for pattern in metadata_patterns:
-            clean_title = re.sub(pattern, '', clean_title, flags=re.IGNORECASE)
-        
-        return clean_title.strip()
-    
-    def search_spotify(self, music_info: Dict) -> Optional[str]:
-        """Search for track on Spotify and return track ID"""
+        return title_parser.clean_title_for_parsing(title)
+    
+    def search_spotify(self, music_info: Dict, resolution: Optional[ResolutionState] = None) -> Optional[str]:
+        """Search for track on Spotify and return track ID
+        
+        Queries run in priority order until one yields a confident match. Within
+        one resolution, a query string is never sent twice, candidates already
+        scored against the same metadata are not scored again, and once a query
+        returns only already-seen items its looser variants (same terms, fewer
+        quotes/field filters) are treated as subsumed and dropped.
+        """
         if music_info.get('spotify_id'):
             return music_info['spotify_id']
         
@@ -697,36 +929,61 @@ class OverloadSpotifySync:
         if not track:
             return None
         
+        if resolution is None:
+            resolution = ResolutionState(self.config.spotify_query_budget)
+        context = (artist, track, is_remix, remixer, remix_type)
+        matcher = None if is_remix else TrackMatcher(artist, track, debug=self.debug)
+        
         # Build search queries with remix-aware strategy
         search_queries = self.build_search_queries(artist, track, is_remix, remixer, remix_type)
         
         for query in search_queries:
+            query_key = SearchCache.make_key(query, 'track', 20)
+            family = ResolutionState.query_family(query)
+            if query_key in resolution.sent_queries or family in resolution.exhausted_families:
+                continue
+            if resolution.exhausted:
+                logger.info(f"  → Query budget of {resolution.budget} reached")
+                break
+            
+            resolution.sent_queries.add(query_key)
+            resolution.queries += 1
+            
             try:
-                results = self.spotify.search(q=query, type='track', limit=20)
+                results = self.search_tracks(query, limit=20)
                 
-                if results['tracks']['items']:
-                    # For remixes, try to find the best match
-                    if is_remix:
-                        best_match = self.find_best_remix_match(results['tracks']['items'], 
-                                                              artist, track, remixer, remix_type)
-                        if best_match:
-                            track_id = best_match['id']
-                            found_artist = best_match['artists'][0]['name']
-                            found_track = best_match['name']
-                            
-                            remix_info = f" ({remixer} {remix_type})" if remixer and remix_type else " (remix)"
-                            logger.info(f"Found remix on Spotify: {found_artist} - {found_track}{remix_info}")
-                            return track_id
-                    else:
-                        # Non-remix: validate result quality before accepting
-                        best_match = self.find_best_track_match(results['tracks']['items'], artist, track)
-                        if best_match:
-                            track_id = best_match['id']
-                            found_artist = best_match['artists'][0]['name']
-                            found_track = best_match['name']
-                            
-                            logger.info(f"Found on Spotify: {found_artist} - {found_track}")
-                            return track_id
+                # Only score candidates this resolution has not already rejected
+                candidates = [item for item in results['tracks']['items']
+                              if (item['id'], context) not in resolution.scored]
+                resolution.scored.update((item['id'], context) for item in candidates)
+                
+                if not candidates:
+                    # Same items as an earlier query: looser variants of it won't add anything
+                    if results['tracks']['items']:
+                        resolution.exhausted_families.add(family)
+                    continue
+                
+                # For remixes, try to find the best match
+                if is_remix:
+                    best_match = self.find_best_remix_match(candidates, artist, track, remixer, remix_type)
+                    if best_match:
+                        track_id = best_match['id']
+                        found_artist = best_match['artists'][0]['name']
+                        found_track = best_match['name']
+                        
+                        remix_info = f" ({remixer} {remix_type})" if remixer and remix_type else " (remix)"
+                        logger.info(f"Found remix on Spotify: {found_artist} - {found_track}{remix_info}")
+                        return track_id
+                else:
+                    # Non-remix: validate result quality before accepting
+                    best_match = self.find_best_track_match(candidates, artist, track, matcher)
+                    if best_match:
+                        track_id = best_match['id']
+                        found_artist = best_match['artists'][0]['name']
+                        found_track = best_match['name']
+                        
+                        logger.info(f"Found on Spotify: {found_artist} - {found_track}")
+                        return track_id
                     
             except Exception as e:
                 import traceback
@@ -739,11 +996,37 @@ class OverloadSpotifySync:
         logger.info(f"Could not find on Spotify: {artist} - {track}{remix_info}")
         return None
     
-    def search_spotify_with_fallback(self, music_info: Dict, post: Dict) -> Optional[str]:
-        """Search Spotify with fallback strategies when primary search fails"""
+    def search_tracks(self, query: str, limit: int = 20) -> Dict:
+        """Run a Spotify track search through the memoizing search cache
+        
+        Responses are trimmed to the fields the matchers read before caching.
+        """
+        def fetch():
+            with self.instrumentation.span('spotify.search'):
+                results = self.spotify.search(q=query, type='track', limit=limit)
+            return {'tracks': {'items': [
+                {
+                    'id': item['id'],
+                    'name': item['name'],
+                    'artists': [{'name': artist['name']} for artist in item['artists']],
+                }
+                for item in results['tracks']['items']
+            ]}}
+        
+        return self.search_cache.get_or_fetch(query, 'track', limit, fetch)
+    
+    def search_spotify_with_fallback(self, music_info: Dict, post: Dict,
+                                     resolution: Optional[ResolutionState] = None) -> Optional[str]:
+        """Search Spotify with fallback strategies when primary search fails
+        
+        All strategies share one ResolutionState, so the query budget covers the
+        whole resolution rather than each strategy separately.
+        """
+        if resolution is None:
+            resolution = ResolutionState(self.config.spotify_query_budget)
         
         # Try primary search first (extracted metadata)
-        track_id = self.search_spotify(music_info)
+        track_id = self.search_spotify(music_info, resolution)
         if track_id:
             return track_id
         
@@ -768,7 +1051,7 @@ class OverloadSpotifySync:
                         if self.debug:
                             logger.debug(f"Trying post title fallback: {fallback_artist} - {fallback_track}")
                         
-                        track_id = self.search_spotify(fallback_info)
+                        track_id = self.search_spotify(fallback_info, resolution)
                         if track_id:
                             logger.info(f"✓ Found using post title fallback: {fallback_artist} - {fallback_track}")
                             return track_id
@@ -787,7 +1070,7 @@ class OverloadSpotifySync:
                 if self.debug:
                     logger.debug(f"Trying cleaned metadata: {cleaned_artist} - {cleaned_track}")
                 
-                track_id = self.search_spotify(cleaned_info)
+                track_id = self.search_spotify(cleaned_info, resolution)
                 if track_id:
                     logger.info(f"✓ Found using cleaned metadata: {cleaned_artist} - {cleaned_track}")
                     return track_id
@@ -801,94 +1084,43 @@ class OverloadSpotifySync:
         track = music_info.get('track', '').strip()
         post_title = post.get('title', '')
         
-        # Common label patterns to detect and extract real artist from
-        label_patterns = [
-            r'^(.+?)\s*[-–—]\s*(.+?)\s*\[(.+?)\]',  # "Artist - Track [Label]" -> try "Artist - Track"
-            r'^(.+?)\s*[-–—]\s*(.+?)\s*\((.+?)\s*Records?\)',  # "Artist - Track (Label Records)"
-            r'^(.+?)\s*[-–—]\s*(.+?)\s*[-–—]\s*(.+?)$',  # "Artist - Track - Label" -> try "Artist - Track"
-            r'^(.+?)\s+Records?\s*[-–—]\s*(.+)',   # "Label Records - Track" -> try from post title
-            r'^(.+?)\s+Recordings?\s*[-–—]\s*(.+)',  # "Label Recordings - Track"
-        ]
-        
         cleaned_info = None
         
-        # Try to detect if artist looks like a label
-        for pattern in label_patterns:
-            match = re.match(pattern, f"{artist} - {track}", re.IGNORECASE)
-            if match:
-                if self.debug:
-                    logger.debug(f"Detected label pattern, trying to extract from post title: '{post_title}'")
-                
-                # Try to extract real artist/track from post title
-                title_patterns = [
-                    r'^(.+?)\s*[-–—]\s*(.+?)\s*\[',  # "Artist - Track [anything]"
-                    r'^(.+?)\s*[-–—]\s*(.+?)$',      # "Artist - Track"
-                ]
-                
-                for title_pattern in title_patterns:
-                    title_match = re.match(title_pattern, post_title.strip(), re.IGNORECASE)
-                    if title_match:
-                        potential_artist = title_match.group(1).strip()
-                        potential_track = title_match.group(2).strip()
-                        
-                        # Clean up track name (remove label info, year, etc.)
-                        potential_track = re.sub(r'\s*\[.*?\]$', '', potential_track)
-                        potential_track = re.sub(r'\s*\(.*?\)$', '', potential_track) 
-                        
-                        if potential_artist and potential_track:
-                            cleaned_info = music_info.copy()
-                            cleaned_info['artist'] = potential_artist
-                            cleaned_info['track'] = potential_track
-                            break
-                break
+        # Try to detect if artist looks like a label ("Artist - Track [Label]", "Label Records - Track", ...)
+        if LABEL_AS_ARTIST_PATTERN.match(f"{artist} - {track}"):
+            if self.debug:
+                logger.debug(f"Detected label pattern, trying to extract from post title: '{post_title}'")
+            
+            # Try to extract real artist/track from post title
+            for title_pattern in POST_TITLE_PATTERNS:
+                title_match = title_pattern.match(post_title.strip())
+                if title_match:
+                    potential_artist = title_match.group(1).strip()
+                    potential_track = title_match.group(2).strip()
+                    
+                    # Clean up track name (remove label info, year, etc.)
+                    potential_track = TRAILING_BRACKET_PATTERN.sub('', potential_track)
+                    potential_track = TRAILING_PAREN_PATTERN.sub('', potential_track)
+                    
+                    if potential_artist and potential_track:
+                        cleaned_info = music_info.copy()
+                        cleaned_info['artist'] = potential_artist
+                        cleaned_info['track'] = potential_track
+                        break
         
         return cleaned_info
     
     def normalize_for_matching(self, text: str) -> str:
         """Normalize text for matching (remove spaces, punctuation, etc.)"""
-        import re
-        # Remove spaces, punctuation, convert to lowercase
-        normalized = re.sub(r'[^a-zA-Z0-9]', '', text.lower())
-        return normalized
+        return normalize_for_matching(text)
     
     def is_clean_title(self, title: str) -> bool:
         """Check if a title is 'clean' (no version/remix info)"""
-        title_lower = title.lower()
-        
-        # If it already has version indicators, it's not clean
-        version_indicators = [
-            'remix', 'mix', 'edit', 'version', 'rework', 'vip', 'bootleg', 
-            'extended', 'radio', 'instrumental', 'acapella', 'live',
-            'remaster', 'remastered', 'deluxe', 'special', 'alternate'
-        ]
-        
-        for indicator in version_indicators:
-            if indicator in title_lower:
-                return False
-                
-        # If it has parentheses or brackets with content, likely has version info
-        if re.search(r'\[.+\]|\(.+\)', title):
-            return False
-            
-        return True
+        return is_clean_title(title)
     
     def has_version_suffix(self, spotify_title: str) -> bool:
         """Check if Spotify title has version/label suffix that wasn't in original query"""
-        spotify_lower = spotify_title.lower()
-        
-        # Common version patterns in Spotify titles
-        version_patterns = [
-            r'-\s+(.*?)\s+(version|mix|edit|remix)',  # " - Something Version/Mix"
-            r'-\s+(extended|radio|instrumental|live)',  # " - Extended/Radio/etc"
-            r'-\s+(remaster|remastered|deluxe)',       # " - Remastered/Deluxe"
-            r'\(\s*(.*?)\s*(version|mix|edit)\s*\)',   # "(Something Version)"
-        ]
-        
-        for pattern in version_patterns:
-            if re.search(pattern, spotify_lower):
-                return True
-                
-        return False
+        return has_version_suffix(spotify_title)
     
     def build_search_queries(self, artist: str, track: str, is_remix: bool, remixer: str, remix_type: str) -> List[str]:
         """Build prioritized search queries based on remix status"""
@@ -976,186 +1208,40 @@ class OverloadSpotifySync:
         # No fallback for remixes - if we can't find a good remix match, return None
         return None
     
-    def find_best_track_match(self, tracks: List[Dict], artist: str, track: str) -> Optional[Dict]:
-        """Find the best matching track from search results (non-remix)"""
+    def find_best_track_match(self, tracks: List[Dict], artist: str, track: str,
+                              matcher: Optional[TrackMatcher] = None) -> Optional[Dict]:
+        """Find the best matching track from search results (non-remix)
+        
+        Pass a prebuilt TrackMatcher to reuse its query-side work across pages.
+        """
         if not tracks:
             return None
-            
-        # If we don't have good artist/track info, be more strict
-        if not artist or not track:
-            logger.info(f"Insufficient track info for reliable matching: '{artist}' - '{track}'")
-            return None
         
-        # Only reject if track is extremely short or both are very generic
-        if len(track) <= 2 or (len(artist) <= 2 and len(track) <= 3):
-            logger.info(f"Track info too vague for reliable matching: '{artist}' - '{track}'")
-            return None
-            
-        # Score tracks based on how well they match
-        scored_tracks = []
+        matcher = matcher or TrackMatcher(artist, track, debug=self.debug)
         
-        for spotify_track in tracks:
-            score = 0
-            track_name = spotify_track['name'].lower()
-            artist_names = [a['name'].lower() for a in spotify_track['artists']]
-            
-            # Strong artist match (multiple strategies)
-            if artist:
-                artist_lower = artist.lower()
-                for artist_name in artist_names:
-                    # Direct substring matching
-                    if artist_lower in artist_name or artist_name in artist_lower:
-                        score += 10
-                        break
-                    # Try normalized versions (remove spaces/punctuation)
-                    elif self.normalize_for_matching(artist_lower) == self.normalize_for_matching(artist_name):
-                        score += 10
-                        break
-                    # Try matching first word of artist (e.g., "Deadmau5" from "Deadmau5 feat. Someone")
-                    elif len(artist.split()) > 1 and artist.split()[0].lower() in artist_name:
-                        score += 8
-                        break
-                    # Try partial word matching
-                    elif any(word in artist_name for word in artist_lower.split() if len(word) > 3):
-                        score += 6
-                        break
-            
-            # Strong track name match - be more strict
-            if track and track.lower() in track_name:
-                score += 8
-                
-                # PURE TITLE MATCHING: If query is clean but result has version info, penalize heavily
-                if self.is_clean_title(track) and self.has_version_suffix(track_name):
-                    score -= 15  # Heavy penalty - should eliminate most matches
-                    if self.debug:
-                        logger.debug(f"Pure title penalty (-15): '{track}' vs '{track_name}'")
-                        
-            elif track:
-                # Partial track name match (require more substantial overlap)
-                track_words = track.lower().split()
-                matching_words = sum(1 for word in track_words if word in track_name and len(word) > 3)
-                if matching_words >= 2:  # Need at least 2 significant words
-                    score += matching_words * 3
-                elif matching_words == 1 and len(track_words) == 1:  # Single word exact match
-                    score += 4
-            
-            # Balanced validation - strict artist, more flexible track
-            artist_score = 0
-            track_score = 0
-            
-            # STRICT artist matching (prevent wrong artists)
-            if artist:
-                artist_lower = artist.lower()
-                for artist_name in artist_names:
-                    # Direct substring matching
-                    if artist_lower in artist_name or artist_name in artist_lower:
-                        artist_score = 10
-                        break
-                    # Try normalized versions (remove spaces/punctuation)
-                    elif self.normalize_for_matching(artist_lower) == self.normalize_for_matching(artist_name):
-                        artist_score = 10
-                        break
-                    elif len(artist.split()) > 1 and artist.split()[0].lower() in artist_name:
-                        artist_score = 8
-                        break
-                    elif any(word in artist_name for word in artist_lower.split() if len(word) > 3):
-                        artist_score = 6
-                        break
-            
-            # MORE FLEXIBLE track matching (handle variations like "Bubblin (2022)" vs "Bubblin")
-            if track:
-                # Normalize smart quotes and other unicode characters
-                def normalize_text(text):
-                    # Replace smart apostrophes and quotes with regular ones
-                    return text.replace('\u2019', "'").replace('\u201c', '"').replace('\u201d', '"')
-                
-                track_lower = normalize_text(track.lower())
-                track_name_lower = normalize_text(track_name.lower())
-                
-                # Exact match
-                if track_lower in track_name_lower:
-                    track_score = 8
-                    
-                    # Apply pure title penalty in final validation
-                    if self.is_clean_title(track) and self.has_version_suffix(spotify_track['name']):
-                        track_score -= 15
-                        if self.debug:
-                            logger.debug(f"Final validation penalty (-15): '{track}' vs '{spotify_track['name']}'")
-                            
-                # Handle year/version variations - remove common suffixes  
-                elif self.tracks_match_with_variations(track_lower, track_name_lower):
-                    track_score = 7
-                # Word-based matching
-                else:
-                    track_words = track_lower.split()
-                    # For single word tracks, be more lenient
-                    if len(track_words) == 1:
-                        if track_lower in track_name_lower or any(track_lower in word for word in track_name_lower.split()):
-                            track_score = 6
-                    # Multi-word tracks need better overlap
-                    else:
-                        matching_words = sum(1 for word in track_words if word in track_name_lower and len(word) > 3)
-                        if matching_words >= len(track_words) * 0.7:  # 70% of words match
-                            track_score = matching_words * 2
-                        elif matching_words >= 1:
-                            track_score = matching_words
-            
-            # Require GOOD artist match, more flexible track match
-            if artist_score < 6:  # Must have good artist match
-                if self.debug:
-                    logger.debug(f"Rejected {spotify_track['artists'][0]['name']} - {spotify_track['name']}: artist score {artist_score} < 6")
-                continue
-            if track_score < 2:  # More lenient track requirement
-                if self.debug:
-                    logger.debug(f"Rejected {spotify_track['artists'][0]['name']} - {spotify_track['name']}: track score {track_score} < 2")
-                continue
-                
-            score = artist_score + track_score
-            if self.debug:
-                logger.debug(f"Match candidate: {spotify_track['artists'][0]['name']} - {spotify_track['name']} (artist: {artist_score}, track: {track_score}, total: {score})")
-                
-            scored_tracks.append((score, spotify_track))
+        # If we don't have good artist/track info, be more strict
+        reason = matcher.rejection_reason()
+        if reason:
+            logger.info(reason)
+            return None
         
-        if not scored_tracks:
+        best_match = matcher.best_match(tracks)
+        if not best_match:
             logger.info(f"No confident matches found for: {artist} - {track}")
-            return None
-            
-        # Return highest scoring track
-        scored_tracks.sort(key=lambda x: x[0], reverse=True)
-        return scored_tracks[0][1]
+        return best_match
     
     def tracks_match_with_variations(self, track1: str, track2: str) -> bool:
         """Check if tracks match allowing for common variations like years, versions, etc."""
-        import re
-        
-        # Normalize smart quotes first
-        def normalize_text(text):
-            return text.replace('\u2019', "'").replace('\u201c', '"').replace('\u201d', '"')
-        
-        # Remove common variations
-        def clean_track(track_text):
-            track_text = normalize_text(track_text)  # Normalize smart quotes first
-            # Remove years, versions, and common suffixes
-            track_text = re.sub(r'\s*\(\d{4}\)\s*', '', track_text)  # (2022)
-            track_text = re.sub(r'\s*\[\d{4}\]\s*', '', track_text)  # [2022]
-            track_text = re.sub(r'\s*\(remaster\w*\)\s*', '', track_text, flags=re.IGNORECASE)
-            track_text = re.sub(r'\s*\(original mix\)\s*', '', track_text, flags=re.IGNORECASE)
-            track_text = re.sub(r'\s*\(radio edit\)\s*', '', track_text, flags=re.IGNORECASE)
-            return track_text.strip()
-        
-        clean1 = clean_track(track1)
-        clean2 = clean_track(track2)
-        
-        # Check if cleaned versions match
-        return clean1 in clean2 or clean2 in clean1
+        return tracks_match_with_variations(track1, track2)
     
+    @traced('spotify.playlist_lookup')
     def get_or_create_playlist(self) -> str:
         """Get existing playlist or create new one"""
         # Use hardcoded playlist ID
         playlist_id = '4dgLGz7JuWwtls5yYXva0f'
         
         try:
-            playlist = self.spotify.playlist(playlist_id)
+            playlist = self.spotify.playlist(playlist_id, fields='name')
             logger.info(f"Using playlist: {playlist['name']} ({playlist_id})")
             return playlist_id
         except Exception as e:
@@ -1168,7 +1254,7 @@ class OverloadSpotifySync:
                         cached_id = f.read().strip()
                     
                     # Verify cached playlist still exists and has correct name
-                    cached_playlist = self.spotify.playlist(cached_id)
+                    cached_playlist = self.spotify.playlist(cached_id, fields='name')
                     if cached_playlist['name'] == self.config.playlist_name:
                         logger.info(f"Using cached playlist: {cached_playlist['name']} ({cached_id})")
                         return cached_id
@@ -1218,22 +1304,60 @@ class OverloadSpotifySync:
         logger.info(f"Created new playlist: {playlist['name']} ({playlist['id']})")
         return playlist['id']
     
+    def get_playlist_track_ids(self, playlist_id: str) -> set:
+        """Return the IDs of tracks already in the playlist, using the local index when possible
+        
+        The index is tagged with the playlist's snapshot_id. If the snapshot is
+        unchanged nothing is paged; if the playlist has only grown, just the new
+        tail is fetched; anything else (removals, reordering) triggers a rebuild.
+        """
+        playlist = self.spotify.playlist(playlist_id, fields='snapshot_id,tracks.total')
+        snapshot_id = playlist['snapshot_id']
+        total = playlist['tracks']['total']
+        indexed = self.playlist_index.get(playlist_id)
+        
+        if indexed and indexed['snapshot_id'] == snapshot_id:
+            logger.info(f"Playlist unchanged since last run ({len(indexed['track_ids'])} tracks indexed)")
+            return set(indexed['track_ids'])
+        
+        if indexed and indexed['track_ids'] and total >= len(indexed['track_ids']):
+            # Re-read the last indexed position to make sure the known prefix is intact
+            known = len(indexed['track_ids'])
+            tail = self.fetch_playlist_track_ids(playlist_id, offset=known - 1)
+            if tail and tail[0] == indexed['track_ids'][-1]:
+                self.playlist_index.append(playlist_id, snapshot_id, tail[1:])
+                logger.info(f"Playlist index updated with {len(tail) - 1} new track(s)")
+                return set(indexed['track_ids'] + tail[1:])
+        
+        track_ids = self.fetch_playlist_track_ids(playlist_id)
+        self.playlist_index.replace(playlist_id, snapshot_id, track_ids)
+        logger.info(f"Playlist index rebuilt ({len(track_ids)} tracks)")
+        return set(track_ids)
+    
+    @traced('spotify.playlist_paging')
+    def fetch_playlist_track_ids(self, playlist_id: str, offset: int = 0) -> List[Optional[str]]:
+        """Page through playlist items from `offset`, fetching only track IDs"""
+        track_ids = []
+        results = self.spotify.playlist_items(playlist_id, fields='items(track(id)),next',
+                                              offset=offset, additional_types=('track',))
+        while True:
+            track_ids.extend(item['track']['id'] if item['track'] else None for item in results['items'])
+            if not results['next']:
+                break
+            results = self.spotify.next(results)
+        return track_ids
+    
+    @traced('spotify.playlist_add')
     def add_tracks_to_playlist(self, playlist_id: str, track_ids: List[str]):
         """Add tracks to playlist (avoiding duplicates)"""
         if not track_ids:
             return
         
         # Get existing tracks in playlist
-        existing_tracks = set()
-        results = self.spotify.playlist_tracks(playlist_id)
-        existing_tracks.update(track['track']['id'] for track in results['items'] if track['track'])
-        
-        while results['next']:
-            results = self.spotify.next(results)
-            existing_tracks.update(track['track']['id'] for track in results['items'] if track['track'])
+        existing_tracks = self.get_playlist_track_ids(playlist_id)
         
         # Filter out duplicates
-        new_tracks = [tid for tid in track_ids if tid not in existing_tracks]
+        new_tracks = [tid for tid in dict.fromkeys(track_ids) if tid not in existing_tracks]
         
         if not new_tracks:
             logger.info("No new tracks to add (all tracks already in playlist)")
@@ -1246,77 +1370,261 @@ class OverloadSpotifySync:
         # Add tracks in batches of 100 (Spotify limit)
         for i in range(0, len(new_tracks), 100):
             batch = new_tracks[i:i+100]
-            self.spotify.playlist_add_items(playlist_id, batch)
+            result = self.spotify.playlist_add_items(playlist_id, batch)
+            # Keep the index in step so tomorrow's run sees an unchanged snapshot
+            self.playlist_index.append(playlist_id, result['snapshot_id'], batch)
+            self.instrumentation.count('tracks.added', len(batch))
             logger.info(f"Added {len(batch)} tracks to playlist")
     
-    def run(self):
-        """Main execution function"""
+    def record_resolution_queries(self, resolution: ResolutionState):
+        """Remember how many Spotify queries one resolution took, for the run summary"""
+        self.queries_per_resolution.append(resolution.queries)
+        if resolution.queries:
+            logger.info(f"  → {resolution.queries} Spotify quer{'y' if resolution.queries == 1 else 'ies'}")
+    
+    def log_query_summary(self):
+        """Log the distribution of Spotify queries per resolution for this run"""
+        summary = self.query_summary()
+        if not summary['resolutions']:
+            return
+        
+        distribution = ', '.join(f"{queries}q×{n}" for queries, n in summary['histogram'].items())
+        logger.info(f"Spotify queries per resolution: {summary['total']} total over {summary['resolutions']} "
+                    f"resolution(s), avg {summary['mean']:.1f}, max {summary['max']} ({distribution})")
+    
+    def log_throttle_summary(self):
+        """Log how often Spotify calls waited on the token bucket or were rate-limited"""
+        spotify = getattr(self, '_spotify', None)
+        if isinstance(spotify, ThrottledSpotify):
+            logger.info(f"Spotify API: {spotify.summary()}")
+    
+    def query_summary(self) -> Dict:
+        """Spotify queries per resolution for this run, for the run report"""
+        counts = self.queries_per_resolution
+        histogram = {}
+        for count in counts:
+            histogram[count] = histogram.get(count, 0) + 1
+        return {
+            'resolutions': len(counts),
+            'total': sum(counts),
+            'mean': round(sum(counts) / len(counts), 3) if counts else 0.0,
+            'max': max(counts, default=0),
+            'histogram': {str(queries): n for queries, n in sorted(histogram.items())},
+        }
+    
+    def collect_counters(self):
+        """Copy the API clients' and caches' running totals into the instrumentation counters"""
+        counters = self.instrumentation
+        # Read the client only if this run created it; never authenticate just to report
+        spotify = getattr(self, '_spotify', None)
+        if isinstance(spotify, ThrottledSpotify):
+            counters.set('spotify.api_calls', spotify.calls)
+            counters.set('spotify.throttled_calls', spotify.throttled)
+            counters.set('spotify.throttle_seconds', round(spotify.throttle_seconds, 3))
+            counters.set('spotify.rate_limited', spotify.rate_limited)
+            counters.set('spotify.retry_after_seconds', round(spotify.retry_after_seconds, 3))
+        counters.set('search_cache.memory_hits', self.search_cache.memory_hits)
+        counters.set('search_cache.disk_hits', self.search_cache.disk_hits)
+        counters.set('search_cache.misses', self.search_cache.misses)
+        counters.set('search_cache.in_flight_joins', self.search_cache.in_flight_joins)
+        counters.set('resolution_cache.hits', self.resolution_cache.hits)
+        counters.set('tracks.shared_mentions', self.track_mentions.shared)
+        counters.set('resolution_cache.misses', self.resolution_cache.misses)
+        counters.set('http.fetched', self.http.fetched)
+        counters.set('http.not_modified', self.http.not_modified)
+        counters.set('ytdlp.lookups', self.ytdlp_pool.lookups)
+        counters.set('ytdlp.batches', self.ytdlp_pool.batches)
+        for tier, stats in self.metadata_resolver.stats.items():
+            counters.set(f"metadata.{tier}.attempts", stats['attempts'])
+            counters.set(f"metadata.{tier}.hits", stats['hits'])
+    
+    def build_run_report(self, status: str, mode: str) -> Dict:
+        """Stage timings, counters, query spend and the pre-filter's skipped posts for this run"""
+        self.collect_counters()
+        return self.instrumentation.report(
+            status=status,
+            mode=mode,
+            queries_per_resolution=self.query_summary(),
+            skipped_posts=self.skipped_posts
+        )
+    
+    def write_run_report(self, status: str, mode: str):
+        """Write the JSON run report (and Prometheus textfile, if configured)"""
+        if not self.config.run_report_path and not self.config.prometheus_textfile_path:
+            return
+        
+        report = self.build_run_report(status, mode)
+        try:
+            if self.config.run_report_path:
+                self.instrumentation.write_json(self.config.run_report_path, report)
+                logger.info(f"Run report written to {self.config.run_report_path}")
+            if self.config.prometheus_textfile_path:
+                self.instrumentation.write_prometheus(self.config.prometheus_textfile_path, report)
+        except OSError as e:
+            logger.warning(f"Could not write run report: {e}")
+    
+    def log_metadata_summary(self):
+        """Log hit rate and latency of each metadata tier for this run"""
+        summary = self.metadata_resolver.summary()
+        if summary:
+            logger.info(f"Metadata tiers: {summary}")
+    
+    @traced('resolve.post')
+    def resolve_post(self, post: Dict, music_info: Optional[Dict]) -> Optional[str]:
+        """Find the Spotify track for one post and remember the outcome"""
+        logger.info(f"Processing: {post['title'][:50]}...")
+        
+        if post['cached']:
+            logger.info("  → Using cached resolution")
+            return self.track_mentions.mention(post['cached']['track_id'], post['score'])
+        
+        # Not cached either way: a rule change may let it through on a later run
+        if post.get('skip_reason'):
+            logger.info(f"  → Skipped: non-music ({post['skip_reason']})")
+            self.instrumentation.count('posts.skipped_non_music')
+            self.skipped_posts.append({
+                'id': post['id'], 'title': post['title'], 'url': post['url'], 'reason': post['skip_reason'],
+            })
+            return None
+        
+        if not music_info:
+            self.resolution_cache.store(f"post:{post['id']}", post['url'], None, None)
+            return None
+        
+        # Log remix information if detected
+        if music_info.get('is_remix'):
+            remix_info = f"Detected remix: {music_info.get('remixer', 'Unknown')} {music_info.get('remix_type', 'remix')}"
+            logger.info(f"  → {remix_info}")
+        
+        track_id = self.track_mentions.resolve(title_parser.track_key(music_info),
+                                               lambda: self.resolve_mention(music_info, post))
+        self.resolution_cache.store(f"post:{post['id']}", post['url'], music_info, track_id)
+        return self.track_mentions.mention(track_id, post['score'])
+    
+    @traced('resolve.comment')
+    def resolve_comment(self, comment: Dict, music_info: Optional[Dict]) -> Optional[str]:
+        """Find the Spotify track for one discussion-thread comment and remember the outcome"""
+        logger.info(f"Processing comment ({comment['score']} upvotes): {comment['body'][:50]}...")
+        
+        if comment['cached']:
+            logger.info("  → Using cached resolution")
+            return self.track_mentions.mention(comment['cached']['track_id'], comment['score'])
+        
+        if not music_info:
+            self.resolution_cache.store(f"comment:{comment['id']}", comment['url'], None, None)
+            return None
+        
+        # Enhanced logging for comment-sourced tracks
+        source_type = music_info.get('source', 'unknown')
+        logger.info(f"  → Found track from {source_type} (comment: {comment['score']} upvotes)")
+        
+        # Log remix information if detected
+        if music_info.get('is_remix'):
+            remix_info = f"Detected remix: {music_info.get('remixer', 'Unknown')} {music_info.get('remix_type', 'remix')}"
+            logger.info(f"  → {remix_info}")
+        
+        track_id = self.track_mentions.resolve(title_parser.track_key(music_info),
+                                               lambda: self.resolve_mention(music_info, comment))
+        self.resolution_cache.store(f"comment:{comment['id']}", comment['url'], music_info, track_id)
+        return self.track_mentions.mention(track_id, comment['score'])
+    
+    def resolve_mention(self, music_info: Dict, item: Dict) -> Optional[str]:
+        """One budgeted Spotify resolution for a post/comment (see TrackMentions)"""
+        resolution = ResolutionState(self.config.spotify_query_budget)
+        track_id = self.search_spotify_with_fallback(music_info, item, resolution)
+        self.record_resolution_queries(resolution)
+        return track_id
+    
+    def collect_track_ids(self, posts: List[Dict]) -> Tuple[List[str], List[str]]:
+        """Serial pipeline: extract everything, hydrate Spotify links, then resolve in order
+        
+        Returns (post track IDs, comment track IDs).
+        """
+        # Fetch metadata for posts and discussion-thread comments concurrently, in order
+        post_infos = self.extract_music_info_batch(
+            posts, lambda post: self.extract_music_info(post, hydrate_spotify=False),
+            url_of=lambda post: post['url']
+        )
+        
+        # Comments stream into extraction while the discussion threads are still being walked
+        comments = []
+        comment_infos = self.extract_music_info_batch(
+            self.iter_discussion_comments(posts),
+            lambda comment: self.extract_music_info_from_comment(comment, hydrate_spotify=False),
+            url_of=lambda comment: comment['url'], consumed=comments
+        )
+        
+        # Spotify links from posts and comments are hydrated together in batches
+        infos = self.hydrate_spotify_infos(post_infos + comment_infos)
+        post_infos, comment_infos = infos[:len(posts)], infos[len(posts):]
+        
+        # Process regular posts first
+        post_track_ids = []
+        for post, music_info in zip(posts, post_infos):
+            track_id = self.resolve_post(post, music_info)
+            if track_id:
+                post_track_ids.append(track_id)
+        
+        # Process comments from discussion threads
+        logger.info("\n=== PROCESSING DISCUSSION THREAD COMMENTS ===")
+        comment_track_ids = []
+        for comment, music_info in zip(comments, comment_infos):
+            track_id = self.resolve_comment(comment, music_info)
+            if track_id:
+                comment_track_ids.append(track_id)
+        
+        return post_track_ids, comment_track_ids
+    
+    def run(self, use_async: bool = False):
+        """Main execution function
+        
+        With use_async, listing, extraction and Spotify resolution run as a
+        concurrent asyncio pipeline (see async_pipeline.py); the tracks added
+        are the same.
+        """
         logger.info("Starting Overload to Spotify sync")
+        status = 'error'
         
         try:
-            # Get recent posts
-            posts = self.get_recent_posts()
+            # List recent posts, extract music info and search Spotify
+            with self.instrumentation.span('pipeline'):
+                if use_async:
+                    import asyncio
+                    from async_pipeline import AsyncPipeline
+                    pipeline = AsyncPipeline(
+                        self,
+                        queue_size=self.config.async_queue_size,
+                        resolve_workers=self.config.async_resolve_workers
+                    )
+                    post_track_ids, comment_track_ids = asyncio.run(pipeline.run(self.iter_recent_posts()))
+                    post_count = pipeline.counts['post']
+                else:
+                    posts = self.get_recent_posts()
+                    post_count = len(posts)
+                    post_track_ids, comment_track_ids = self.collect_track_ids(posts)
             
-            if not posts:
+            self.instrumentation.set('posts', post_count)
+            
+            if not post_count:
                 logger.info("No posts found, exiting")
+                status = 'ok'
                 return
             
-            # Extract music info and search Spotify
-            track_ids = []
-            
-            # Process regular posts first
-            for post in posts:
-                logger.info(f"Processing: {post['title'][:50]}...")
-                
-                music_info = self.extract_music_info(post)
-                if not music_info:
-                    continue
-                
-                # Log remix information if detected
-                if music_info.get('is_remix'):
-                    remix_info = f"Detected remix: {music_info.get('remixer', 'Unknown')} {music_info.get('remix_type', 'remix')}"
-                    logger.info(f"  → {remix_info}")
-                
-                track_id = self.search_spotify_with_fallback(music_info, post)
-                if track_id:
-                    track_ids.append(track_id)
-                
-                # Rate limiting
-                time.sleep(0.5)
+            # Each track once, the most upvoted (summed over all its mentions) first
+            track_ids = self.track_mentions.ranked(post_track_ids + comment_track_ids)
+            self.instrumentation.set('tracks.from_posts', len(post_track_ids))
+            self.instrumentation.set('tracks.from_comments', len(comment_track_ids))
             
-            # Process comments from discussion threads
-            logger.info("\n=== PROCESSING DISCUSSION THREAD COMMENTS ===")
-            comments = self.get_comments_from_discussion_threads(posts)
-            
-            comment_track_count = 0
-            for comment in comments:
-                logger.info(f"Processing comment ({comment['score']} upvotes): {comment['body'][:50]}...")
-                
-                music_info = self.extract_music_info_from_comment(comment)
-                if not music_info:
-                    continue
-                
-                # Enhanced logging for comment-sourced tracks
-                source_type = music_info.get('source', 'unknown')
-                logger.info(f"  → Found track from {source_type} (comment: {comment['score']} upvotes)")
-                
-                # Log remix information if detected
-                if music_info.get('is_remix'):
-                    remix_info = f"Detected remix: {music_info.get('remixer', 'Unknown')} {music_info.get('remix_type', 'remix')}"
-                    logger.info(f"  → {remix_info}")
-                
-                track_id = self.search_spotify_with_fallback(music_info, comment)
-                if track_id:
-                    track_ids.append(track_id)
-                    comment_track_count += 1
-                
-                # Rate limiting
-                time.sleep(0.5)
-            
-            logger.info(f"Found {comment_track_count} additional tracks from discussion thread comments")
+            logger.info(f"Found {len(comment_track_ids)} additional tracks from discussion thread comments")
+            logger.info(f"{len(track_ids)} unique track(s); {self.track_mentions.shared} mention(s) "
+                        f"reused another mention's resolution")
+            self.log_metadata_summary()
+            self.log_query_summary()
+            self.log_throttle_summary()
             
             if not track_ids:
                 logger.info("No tracks found on Spotify")
+                status = 'ok'
                 return
             
             # Get/create playlist and add tracks
@@ -1324,11 +1632,45 @@ class OverloadSpotifySync:
             self.add_tracks_to_playlist(playlist_id, track_ids)
             
             logger.info(f"Successfully processed {len(track_ids)} tracks")
+            status = 'ok'
             
         except Exception as e:
             logger.error(f"Error in main execution: {e}")
             raise
+        finally:
+            self.ytdlp_pool.close()
+            self.write_run_report(status, 'async' if use_async else 'serial')
 
 if __name__ == "__main__":
-    sync = OverloadSpotifySync()
-    sync.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync r/theoverload music posts to a Spotify playlist")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="run extraction and Spotify resolution as a concurrent asyncio pipeline")
+    parser.add_argument('--record', metavar='DIR',
+                        help="record this run's Reddit/Spotify/metadata traffic to DIR for offline replay "
+                             "(uses a fresh cache so every item is resolved; tracks are still added)")
+    parser.add_argument('--parse', nargs='+', metavar='TITLE',
+                        help="print the artist/track parsed from each title as JSON and exit "
+                             "('-' reads titles from stdin, one per line); needs no credentials")
+    args = parser.parse_args()
+    
+    if args.parse:
+        titles = [line.rstrip('\n') for line in sys.stdin] if args.parse == ['-'] else args.parse
+        for title in titles:
+            print(json.dumps({'title': title, 'parsed': parse_title(title)}, default=dict))
+        sys.exit(0)
+    
+    configure_logging()
+    if args.record:
+        import tempfile
+        from replay import Recorder
+        config = Config()
+        config.cache_path = os.path.join(tempfile.mkdtemp(prefix='record-'), 'cache.db')
+        sync = OverloadSpotifySync(config=config)
+        recorder = Recorder(sync)
+        try:
+            sync.run(use_async=args.use_async)
+        finally:
+            recorder.save(args.record)
+    else:
+        sync = OverloadSpotifySync()
+        sync.run(use_async=args.use_async)
@@ -0,0 +1,156 @@
+"""
+Compiled regular expressions shared by the title parser and track matcher
+
+Everything is compiled once at import time. Lists of alternatives that are
+only ever tested for "does any of these match" (or stripped in one pass) are
+merged into a single alternation so each check is one regex scan instead of
+one per pattern.
+"""
+
+import re
+
+
+def _any_of(patterns, flags=0, anchor=''):
+    """Combine patterns into one non-capturing alternation"""
+    alternatives = '|'.join(f'(?:{pattern})' for pattern in patterns)
+    return re.compile(f'{anchor}(?:{alternatives})', flags)
+
+
+# Artist/track title layouts, tried in order with re.match on the cleaned title
+ARTIST_TRACK_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^(.+?)\s*[-–—]\s*(.+)$',           # Artist - Track
+    r'^(.+?)\s*:\s*(.+)$',               # Artist: Track
+    r'^(.+?)\s+by\s+(.+)$',              # Track by Artist
+    r'^\[(.+?)\]\s*(.+)$',               # [Artist] Track
+    r'^(.+?)\s*\|\s*(.+)$',              # Artist | Track
+    r'^(.+?)\s*"(.+?)"',                 # Artist "Track"
+))
+
+# Bandcamp post titles never use the quoted-track layout
+BANDCAMP_TITLE_PATTERNS = ARTIST_TRACK_PATTERNS[:5]
+
+# Remix credits, tried in order (a false positive falls through to the next)
+REMIX_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    # (Remixer Remix) - but not if remixer contains "not"
+    r'\((.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)\)',
+    # [Remixer Remix]
+    r'\[(.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)\]',
+    # feat./ft. patterns
+    r'feat\.?\s+(.+?)\s*[\(\[](.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)[\)\]]',
+    r'ft\.?\s+(.+?)\s*[\(\[](.+?)\s+(remix|mix|edit|rework|vip|bootleg|flip)[\)\]]',
+))
+
+# Remix credits stripped before artist/track parsing (applied in sequence)
+REMIX_STRIP_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\s*[\(\[].*?(remix|mix|edit|rework|vip|bootleg|flip).*?[\)\]]',
+    r'\s*[\(\[].*?remix.*?[\)\]]',  # catch variations
+))
+
+# Label/year tags stripped before artist/track parsing
+METADATA_PATTERN = _any_of((
+    r'\s*\[.*?\d{4}.*?\]',    # [Label, 2000] or [2000]
+    r'\s*\(.*?\d{4}.*?\)',    # (Label, 2000) or (2000)
+    r'\s*\[.*?Records.*?\]',  # [Some Records]
+    r'\s*\(.*?Records.*?\)',  # (Some Records)
+    r'\s*\[.*?Label.*?\]',    # [Some Label]
+    r'\s*\(.*?Label.*?\)',    # (Some Label)
+), re.IGNORECASE)
+
+# Titles that are clearly not about a specific track
+NON_MUSIC_PATTERN = _any_of((
+    # Questions and discussions
+    r'\b(what|who|where|when|why|how|does|anyone|any\s+\w+\s+heads)\b',
+    r'\b(question|help|looking\s+for|recommend|suggestion)\b',
+    r'\b(thoughts|opinion|discussion|thread|post)\b',
+
+    # Event announcements
+    r'\b(tonight|today|tomorrow|this\s+weekend|next\s+week)\b',
+    r'\b(event|show|concert|festival|party|club|venue)\b',
+    r'\b(tickets|sold\s+out|presale)\b',
+
+    # Generic/vague titles
+    r'\b(tracks?\s+that|music\s+that|songs?\s+that)\b',
+    r'\b(playlist|mix|set)\s+(for|that|to)\b',
+
+    # Meta/community posts
+    r'\b(this\s+sub|subreddit|community|weekly|daily)\b',
+    r'\b(rules|guidelines|announcement)\b',
+
+    # Descriptive remix posts (not actual remix titles)
+    r'^A\s+\w+[\w\-]*\s+remix\s+of\s+',   # "A house remix of...", "A trip-hop remix of..."
+    r'^An\s+\w+[\w\-]*\s+remix\s+of\s+',  # "An electronic remix of..."
+), re.IGNORECASE)
+
+# Conversational lead-ins in comments ("check out: ...")
+COMMENT_PREFIX_PATTERN = _any_of((
+    r'check\s+out\s*:?\s*',
+    r'listening\s+to\s*:?\s*',
+    r'currently\s+playing\s*:?\s*',
+    r'now\s+playing\s*:?\s*',
+    r'this\s+is\s+good\s*:?\s*',
+    r'recommend\s*:?\s*',
+    r'try\s+this\s*:?\s*',
+), re.IGNORECASE, anchor='^')
+
+URL_PATTERN = re.compile(r'(https?://[^\s\)]+)')
+
+# Spotify link shapes
+SPOTIFY_HIGHLIGHT_PATTERN = re.compile(r'highlight=spotify(?::|%3A)track(?::|%3A)([a-zA-Z0-9]+)')
+SPOTIFY_TRACK_PATTERN = re.compile(r'spotify(?:\.com(?:/intl-[a-z]+)?/|:)track[/:]([a-zA-Z0-9]+)')
+SPOTIFY_ALBUM_PATTERN = re.compile(r'spotify(?:\.com(?:/intl-[a-z]+)?/|:)album[/:]([a-zA-Z0-9]+)')
+
+# "Artist" that is really a label; only existence of a match matters
+LABEL_AS_ARTIST_PATTERN = _any_of((
+    r'^(.+?)\s*[-–—]\s*(.+?)\s*\[(.+?)\]',             # "Artist - Track [Label]"
+    r'^(.+?)\s*[-–—]\s*(.+?)\s*\((.+?)\s*Records?\)',   # "Artist - Track (Label Records)"
+    r'^(.+?)\s*[-–—]\s*(.+?)\s*[-–—]\s*(.+?)$',         # "Artist - Track - Label"
+    r'^(.+?)\s+Records?\s*[-–—]\s*(.+)',                # "Label Records - Track"
+    r'^(.+?)\s+Recordings?\s*[-–—]\s*(.+)',             # "Label Recordings - Track"
+), re.IGNORECASE)
+
+# Artist/track layouts used to recover metadata from the post title, in order
+POST_TITLE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^(.+?)\s*[-–—]\s*(.+?)\s*\[',  # "Artist - Track [anything]"
+    r'^(.+?)\s*[-–—]\s*(.+?)$',      # "Artist - Track"
+))
+TRAILING_BRACKET_PATTERN = re.compile(r'\s*\[.*?\]$')
+TRAILING_PAREN_PATTERN = re.compile(r'\s*\(.*?\)$')
+
+# Matching helpers
+NON_ALPHANUMERIC_PATTERN = re.compile(r'[^a-zA-Z0-9]')
+# Punctuation, spacing and underscores in any script (letters and digits of every script are kept)
+NON_WORD_PATTERN = re.compile(r'[\W_]+', re.UNICODE)
+BRACKETED_CONTENT_PATTERN = re.compile(r'\[.+\]|\(.+\)')
+VERSION_INDICATORS = (
+    'remix', 'mix', 'edit', 'version', 'rework', 'vip', 'bootleg',
+    'extended', 'radio', 'instrumental', 'acapella', 'live',
+    'remaster', 'remastered', 'deluxe', 'special', 'alternate'
+)
+VERSION_SUFFIX_PATTERN = _any_of((
+    r'-\s+(.*?)\s+(version|mix|edit|remix)',   # " - Something Version/Mix"
+    r'-\s+(extended|radio|instrumental|live)',  # " - Extended/Radio/etc"
+    r'-\s+(remaster|remastered|deluxe)',        # " - Remastered/Deluxe"
+    r'\(\s*(.*?)\s*(version|mix|edit)\s*\)',    # "(Something Version)"
+))
+TRACK_VARIATION_PATTERN = _any_of((
+    r'\s*\(\d{4}\)\s*',             # (2022)
+    r'\s*\[\d{4}\]\s*',             # [2022]
+    r'\s*\(remaster\w*\)\s*',
+    r'\s*\(original mix\)\s*',
+    r'\s*\(radio edit\)\s*',
+), re.IGNORECASE)
+
+# Smart quotes normalized before comparing track names
+SMART_QUOTES = str.maketrans({'’': "'", '“': '"', '”': '"'})
+
+# Query terms without field filters or quoting
+QUERY_FIELD_PATTERN = re.compile(r'\b(?:artist|track):|"')
+
+# Bandcamp page markup, matched on raw bytes as the page streams in
+HTML_TITLE_PATTERN = re.compile(rb'<title[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+LD_JSON_SCRIPT_PATTERN = re.compile(
+    rb'<script[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+TITLE_OPEN_PATTERN = re.compile(rb'<title\b', re.IGNORECASE)
+SCRIPT_OPEN_PATTERN = re.compile(rb'<script\b', re.IGNORECASE)
@@ -0,0 +1,158 @@
+"""
+Rate limiting helpers for Overload Spotify Sync
+"""
+
+import threading
+import time
+from typing import Dict
+
+
+class HostRateLimiter:
+    """Enforce a minimum interval between requests to the same host.
+
+    Callers reserve the next free slot for a host under a lock and then sleep
+    outside of it, so concurrent workers hitting the same host are spaced out
+    while workers hitting different hosts never wait on each other.
+    """
+
+    def __init__(self, intervals: Dict[str, float], default_interval: float = 0.0):
+        self.intervals = dict(intervals)
+        self.default_interval = default_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> float:
+        """Block until a request to `host` may be sent; returns seconds waited"""
+        interval = self.intervals.get(host, self.default_interval)
+        if interval <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+
+class TokenBucket:
+    """Token bucket shared by every thread calling one API.
+
+    Tokens refill at `rate` per second up to `capacity`, so short bursts go
+    out immediately while the sustained rate stays at `rate`. As with
+    HostRateLimiter, a caller reserves its token under the lock and sleeps
+    outside of it. pause_for() holds every caller back, e.g. for Retry-After.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            # Nothing refills during a pause; counting starts again when it ends
+            start = max(now, self._paused_until)
+            self._refill(start)
+            # Tokens may go negative: each waiter owns the slot after the one before it
+            self._tokens -= 1
+            delay = (start - now) + max(-self._tokens / self.rate, 0.0)
+
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause_for(self, seconds: float):
+        """Stop handing out tokens for `seconds` from now"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            # The pause isn't followed by a burst of whatever had accumulated
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = self._paused_until
+
+    def _refill(self, now: float):
+        elapsed = max(now - self._updated, 0.0)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = max(self._updated, now)
+
+
+class ThrottledSpotify:
+    """spotipy.Spotify proxy that takes a bucket token before every API call
+
+    A 429 response pauses the shared bucket for the Retry-After the API asked
+    for (so every thread backs off, not just the one that was refused) and the
+    call is retried, up to `max_retries` times. Counters:
+
+      calls               API calls made, including retries
+      throttled           calls that had to wait for a token
+      throttle_seconds    total time spent waiting for tokens
+      rate_limited        429 responses received
+      retry_after_seconds total Retry-After requested by the API
+    """
+
+    DEFAULT_RETRY_AFTER = 1.0
+
+    def __init__(self, client, bucket: TokenBucket, max_retries: int = 3):
+        self.client = client
+        self._bucket = bucket
+        self._max_retries = max_retries
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+        self.rate_limited = 0
+        self.retry_after_seconds = 0.0
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._call(attr, *args, **kwargs)
+        return call
+
+    def _call(self, method, *args, **kwargs):
+        from spotipy.exceptions import SpotifyException
+
+        for attempt in range(self._max_retries + 1):
+            waited = self._bucket.acquire()
+            with self._lock:
+                self.calls += 1
+                if waited > 0:
+                    self.throttled += 1
+                    self.throttle_seconds += waited
+            try:
+                return method(*args, **kwargs)
+            except SpotifyException as e:
+                if e.http_status != 429 or attempt == self._max_retries:
+                    raise
+                retry_after = self._retry_after(e.headers)
+                with self._lock:
+                    self.rate_limited += 1
+                    self.retry_after_seconds += retry_after
+                self._bucket.pause_for(retry_after)
+
+    def _retry_after(self, headers) -> float:
+        try:
+            return max(float((headers or {}).get('Retry-After')), 0.0)
+        except (TypeError, ValueError):
+            return self.DEFAULT_RETRY_AFTER
+
+    def summary(self) -> str:
+        """One-line description of this run's throttling, for the log"""
+        return (f"{self.calls} call(s), {self.throttled} throttled ({self.throttle_seconds:.1f}s waiting), "
+                f"{self.rate_limited} rate-limited ({self.retry_after_seconds:.1f}s Retry-After)")
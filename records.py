@@ -0,0 +1,122 @@
+"""
+Compact records for the posts, comments and parsed tracks a run keeps in memory
+
+Every post, qualifying comment and music_info lives until the playlist is
+updated, so they are __slots__ classes instead of dicts: no per-instance
+hash table, and nothing but the captured fields - in particular no
+reference to the PRAW object (and through it the comment forest) they were
+read from.
+
+They still read and write like the dicts they replace (item['title'],
+item.get('cached'), info['source'] = ..., 'x' in item, update, pop, copy,
+dict(item), equality with a dict), so code and tests that pass plain dicts
+keep working. A field that was never assigned behaves like a missing key;
+assigning a field a record does not have raises KeyError. Records are not
+JSON-serializable themselves: pass `default=dict` to json.dumps.
+"""
+
+from typing import Any, Dict, Iterator, Optional
+
+
+class Record:
+    """Dict-compatible base class; subclasses list their fields in __slots__"""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        self.update(fields)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        delattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__ and hasattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self.__slots__ if hasattr(self, key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (Record, dict)):
+            return dict(self) == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{key}={value!r}" for key, value in self.items())
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self) -> Dict:
+        return dict(self)
+
+    def __setstate__(self, state: Dict):
+        self.update(state)
+
+    def keys(self) -> Iterator[str]:
+        return iter(self)
+
+    def values(self) -> Iterator[Any]:
+        return (getattr(self, key) for key in self)
+
+    def items(self) -> Iterator:
+        return ((key, getattr(self, key)) for key in self)
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: str, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        delattr(self, key)
+        return value
+
+    def update(self, fields=(), **more):
+        for key, value in dict(fields, **more).items():
+            self[key] = value
+
+    def copy(self) -> 'Record':
+        return type(self)(**dict(self))
+
+
+class MusicInfo(Record):
+    """Artist/track parsed from a post, comment or link, plus remix and Spotify details"""
+
+    __slots__ = ('artist', 'track', 'source', 'is_remix', 'remixer', 'remix_type', 'featured_artist',
+                 'original_artist', 'original_track', 'spotify_id', 'spotify_album_id', 'comment_score')
+
+
+class Post(Record):
+    """A qualifying submission, without its PRAW object (see OverloadSpotifySync.thread_submission)"""
+
+    __slots__ = ('title', 'url', 'score', 'id', 'created', 'num_comments', 'embed', 'cached', 'skip_reason')
+
+
+class Comment(Record):
+    """A qualifying discussion-thread comment"""
+
+    __slots__ = ('body', 'score', 'id', 'url', 'parent_post_title', 'parent_post_id', 'cached')
@@ -0,0 +1,479 @@
+"""
+Record/replay of a sync run's external traffic, for offline tests and benchmarks
+
+Recording wraps the clients of a live OverloadSpotifySync and captures what
+they return into a tape:
+
+    reddit    the subreddit listing and a snapshot of every submission seen
+              (discussion candidates with their comments, in walk order)
+    spotify   every Web API call, keyed by method and arguments
+    metadata  each network metadata tier's answer per URL (oEmbed, yt-dlp);
+              the embed tier is served from the submissions' own media
+              blocks, so it runs live on replay rather than being recorded
+    pages     the bytes read from each scraped page (Bandcamp)
+
+plus expected.json, the track ID each post/comment resolved to, which can be
+corrected by hand to make the recording a labeled corpus.
+
+Replay builds an OverloadSpotifySync around fake clients that serve the tape
+(with optional simulated latency) and a throwaway cache, so a run needs no
+credentials or network. Searches the tape has no answer for return no
+results and are counted as misses; other unrecorded calls raise ReplayMiss.
+Playlist writes are collected instead of replayed.
+
+Record:  python overload_spotify_sync.py --record DIR   (a real run: tracks are added)
+Replay:  see benchmarks/bench_replay.py and tests/test_replay.py
+"""
+
+import base64
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from spotipy.exceptions import SpotifyException
+
+from comment_walker import CommentWalker
+from config import Config
+from http_session import HttpResponse
+from media_metadata import TieredMetadataResolver
+from rate_limit import ThrottledSpotify
+
+TAPE_VERSION = 1
+TAPE_FILE = 'tape.json'
+EXPECTED_FILE = 'expected.json'
+
+# Submission attributes read by the sync, snapshotted for every recorded submission
+SUBMISSION_FIELDS = ('id', 'title', 'url', 'score', 'created_utc', 'num_comments', 'is_self', 'link_flair_text',
+                     'media', 'secure_media')
+
+# Metadata tiers answered from data already on the tape
+LOCAL_TIERS = ('embed',)
+
+
+class ReplayMiss(LookupError):
+    """A replayed client was asked for something the tape does not contain"""
+
+
+def call_key(method: str, args, kwargs) -> str:
+    """Stable key for one API call; `next` pages are keyed by their URL"""
+    if method == 'next' and args and isinstance(args[0], dict):
+        args = [args[0].get('next')]
+    return json.dumps([method, list(args), kwargs], sort_keys=True, default=sorted)
+
+
+class Tape:
+    """Recorded responses of one run"""
+
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.recorded_at = data.get('recorded_at', time.time())
+        reddit = data.get('reddit', {})
+        self.listing: List[str] = reddit.get('listing', [])
+        self.submissions: Dict[str, Dict] = reddit.get('submissions', {})
+        self.spotify: Dict[str, Dict] = data.get('spotify', {})
+        self.metadata: Dict[str, Optional[Dict]] = data.get('metadata', {})
+        self.pages: Dict[str, Dict] = data.get('pages', {})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory: str) -> 'Tape':
+        with open(os.path.join(directory, TAPE_FILE), encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != TAPE_VERSION:
+            raise ValueError(f"Unsupported tape version {data.get('version')} in {directory}")
+        return cls(data)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        data = {
+            'version': TAPE_VERSION,
+            'recorded_at': self.recorded_at,
+            'reddit': {'listing': self.listing, 'submissions': self.submissions},
+            'spotify': self.spotify,
+            'metadata': self.metadata,
+            'pages': self.pages,
+        }
+        with open(os.path.join(directory, TAPE_FILE), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+
+    def put(self, section: Dict, key: str, value):
+        with self._lock:
+            section[key] = value
+
+
+def load_expected(directory: str) -> Dict[str, Optional[str]]:
+    with open(os.path.join(directory, EXPECTED_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def capture_resolutions(sync) -> Dict[str, Optional[str]]:
+    """Wrap sync.resolve_post/resolve_comment to collect item key -> track ID"""
+    resolutions = {}
+    resolve_post, resolve_comment = sync.resolve_post, sync.resolve_comment
+
+    def post(item, music_info):
+        track_id = resolve_post(item, music_info)
+        resolutions[f"post:{item['id']}"] = track_id
+        return track_id
+
+    def comment(item, music_info):
+        track_id = resolve_comment(item, music_info)
+        resolutions[f"comment:{item['id']}"] = track_id
+        return track_id
+
+    sync.resolve_post, sync.resolve_comment = post, comment
+    return resolutions
+
+
+def score_resolutions(resolutions: Dict[str, Optional[str]], expected: Dict[str, Optional[str]]) -> Dict:
+    """Match accuracy against a labeled corpus (a None label means "should not resolve")"""
+    wrong = {key: {'expected': want, 'got': resolutions.get(key)}
+             for key, want in expected.items() if resolutions.get(key) != want}
+    labeled = len(expected)
+    return {
+        'labeled': labeled,
+        'correct': labeled - len(wrong),
+        'accuracy': (labeled - len(wrong)) / labeled if labeled else 1.0,
+        'wrong': wrong,
+    }
+
+
+# Recording
+
+class _RecordingSpotify:
+    def __init__(self, client, tape: Tape):
+        self._spotify_client = client
+        self._tape = tape
+
+    def __getattr__(self, name):
+        attr = getattr(self._spotify_client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            key = call_key(name, args, kwargs)
+            try:
+                result = attr(*args, **kwargs)
+            except SpotifyException as e:
+                self._tape.put(self._tape.spotify, key, {'error': {'http_status': e.http_status, 'msg': e.msg}})
+                raise
+            self._tape.put(self._tape.spotify, key, {'result': result})
+            return result
+        return call
+
+
+class _RecordingSubreddit:
+    def __init__(self, subreddit, recorder: 'Recorder'):
+        self._subreddit = subreddit
+        self._recorder = recorder
+
+    def new(self, **kwargs) -> Iterator:
+        for submission in self._subreddit.new(**kwargs):
+            self._recorder.tape.listing.append(submission.id)
+            self._recorder.submissions[submission.id] = submission
+            yield submission
+
+
+class _RecordingReddit:
+    def __init__(self, reddit, recorder: 'Recorder'):
+        self._reddit = reddit
+        self._recorder = recorder
+
+    def subreddit(self, name: str) -> _RecordingSubreddit:
+        return _RecordingSubreddit(self._reddit.subreddit(name), self._recorder)
+
+    def info(self, **kwargs) -> Iterator:
+        for submission in self._reddit.info(**kwargs):
+            self._recorder.submissions[submission.id] = submission
+            yield submission
+
+    def submission(self, id: str):
+        submission = self._reddit.submission(id=id)
+        self._recorder.submissions[id] = submission
+        return submission
+
+
+class Recorder:
+    """Captures a live sync's traffic; call save() after sync.run()
+
+    Construct the sync with an empty cache (see --record) so every item is
+    resolved, and therefore recorded, rather than served from earlier runs.
+    """
+
+    def __init__(self, sync):
+        self.sync = sync
+        self.tape = Tape()
+        self.submissions: Dict[str, object] = {}
+
+        sync.reddit = _RecordingReddit(sync.reddit, self)
+        if isinstance(sync.spotify, ThrottledSpotify):
+            sync.spotify.client = _RecordingSpotify(sync.spotify.client, self.tape)
+        else:
+            sync.spotify = _RecordingSpotify(sync.spotify, self.tape)
+        sync.metadata_resolver.tiers = [(name, fetch if name in LOCAL_TIERS else self._record_tier(name, fetch))
+                                        for name, fetch in sync.metadata_resolver.tiers]
+
+        get_conditional = sync.http.get_conditional
+
+        def record_page(url, *args, **kwargs):
+            response = get_conditional(url, *args, **kwargs)
+            self.tape.put(self.tape.pages, url, {
+                'status': response.status_code,
+                'body': base64.b64encode(response.content).decode('ascii'),
+            })
+            return response
+
+        sync.http.get_conditional = record_page
+        self.resolutions = capture_resolutions(sync)
+
+    def _record_tier(self, name: str, fetch):
+        def record(url, host):
+            result = fetch(url, host)
+            self.tape.put(self.tape.metadata, f"{name} {url}", result)
+            return result
+        return record
+
+    def save(self, directory: str):
+        """Write tape.json and expected.json (the resolutions of this run) to `directory`"""
+        for submission_id, submission in self.submissions.items():
+            snapshot = {field: getattr(submission, field, None) for field in SUBMISSION_FIELDS}
+            snapshot['comments'] = []
+            if self.sync.is_discussion_candidate(submission):
+                snapshot['comments'] = [
+                    {'id': comment.id, 'body': getattr(comment, 'body', ''), 'score': getattr(comment, 'score', 0)}
+                    for comment in CommentWalker(submission)
+                ]
+            self.tape.submissions[submission_id] = snapshot
+
+        self.tape.save(directory)
+        with open(os.path.join(directory, EXPECTED_FILE), 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(self.resolutions.items())), f, indent=1, ensure_ascii=False)
+            f.write('\n')
+
+
+# Replay
+
+class ReplayComment:
+    def __init__(self, snapshot: Dict):
+        self.id = snapshot['id']
+        self.body = snapshot['body']
+        self.score = snapshot['score']
+        self.replies = []
+
+
+class ReplaySubmission:
+    def __init__(self, snapshot: Dict, time_shift: float, reddit: 'ReplayReddit'):
+        for field in SUBMISSION_FIELDS:
+            setattr(self, field, snapshot.get(field))
+        self.created_utc = (self.created_utc or 0) + time_shift
+        self._comments = [ReplayComment(comment) for comment in snapshot.get('comments', [])]
+        self._reddit = reddit
+
+    @property
+    def comments(self) -> List[ReplayComment]:
+        self._reddit._delay()
+        return self._comments
+
+
+class ReplayReddit:
+    """Serves the recorded listing, with timestamps moved so the run looks current"""
+
+    def __init__(self, tape: Tape, latency: float = 0.0):
+        self.latency = latency
+        time_shift = time.time() - tape.recorded_at
+        self._listing = tape.listing
+        self._submissions = {submission_id: ReplaySubmission(snapshot, time_shift, self)
+                             for submission_id, snapshot in tape.submissions.items()}
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def subreddit(self, name: str) -> 'ReplayReddit':
+        return self
+
+    def new(self, limit: Optional[int] = None) -> Iterator[ReplaySubmission]:
+        for i, submission_id in enumerate(self._listing):
+            if limit is not None and i >= limit:
+                return
+            if i % 100 == 0:
+                self._delay()  # one listing page per 100 submissions
+            yield self._submissions[submission_id]
+
+    def info(self, fullnames: List[str]) -> Iterator[ReplaySubmission]:
+        self._delay()
+        for fullname in fullnames:
+            submission = self._submissions.get(fullname.split('_', 1)[-1])
+            if submission:
+                yield submission
+
+    def submission(self, id: str) -> ReplaySubmission:
+        # Loading is lazy: the request is paid for when the comments are read
+        return self._submissions[id]
+
+
+class ReplaySpotify:
+    """Serves recorded Web API responses; playlist additions are collected in `added`"""
+
+    # Several-items lookups and the response field holding their items
+    BATCH_LOOKUPS = {'tracks': 'tracks', 'albums': 'albums'}
+
+    def __init__(self, tape: Tape, latency: float = 0.0):
+        self._tape = tape
+        self.latency = latency
+        self.added: List[str] = []
+        self.misses: List[str] = []
+        self._lock = threading.Lock()
+
+        # How IDs are grouped into batches depends on timing (--async), so index them singly
+        self._by_id: Dict[str, Dict] = {method: {} for method in self.BATCH_LOOKUPS}
+        for key, entry in tape.spotify.items():
+            method = json.loads(key)[0]
+            if method in self.BATCH_LOOKUPS and 'result' in entry:
+                for item in entry['result'][self.BATCH_LOOKUPS[method]]:
+                    if item:
+                        self._by_id[method][item['id']] = item
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self._replay(name, args, kwargs)
+        return call
+
+    def playlist_add_items(self, playlist_id: str, items: List[str], position: Optional[int] = None) -> Dict:
+        self._delay()
+        with self._lock:
+            self.added.extend(items)
+            return {'snapshot_id': f"replay-{len(self.added)}"}
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _replay(self, method: str, args, kwargs):
+        self._delay()
+        key = call_key(method, args, kwargs)
+        entry = self._tape.spotify.get(key)
+        if entry is None and method in self.BATCH_LOOKUPS and args:
+            items = [self._by_id[method].get(item_id) for item_id in args[0]]
+            if all(items):
+                entry = {'result': {self.BATCH_LOOKUPS[method]: items}}
+        if entry is None:
+            with self._lock:
+                self.misses.append(key)
+            if method == 'search':
+                return {'tracks': {'items': []}}
+            raise ReplayMiss(key)
+        if 'error' in entry:
+            raise SpotifyException(entry['error']['http_status'], -1, entry['error']['msg'])
+        return copy.deepcopy(entry['result'])
+
+
+class ReplayHttp:
+    """Serves recorded page bytes to get_conditional(), chunked like a live response"""
+
+    def __init__(self, tape: Tape, latency: float = 0.0):
+        self._pages = tape.pages
+        self.latency = latency
+        self.fetched = 0
+        self.not_modified = 0
+
+    def get_conditional(self, url: str, headers: Optional[Dict] = None, until=None, chunk_size: int = 16384,
+                        **kwargs) -> HttpResponse:
+        page = self._pages.get(url)
+        if page is None:
+            raise ReplayMiss(url)
+        if self.latency:
+            time.sleep(self.latency)
+        self.fetched += 1
+
+        content = base64.b64decode(page['body'])
+        if until is not None and page['status'] == 200:
+            end = len(content)
+            for start in range(0, len(content), chunk_size):
+                if until(content[start:start + chunk_size]):
+                    end = start + chunk_size
+                    break
+            content = content[:end]
+        return HttpResponse(page['status'], content)
+
+    def get(self, url: str, **kwargs):
+        raise ReplayMiss(url)
+
+    def post(self, url: str, **kwargs):
+        raise ReplayMiss(url)
+
+
+def _replay_tier(tape: Tape, name: str, latency: float):
+    def fetch(url, host):
+        if latency:
+            time.sleep(latency)
+        return tape.metadata.get(f"{name} {url}")
+    return fetch
+
+
+def replay_config(cache_path: str) -> Config:
+    """Config for a replayed run: dummy credentials, a throwaway cache, no report files
+
+    Per-host pacing is switched off; there is no host on the other end to be polite to.
+    """
+    for var in ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET', 'SPOTIFY_CLIENT_ID', 'SPOTIFY_CLIENT_SECRET'):
+        os.environ.setdefault(var, 'replay')
+    config = Config()
+    config.cache_path = cache_path
+    config.host_rate_limits = {host: 0.0 for host in config.host_rate_limits}
+    config.run_report_path = ''
+    config.prometheus_textfile_path = ''
+    return config
+
+
+def replay_sync(tape: Tape, latency: float = 0.0, cache_dir: Optional[str] = None):
+    """OverloadSpotifySync wired to replay `tape`, with an empty cache in `cache_dir`"""
+    from overload_spotify_sync import OverloadSpotifySync
+
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix='replay-')
+    os.makedirs(cache_dir, exist_ok=True)
+    sync = OverloadSpotifySync(
+        config=replay_config(os.path.join(cache_dir, 'cache.db')),
+        reddit=ReplayReddit(tape, latency),
+        spotify=ReplaySpotify(tape, latency)
+    )
+    local_tiers = [(name, fetch) for name, fetch in sync.metadata_resolver.tiers if name in LOCAL_TIERS]
+    tier_names = list(dict.fromkeys(key.split(' ', 1)[0] for key in tape.metadata))
+    sync.metadata_resolver = TieredMetadataResolver(local_tiers + [(name, _replay_tier(tape, name, latency))
+                                                                   for name in tier_names])
+    sync.http = ReplayHttp(tape, latency)
+    return sync
+
+
+class ReplayResult:
+    """Outcome of one replayed run"""
+
+    def __init__(self, seconds: float, resolutions: Dict[str, Optional[str]], added: List[str],
+                 misses: List[str], report: Dict):
+        self.seconds = seconds
+        self.resolutions = resolutions
+        self.added = added
+        self.misses = misses
+        self.report = report
+
+
+def replay_run(directory: str, latency: float = 0.0, use_async: bool = False,
+               cache_dir: Optional[str] = None) -> ReplayResult:
+    """Replay the tape in `directory` through a full sync.run()"""
+    sync = replay_sync(Tape.load(directory), latency, cache_dir)
+    resolutions = capture_resolutions(sync)
+
+    start = time.perf_counter()
+    sync.run(use_async=use_async)
+    seconds = time.perf_counter() - start
+
+    report = sync.build_run_report('ok', 'async' if use_async else 'serial')
+    return ReplayResult(seconds, resolutions, sync.spotify.added, sync.spotify.misses, report)
@@ -0,0 +1,513 @@
+"""
+Persistent on-disk caches for Overload Spotify Sync
+
+All stores share a single SQLite file so that one artifact carries the sync
+state between daily runs (locally or via the GitHub Actions cache).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = {'si', 'feature', 'fbclid', 'gclid', 'ref', 'from', 'context', 'nd', 'pp'}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a music link so the same track shared differently maps to one key"""
+    if not url:
+        return ''
+
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    for prefix in ('www.', 'm.', 'music.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    path = parsed.path.rstrip('/')
+    query = [(k, v) for k, v in parse_qsl(parsed.query)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith('utm_')]
+
+    # Collapse the different YouTube URL shapes onto the video ID
+    if host == 'youtu.be' and path:
+        return f"youtube:{path.lstrip('/')}"
+    if host == 'youtube.com':
+        video_id = dict(query).get('v')
+        if video_id:
+            return f"youtube:{video_id}"
+
+    return urlunparse(('https', host, path, '', urlencode(sorted(query)), ''))
+
+
+class SQLiteStore:
+    """Base class for stores living in the shared cache database"""
+
+    schema = ''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(self.schema)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResolutionCache(SQLiteStore):
+    """Maps post/comment IDs and normalized URLs to their resolved metadata
+
+    Positive results (a Spotify track ID was found) are kept indefinitely.
+    Negative results - extraction failed or no confident Spotify match - expire
+    after `negative_ttl` seconds so they get retried as Spotify's catalogue grows.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS resolutions (
+            key TEXT PRIMARY KEY,
+            music_info TEXT,
+            track_id TEXT,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, negative_ttl: float = 24 * 3600):
+        super().__init__(path)
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _keys(self, item_key: str, url: str):
+        keys = [f"item:{item_key}"]
+        normalized = normalize_url(url)
+        if normalized:
+            keys.append(f"url:{normalized}")
+        return keys
+
+    def lookup(self, item_key: str, url: str = '') -> Optional[Dict]:
+        """Return {'music_info', 'track_id'} for a previously resolved item, or None"""
+        now = time.time()
+        with self._lock:
+            for key in self._keys(item_key, url):
+                row = self._conn.execute(
+                    "SELECT music_info, track_id, updated_at FROM resolutions WHERE key = ?", (key,)
+                ).fetchone()
+                if not row:
+                    continue
+
+                music_info, track_id, updated_at = row
+                if not track_id and now - updated_at > self.negative_ttl:
+                    continue
+
+                self.hits += 1
+                return {
+                    'music_info': json.loads(music_info) if music_info else None,
+                    'track_id': track_id,
+                }
+
+        self.misses += 1
+        return None
+
+    def store(self, item_key: str, url: str, music_info: Optional[Dict], track_id: Optional[str]):
+        """Record the outcome of resolving an item (including "not found")"""
+        payload = json.dumps(music_info, default=dict) if music_info else None
+        now = time.time()
+        with self._lock, self._conn:
+            for key in self._keys(item_key, url):
+                # Never let a failed lookup overwrite a known-good URL mapping
+                if not track_id and key.startswith('url:'):
+                    existing = self._conn.execute(
+                        "SELECT track_id FROM resolutions WHERE key = ?", (key,)
+                    ).fetchone()
+                    if existing and existing[0]:
+                        continue
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO resolutions (key, music_info, track_id, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, payload, track_id, now)
+                )
+
+
+class IngestionState(SQLiteStore):
+    """Tracks which subreddit submissions have been seen and whether they qualified
+
+    The newest submission seen is the high-water mark: the next run only pages
+    through the listing until it reaches it. Submissions still inside the time
+    window are remembered so their scores can be refreshed in bulk.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS reddit_posts (
+            id TEXT PRIMARY KEY,
+            created_utc REAL NOT NULL,
+            score INTEGER NOT NULL,
+            qualified INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sync_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def high_water_mark(self) -> Optional[Dict]:
+        """Return {'id', 'created_utc'} of the newest submission seen so far"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM sync_meta WHERE key = 'reddit_high_water_mark'"
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_high_water_mark(self, submission_id: str, created_utc: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('reddit_high_water_mark', ?)",
+                (json.dumps({'id': submission_id, 'created_utc': created_utc}),)
+            )
+
+    def record_post(self, submission_id: str, created_utc: float, score: int, qualified: bool):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reddit_posts (id, created_utc, score, qualified) VALUES (?, ?, ?, ?)",
+                (submission_id, created_utc, score, int(qualified))
+            )
+
+    def tracked_posts(self, cutoff_utc: float) -> Dict[str, bool]:
+        """Map of submission ID -> qualified flag for posts created after `cutoff_utc`"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, qualified FROM reddit_posts WHERE created_utc >= ?", (cutoff_utc,)
+            ).fetchall()
+        return {submission_id: bool(qualified) for submission_id, qualified in rows}
+
+    def prune(self, cutoff_utc: float):
+        """Forget submissions that have left the time window"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reddit_posts WHERE created_utc < ?", (cutoff_utc,))
+
+
+class PlaylistIndex(SQLiteStore):
+    """Local copy of a playlist's track IDs, tagged with the snapshot_id it reflects"""
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS playlist_snapshots (
+            playlist_id TEXT PRIMARY KEY,
+            snapshot_id TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS playlist_tracks (
+            playlist_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            track_id TEXT,
+            PRIMARY KEY (playlist_id, position)
+        );
+    """
+
+    def get(self, playlist_id: str) -> Optional[Dict]:
+        """Return {'snapshot_id', 'track_ids'} (in playlist order), or None if never indexed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snapshot_id FROM playlist_snapshots WHERE playlist_id = ?", (playlist_id,)
+            ).fetchone()
+            if not row:
+                return None
+            track_ids = [track_id for (track_id,) in self._conn.execute(
+                "SELECT track_id FROM playlist_tracks WHERE playlist_id = ? ORDER BY position", (playlist_id,)
+            )]
+        return {'snapshot_id': row[0], 'track_ids': track_ids}
+
+    def replace(self, playlist_id: str, snapshot_id: str, track_ids: List[Optional[str]]):
+        """Overwrite the index with a full listing of the playlist"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+            self._insert(playlist_id, snapshot_id, 0, track_ids)
+
+    def append(self, playlist_id: str, snapshot_id: str, track_ids: List[Optional[str]]):
+        """Record tracks added to the end of the playlist and the resulting snapshot"""
+        with self._lock, self._conn:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,)
+            ).fetchone()
+            self._insert(playlist_id, snapshot_id, count, track_ids)
+
+    def _insert(self, playlist_id: str, snapshot_id: str, start: int, track_ids: List[Optional[str]]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO playlist_tracks (playlist_id, position, track_id) VALUES (?, ?, ?)",
+            [(playlist_id, start + offset, track_id) for offset, track_id in enumerate(track_ids)]
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO playlist_snapshots (playlist_id, snapshot_id) VALUES (?, ?)",
+            (playlist_id, snapshot_id)
+        )
+
+
+class SearchCache(SQLiteStore):
+    """Memoizes Spotify search responses in an in-memory LRU backed by SQLite
+
+    Entries are keyed on the normalized query string plus type and limit and
+    expire after `ttl` seconds in both tiers. Searches that found nothing are
+    only kept in memory, for `negative_ttl` seconds, so they are retried on the
+    same schedule as negative resolutions in ResolutionCache. Concurrent
+    callers asking for a query that is already being fetched wait for that
+    request instead of sending their own, so a run never issues the same
+    search twice.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS search_results (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_memory_entries: int = 1024,
+                 negative_ttl: float = 24 * 3600):
+        super().__init__(path)
+        self.ttl = ttl
+        self.negative_ttl = min(negative_ttl, ttl)
+        self.max_memory_entries = max_memory_entries
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.in_flight_joins = 0
+
+    @staticmethod
+    def make_key(query: str, search_type: str, limit: int) -> str:
+        normalized = ' '.join(query.lower().split())
+        return f"{search_type}|{limit}|{normalized}"
+
+    def get_or_fetch(self, query: str, search_type: str, limit: int, fetch: Callable[[], Dict]) -> Dict:
+        """Return the cached response for a search, calling `fetch()` only on a miss"""
+        key = self.make_key(query, search_type, limit)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] <= self._ttl_for(entry[0]):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+
+            row = self._conn.execute(
+                "SELECT response, updated_at FROM search_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl:
+                response = json.loads(row[0])
+                self._remember(key, response, row[1])
+                self.disk_hits += 1
+                return response
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = Future()
+                self._in_flight[key] = pending
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.in_flight_joins += 1
+
+        if not owner:
+            return pending.result()
+
+        try:
+            response = fetch()
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            pending.set_exception(e)
+            raise
+
+        fetched_at = time.time()
+        with self._lock, self._conn:
+            self._remember(key, response, fetched_at)
+            if response['tracks']['items']:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_results (key, response, updated_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(response), fetched_at)
+                )
+            else:
+                # Drop a stale hit this empty result replaces
+                self._conn.execute("DELETE FROM search_results WHERE key = ?", (key,))
+            del self._in_flight[key]
+        pending.set_result(response)
+        return response
+
+    def _ttl_for(self, response: Dict) -> float:
+        return self.ttl if response['tracks']['items'] else self.negative_ttl
+
+    def _remember(self, key: str, response: Dict, fetched_at: float):
+        self._memory[key] = (response, fetched_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def prune(self):
+        """Drop expired entries from disk"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM search_results WHERE updated_at < ?", (time.time() - self.ttl,))
+
+
+class HttpCache(SQLiteStore):
+    """Response bodies and their validators (ETag / Last-Modified) for conditional GETs
+
+    Entries that have not been fetched or revalidated within `ttl` seconds
+    are dropped by prune().
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600):
+        super().__init__(path)
+        self.ttl = ttl
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return {'etag', 'last_modified', 'body'} for a cached URL, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'body': bytes(row[2])}
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, time.time())
+            )
+
+    def touch(self, url: str):
+        """Mark a cached entry as revalidated"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE http_cache SET updated_at = ? WHERE url = ?", (time.time(), url))
+
+    def prune(self):
+        """Drop entries not revalidated within the TTL"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM http_cache WHERE updated_at < ?", (time.time() - self.ttl,))
+
+
+class BackfillQueue(SQLiteStore):
+    """Posts and comments imported from a Reddit archive, waiting to reach the playlist
+
+    Items move from 'pending' to 'matched' (a Spotify track was found) or
+    'unmatched', and matched items to 'added' once their track has been
+    pushed. During an import, comments wait in 'held' until their thread is
+    known to be a discussion thread, then are released to 'pending' or
+    discarded. Every transition is committed as it happens and re-importing a
+    dump leaves known items alone, so an interrupted import or backfill picks
+    up where it stopped.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS backfill_items (
+            key TEXT PRIMARY KEY,
+            created_utc REAL NOT NULL,
+            item TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            track_id TEXT,
+            thread_id TEXT
+        );
+        CREATE INDEX IF NOT EXISTS backfill_items_state ON backfill_items (state, created_utc);
+        CREATE INDEX IF NOT EXISTS backfill_items_held ON backfill_items (thread_id) WHERE state = 'held';
+    """
+
+    def enqueue(self, items: List[Dict]) -> int:
+        """Queue items (each with 'key' and 'created_utc'); returns how many were not already known"""
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO backfill_items (key, created_utc, item) VALUES (?, ?, ?)",
+                [(item['key'], item['created_utc'], json.dumps(item, default=dict)) for item in items]
+            )
+            return self._conn.total_changes - before
+
+    def hold(self, comments: List[Dict]) -> int:
+        """Store comments (each with 'parent_post_id') as 'held' until their thread is decided
+
+        Returns how many were not already known; comments queued by an
+        earlier import are left as they are.
+        """
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO backfill_items (key, created_utc, item, state, thread_id) "
+                "VALUES (?, ?, ?, 'held', ?)",
+                [(comment['key'], comment['created_utc'], json.dumps(comment, default=dict), comment['parent_post_id'])
+                 for comment in comments]
+            )
+            return self._conn.total_changes - before
+
+    def held_threads(self) -> List[str]:
+        """IDs of the threads that have held comments"""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT thread_id FROM backfill_items WHERE state = 'held'").fetchall()
+        return [thread_id for (thread_id,) in rows]
+
+    def release(self, thread_id: str, fields: Dict) -> int:
+        """Queue a thread's held comments with `fields` added to each; returns how many"""
+        paths = ', '.join("'$.' || ?, ?" for _ in fields)
+        params = [value for field, value in fields.items() for value in (field, value)]
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"UPDATE backfill_items SET state = 'pending', item = json_set(item, {paths}) "
+                "WHERE state = 'held' AND thread_id = ?",
+                params + [thread_id]
+            ).rowcount
+
+    def discard_held(self) -> int:
+        """Drop every comment still held (its thread is not a discussion thread); returns how many"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM backfill_items WHERE state = 'held'").rowcount
+
+    def pending(self, limit: int) -> List[Dict]:
+        """The `limit` oldest items not resolved yet"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item FROM backfill_items WHERE state = 'pending' ORDER BY created_utc, key LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [json.loads(item) for (item,) in rows]
+
+    def mark_resolved(self, key: str, track_id: Optional[str]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE backfill_items SET state = ?, track_id = ? WHERE key = ?",
+                ('matched' if track_id else 'unmatched', track_id, key)
+            )
+
+    def matched(self) -> List[Tuple[str, str]]:
+        """(key, track_id) of items whose track is found but not pushed yet, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, track_id FROM backfill_items WHERE state = 'matched' ORDER BY created_utc, key"
+            ).fetchall()
+
+    def mark_added(self, keys: List[str]):
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE backfill_items SET state = 'added' WHERE key = ?", [(key,) for key in keys])
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items in each state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM backfill_items GROUP BY state").fetchall()
+        return dict(rows)
@@ -0,0 +1,153 @@
+"""
+Shared fixtures for tests that exercise OverloadSpotifySync without live credentials
+"""
+
+import copy
+import time
+import weakref
+
+import pytest
+
+from config import Config
+from overload_spotify_sync import OverloadSpotifySync
+from media_metadata import OEmbedClient, TieredMetadataResolver
+from records import Post
+
+class FakeSpotify:
+    """Spotify Web API stand-in: an artist/track search finds one track named after the query
+
+    Track IDs are "Artist:Track". Searches for an artist in `missing`, or
+    without both an artist and a track, find nothing. Every query is recorded;
+    the playlist only ever grows.
+    """
+
+    def __init__(self):
+        self.missing = set()
+        self.queries = []
+        self.searches = {}
+        self.track_ids = []
+        self.adds = []
+
+    def search(self, q, type, limit):
+        self.queries.append(q)
+        parts = q.split('"')
+        if len(parts) < 5 or parts[1] in self.missing:
+            return {'tracks': {'items': []}}
+        artist, track = parts[1], parts[3]
+        track_id = f"{artist}:{track}"
+        self.searches[track_id] = self.searches.get(track_id, 0) + 1
+        return {'tracks': {'items': [{'id': track_id, 'name': track, 'artists': [{'name': artist}]}]}}
+
+    def tracks(self, ids):
+        return {'tracks': [{'id': i, 'name': f"Linked {i}", 'artists': [{'name': f"Artist {i}"}]} for i in ids]}
+
+    def playlist(self, playlist_id, fields=None):
+        return {'name': 'test', 'snapshot_id': f"snap{len(self.adds)}", 'tracks': {'total': len(self.track_ids)}}
+
+    def playlist_items(self, playlist_id, fields=None, offset=0, additional_types=None):
+        return {'items': [{'track': {'id': tid}} for tid in self.track_ids[offset:]], 'next': None}
+
+    def playlist_add_items(self, playlist_id, items):
+        self.adds.append(list(items))
+        self.track_ids.extend(items)
+        return {'snapshot_id': f"snap{len(self.adds)}"}
+
+class FakeComment:
+    def __init__(self, comment_id, body, score=5):
+        self.id = comment_id
+        self.body = body
+        self.score = score
+        self.replies = []
+
+class FakeSubmission:
+    """The fields of a PRAW Submission a run reads; link posts when given a `url`"""
+
+    def __init__(self, submission_id, title, url=None, score=40, comments=(), flair=None):
+        self.id = submission_id
+        self.title = title
+        self.url = url or f"https://www.reddit.com/r/theoverload/comments/{submission_id}/"
+        self.is_self = url is None
+        self.score = score
+        self.created_utc = time.time() - 3600
+        self.link_flair_text = flair
+        self.comments = list(comments)
+        self.num_comments = len(self.comments)
+
+class FakeReddit:
+    """r/theoverload: a listing of fresh objects, as PRAW returns, plus lazy fetches by ID"""
+
+    def __init__(self):
+        self.submissions = {}
+        # Weak references to every listed submission, and the IDs fetched again
+        self.listed = []
+        self.fetched = []
+
+    def add(self, submission_id, title, comments=(), **fields):
+        """Add a submission; `comments` are comment objects or (id, body) / (id, body, score) tuples"""
+        comments = [FakeComment(*c) if isinstance(c, tuple) else c for c in comments]
+        submission = FakeSubmission(submission_id, title, comments=comments, **fields)
+        self.submissions[submission_id] = submission
+        return submission
+
+    def post(self, submission_id, **fields):
+        """The Post record a run keeps for an added submission, with `fields` overridden"""
+        submission = self.submissions[submission_id]
+        return Post(**dict({
+            'title': submission.title, 'url': submission.url, 'score': submission.score, 'id': submission.id,
+            'num_comments': submission.num_comments, 'cached': None,
+        }, **fields))
+
+    def subreddit(self, name):
+        return self
+
+    def new(self, limit=None):
+        for submission in list(self.submissions.values()):
+            listed = copy.copy(submission)
+            self.listed.append(weakref.ref(listed))
+            yield listed
+
+    def submission(self, id):
+        self.fetched.append(id)
+        return copy.copy(self.submissions[id])
+
+@pytest.fixture
+def make_offline_sync(tmp_path, monkeypatch):
+    """Builds OverloadSpotifySyncs as a run does, with dummy credentials and no API clients attached
+
+    Each call with a different `name` gets its own cache (tmp_path/<name>.db),
+    so independent syncs share nothing. The run report lives in tmp_path and
+    per-host pacing is off.
+    """
+    for var in ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET', 'SPOTIFY_CLIENT_ID', 'SPOTIFY_CLIENT_SECRET'):
+        monkeypatch.setenv(var, 'test')
+    for var in ('YOUTUBE_MIN_INTERVAL', 'SOUNDCLOUD_MIN_INTERVAL', 'BANDCAMP_MIN_INTERVAL'):
+        monkeypatch.setenv(var, '0')
+    monkeypatch.setenv('RUN_REPORT_PATH', str(tmp_path / 'run_report.json'))
+    monkeypatch.setenv('PROMETHEUS_TEXTFILE_PATH', '')
+    monkeypatch.setenv('YTDLP_WORKERS', '1')
+
+    def make(name='cache'):
+        monkeypatch.setenv('SYNC_CACHE_PATH', str(tmp_path / f"{name}.db"))
+        sync = OverloadSpotifySync(config=Config())
+        # No network in tests: the oEmbed tier has no endpoints unless a test supplies them
+        sync.metadata_resolver = TieredMetadataResolver([
+            (tier, OEmbedClient(endpoints={}).fetch if tier == 'oembed' else fetch)
+            for tier, fetch in sync.metadata_resolver.tiers
+        ])
+        return sync
+    return make
+
+@pytest.fixture
+def offline_sync(make_offline_sync):
+    """An offline sync with its cache in tmp_path/cache.db; tests assign fake `reddit` / `spotify` clients"""
+    return make_offline_sync()
+
+@pytest.fixture
+def fake_spotify():
+    """A FakeSpotify; tests attach it with `offline_sync.spotify = fake_spotify`"""
+    return FakeSpotify()
+
+@pytest.fixture
+def fake_reddit():
+    """An empty FakeReddit; tests add the submissions they need"""
+    return FakeReddit()
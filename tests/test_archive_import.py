@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test importing a Reddit archive dump into the backfill queue and pushing it in bounded batches
+"""
+
+import json
+
+import pytest
+
+from archive_import import ArchiveImporter, backfill, open_dump, read_batches
+from sync_cache import BackfillQueue
+
+DAY = 86400
+NOW = 1_760_000_000
+
+def submission(post_id, title, age_days, score=10, url=None, **fields):
+    return dict(fields, id=post_id, title=title, subreddit='theoverload', score=score,
+                created_utc=NOW - age_days * DAY, url=url or f"https://www.reddit.com/r/theoverload/comments/{post_id}/",
+                is_self=url is None)
+
+def comment(comment_id, thread_id, body, score=5):
+    return {'id': comment_id, 'link_id': f"t3_{thread_id}", 'subreddit': 'theoverload', 'body': body,
+            'score': score, 'created_utc': NOW - DAY}
+
+def write_dumps(tmp_path):
+    submissions = [submission(f"p{i}", f"Artist {i} - Track {i}", age_days=i + 1) for i in range(12)] + [
+        submission('yt', 'check this', 3, url='https://www.youtube.com/watch?v=abc',
+                   media={'type': 'youtube.com', 'oembed': {'title': 'Kode9 - Black Sun', 'author_name': 'hyperdub'}}),
+        submission('old', 'Burial - Archangel', 400),
+        submission('low', 'Burial - Untrue', 2, score=1),
+        submission('question', 'Anyone going to the party tonight?', 2),
+        dict(submission('other', 'Four Tet - Baby', 2), subreddit='electronicmusic'),
+        submission('thread', 'What are you listening to this week?', 1, num_comments=30),
+        submission('chat', 'Burial - Near Dark', 1, num_comments=30),
+    ]
+    comments = ([comment(f"t{i}", 'thread', f"Comment Artist {i} - Comment Track {i}") for i in range(25)]
+                + [comment('t-low', 'thread', 'Low Artist - Low Track', score=1)]
+                + [comment(f"c{i}", 'chat', 'great tune, thanks for sharing') for i in range(25)])
+    submissions_path = tmp_path / 'theoverload_submissions.ndjson'
+    comments_path = tmp_path / 'theoverload_comments.ndjson'
+    submissions_path.write_text('\n'.join(json.dumps(s) for s in submissions) + '\nnot json\n')
+    comments_path.write_text('\n'.join(json.dumps(c) for c in comments) + '\n')
+    # Comments first: threads are decided once every dump has been read
+    return [str(comments_path), str(submissions_path)]
+
+def import_dumps(tmp_path, queue, workers):
+    importer = ArchiveImporter(queue, since_utc=NOW - 90 * DAY, until_utc=NOW, workers=workers, batch_lines=4)
+    return importer.run(write_dumps(tmp_path))
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_import_queues_candidates(tmp_path, workers):
+    queue = BackfillQueue(str(tmp_path / 'cache.db'))
+    stats = import_dumps(tmp_path, queue, workers)
+
+    # 12 titled posts, the YouTube post and the chat thread's own title; 25 comments from the one discussion thread
+    assert stats['posts.queued'] == 14 and stats['comments.queued'] == 25
+    assert stats['threads.discussion'] == 1 and stats['skipped.non-music title'] == 2
+    assert queue.counts() == {'pending': 39}
+
+    items = {item['key']: item for item in queue.pending(100)}
+    assert items['post:p0']['music_info']['artist'] == 'Artist 0'
+    assert items['post:yt']['music_info'] is None and items['post:yt']['embed']
+    assert items['comment:t3']['music_info']['source'] == 'comment_text'
+    assert items['comment:t3']['parent_post_title'] == 'What are you listening to this week?'
+
+    # Re-importing the same dumps queues nothing new
+    assert import_dumps(tmp_path, queue, workers)['posts.queued'] == 0
+    assert queue.counts() == {'pending': 39}
+
+def test_comments_held_in_database(tmp_path):
+    queue = BackfillQueue(str(tmp_path / 'cache.db'))
+    comments_path, submissions_path = write_dumps(tmp_path)
+
+    # Interrupted after the comment dump: its candidates wait in the database, not in the importer
+    importer = ArchiveImporter(queue, since_utc=NOW - 90 * DAY, until_utc=NOW, workers=1, batch_lines=4)
+    for records, density in importer.parse_batches(read_batches(comments_path, 4)):
+        importer.add(records, density)
+    assert queue.counts() == {'held': 50}
+    assert sorted(queue.held_threads()) == ['chat', 'thread']
+
+    # A fresh import releases the discussion thread's comments and drops the chat thread's
+    stats = import_dumps(tmp_path, queue, workers=1)
+    assert stats['comments.queued'] == 25 and stats['threads.discussion'] == 1
+    assert queue.counts() == {'pending': 39}
+
+def test_backfill_in_bounded_batches(offline_sync, fake_spotify, tmp_path):
+    offline_sync.spotify = spotify = fake_spotify
+    queue = BackfillQueue(offline_sync.config.cache_path)
+    import_dumps(tmp_path, queue, workers=1)
+
+    # Oldest first, never more than one batch per call
+    pushed = backfill(offline_sync, queue, batch_size=10)
+    assert pushed[0] == 'Artist 11:Track 11' and len(pushed) == 10
+    assert spotify.adds == [pushed]
+    # Resolution stopped once a batch was waiting
+    assert queue.counts()['pending'] == 29
+
+    # Resuming with a fresh queue object picks up where the last call stopped
+    queue = BackfillQueue(offline_sync.config.cache_path)
+    while backfill(offline_sync, queue, batch_size=10):
+        pass
+    assert queue.counts() == {'added': 39}
+    assert 'Kode9:Black Sun' in spotify.track_ids and len(spotify.track_ids) == len(set(spotify.track_ids)) == 39
+    assert all(len(batch) <= 10 for batch in spotify.adds)
+    # The embed answered the YouTube post without a metadata lookup
+    assert offline_sync.metadata_resolver.stats['oembed']['attempts'] == 0
+
+def test_zstd_dump(tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    path = tmp_path / 'dump.zst'
+    path.write_bytes(zstandard.ZstdCompressor().compress(b'{"id": "a"}\n{"id": "b"}\n'))
+    with open_dump(str(path)) as dump:
+        assert [json.loads(line)['id'] for line in dump] == ['a', 'b']
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
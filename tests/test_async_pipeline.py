@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test that the --async pipeline adds exactly the tracks the serial path does
+"""
+
+import asyncio
+
+import pytest
+
+from async_pipeline import AsyncPipeline
+from media_metadata import TieredMetadataResolver
+
+def make_posts(reddit):
+    posts = []
+    for i in range(12):
+        if i % 4 == 0:
+            url = f"https://open.spotify.com/track/link{i}"
+        elif i % 4 == 1:
+            url = f"https://www.youtube.com/watch?v=vid{i}"
+        else:
+            url = f"https://www.reddit.com/r/theoverload/comments/p{i}/"
+        reddit.add(f"p{i}", f"Artist {i} - Track {i}" if i != 6 else "Unknown - Unknown", url=url, score=10)
+        posts.append(reddit.post(f"p{i}"))
+    reddit.add('cached', 'Cached Artist - Cached Track', score=10)
+    posts.append(reddit.post('cached', cached={'music_info': None, 'track_id': 'from-cache'}))
+
+    reddit.add('thread', 'Share your tracks', comments=[(f"c{i}", f"Comment Artist {i} - Comment Track {i}")
+                                                         for i in range(25)])
+    posts.append(reddit.post('thread'))
+    return posts
+
+@pytest.fixture
+def pipeline_sync(make_offline_sync, fake_spotify, fake_reddit):
+    """Builds syncs with their own caches, sharing the fake clients"""
+    # Search answers with a track named after the query; "Unknown" finds nothing
+    fake_spotify.missing.add('Unknown')
+
+    def make(name):
+        sync = make_offline_sync(name)
+        sync.spotify = fake_spotify
+        sync.reddit = fake_reddit
+        # YouTube metadata: the video title is the post's artist/track, served without network
+        sync.metadata_resolver = TieredMetadataResolver([
+            ('fake', lambda url, host: {'title': f"Video {url[-1]} - Song {url[-1]}", 'uploader': ''}),
+        ])
+        return sync
+    return make
+
+def test_async_matches_serial(pipeline_sync, fake_reddit):
+    # Separate syncs: the async run must not be answered by the serial run's caches
+    serial_sync, async_sync = pipeline_sync('serial'), pipeline_sync('async')
+    serial = serial_sync.collect_track_ids(make_posts(fake_reddit))
+    concurrent = asyncio.run(AsyncPipeline(async_sync, queue_size=2, resolve_workers=3).run(make_posts(fake_reddit)))
+
+    assert concurrent == serial
+    assert async_sync.search_cache.misses == serial_sync.search_cache.misses > 0
+    assert async_sync.resolution_cache.hits == 0
+    post_ids, comment_ids = serial
+    assert post_ids[:3] == ['link0', 'Video 1:Song 1', 'Artist 2:Track 2'] and post_ids[-1] == 'from-cache'
+    assert 'Unknown:Unknown' not in post_ids
+    assert len(comment_ids) == 25
+
+def test_async_lists_posts_as_first_stage(pipeline_sync, fake_reddit):
+    make_posts(fake_reddit)
+    serial_sync, async_sync = pipeline_sync('serial'), pipeline_sync('async')
+    posts = serial_sync.get_recent_posts()
+    serial = serial_sync.collect_track_ids(posts)
+
+    # The pipeline consumes the lazy listing itself; the mark moves once it is exhausted
+    pipeline = AsyncPipeline(async_sync, queue_size=2, resolve_workers=3)
+    assert asyncio.run(pipeline.run(async_sync.iter_recent_posts())) == serial
+    assert pipeline.counts['post'] == len(posts) == 14
+    assert async_sync.ingestion_state.high_water_mark() == serial_sync.ingestion_state.high_water_mark()
+
+def test_stage_failure_aborts_run(pipeline_sync, fake_reddit):
+    def explode(post, music_info):
+        raise RuntimeError('spotify down')
+
+    sync = pipeline_sync('failure')
+    sync.resolve_post = explode
+    with pytest.raises(RuntimeError):
+        asyncio.run(AsyncPipeline(sync, queue_size=1, resolve_workers=1).run(make_posts(fake_reddit)))
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test streaming ld+json extraction from Bandcamp pages
+"""
+
+import os
+
+import pytest
+
+from media_metadata import BandcampPageScanner, track_from_ld_json
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures', 'bandcamp')
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+def scan(content, chunk_size):
+    scanner = BandcampPageScanner()
+    for start in range(0, len(content), chunk_size):
+        if scanner.feed(content[start:start + chunk_size]):
+            break
+    return scanner
+
+def test_track_page_stops_after_ld_json():
+    content = load('track.html')
+    scanner = scan(content, 16384)
+    assert scanner.metadata() == {'artist': 'Octex', 'track': 'Bubblin', 'via': 'ld+json'}
+    assert scanner.bytes_read < len(content)
+
+def test_album_page_uses_first_track():
+    page = scan(load('album.html'), 16384).metadata()
+    assert page == {'artist': 'Drexciya', 'track': 'Bubble Metropolis', 'via': 'ld+json'}
+
+def test_page_title_fallback():
+    content = load('merch.html')
+    scanner = scan(content, 16384)
+    assert scanner.bytes_read == len(content)
+    assert scanner.metadata() == {'artist': 'Dexter', 'track': 'Dexter - Klakson Merch', 'via': 'title'}
+
+@pytest.mark.parametrize('name', ['track.html', 'album.html', 'merch.html'])
+def test_tags_split_across_chunks(name):
+    content = load(name)
+    assert scan(content, 7).metadata() == scan(content, len(content)).metadata()
+
+def test_full_parser_fallback_for_unrecognised_markup():
+    # No <title> and no ld+json the byte scan can see: BeautifulSoup gets a look
+    content = b'<html><head></head><body><p>Nothing here</p></body></html>'
+    assert scan(content, 16).metadata() is None
+
+def test_ld_json_shapes():
+    assert track_from_ld_json({'@type': ['MusicRecording'], 'name': 'X', 'byArtist': [{'name': 'Y'}]}) == \
+        {'artist': 'Y', 'track': 'X'}
+    assert track_from_ld_json({'@type': 'MusicAlbum', 'name': 'Album'}) is None
+    assert track_from_ld_json([{'@type': 'MusicRecording', 'name': 'X'}]) is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
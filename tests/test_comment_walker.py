@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the streaming comment walker and discussion-thread comment ingestion
+"""
+
+import pytest
+from praw.models import MoreComments
+
+from comment_walker import CommentWalker, TrackDensity
+
+class FakeComment:
+    def __init__(self, comment_id, body, score=5, replies=()):
+        self.id = comment_id
+        self.body = body
+        self.score = score
+        self.replies = list(replies)
+
+class FakeMore(MoreComments):
+    """A "load more comments" stub that records when it is expanded"""
+
+    def __init__(self, comments):
+        self._loaded = comments
+        self.fetches = 0
+
+    def comments(self, update=True):
+        self.fetches += 1
+        return self._loaded
+
+class FakeSubmission:
+    def __init__(self, comments, score=50):
+        self.comments = comments
+        self.num_comments = 100
+        self.score = score
+
+def track(i):
+    return FakeComment(f"t{i}", f"Artist {i} - Track {i}")
+
+def chatter(i):
+    return FakeComment(f"c{i}", f"great thread, thanks number {i}")
+
+def test_walk_order_and_lazy_expansion():
+    more = FakeMore([FakeComment('m1', 'loaded later'), FakeComment('a', 'duplicate')])
+    tree = [FakeComment('a', 'top', replies=[FakeComment('a1', 'reply')]), FakeComment('b', 'top'), more]
+    walker = CommentWalker(FakeSubmission(tree))
+
+    stream = iter(walker)
+    assert [next(stream).id for _ in range(2)] == ['a', 'b']
+    assert more.fetches == 0
+    assert [c.id for c in stream] == ['a1', 'm1']
+    assert more.fetches == 1
+
+def test_expansion_limit():
+    inner = FakeMore([FakeComment('deep', 'x')])
+    outer = FakeMore([FakeComment('m1', 'x'), inner])
+    walker = CommentWalker(FakeSubmission([outer]), max_expansions=1)
+    assert [c.id for c in walker] == ['m1']
+    assert inner.fetches == 0
+
+def test_density_decision():
+    density = TrackDensity(threshold=0.25, min_sample=20)
+    for i in range(19):
+        density.add(f"Artist - Track {i}")
+    assert density.decision() is None  # below minimum sample
+    density.add('Artist - Track')
+    assert density.decision() is True
+
+    density = TrackDensity(threshold=0.25, min_sample=20)
+    for i in range(20):
+        density.add('just chatting')
+    assert density.decision() is False
+
+@pytest.fixture
+def thread_sync(offline_sync, fake_reddit):
+    offline_sync.reddit = fake_reddit
+    return offline_sync
+
+def test_low_density_thread_stops_walking(thread_sync, fake_reddit):
+    more = FakeMore([track(i) for i in range(50)])
+    fake_reddit.add('p1', 'Weekly thread', comments=[chatter(i) for i in range(30)] + [more], score=50)
+
+    assert list(thread_sync.iter_discussion_thread_comments(fake_reddit.post('p1'))) == []
+    assert more.fetches == 0
+
+def test_qualifying_comments_released_once_thread_qualifies(thread_sync, fake_reddit):
+    comments = [track(i) for i in range(20)] + [chatter(i) for i in range(5)]
+    comments.append(FakeComment('low', 'Low - Score', score=0))
+    fake_reddit.add('p2', 'Share your tracks', comments=comments, score=50)
+
+    results = thread_sync.get_comments_from_discussion_threads([fake_reddit.post('p2')])
+    assert [c['id'] for c in results] == [f"t{i}" for i in range(20)] + [f"c{i}" for i in range(5)]
+    assert results[0]['parent_post_id'] == 'p2'
+
+def test_inconclusive_thread_decided_on_full_sample(thread_sync, fake_reddit):
+    # 8 of 25 comments (32%) share tracks: never conclusive, but above 25% at the end
+    fake_reddit.add('p3', 'Mixed', comments=[track(i) for i in range(8)] + [chatter(i) for i in range(17)], score=50)
+    assert len(list(thread_sync.iter_discussion_thread_comments(fake_reddit.post('p3')))) == 25
+
+def test_small_threads_are_not_walked(thread_sync, fake_reddit):
+    submission = fake_reddit.add('p4', 'Low score', comments=[track(i) for i in range(30)], score=2)
+    assert list(thread_sync.iter_discussion_thread_comments(fake_reddit.post('p4'))) == []
+    assert not thread_sync.is_discussion_thread(submission)
+    # Too few votes to be a candidate: not even fetched
+    assert fake_reddit.fetched == []
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test retries and conditional GETs in the shared HTTP session against a local stub server
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_session import HttpClient
+from sync_cache import HttpCache
+
+TRACK_PAGE = b"""<html><head><title>Bubblin | Octex</title>
+<script type="application/ld+json">{"@type": "MusicRecording", "name": "Bubblin", "byArtist": {"name": "Octex"}}</script>
+</head><body>...</body></html>"""
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    log = []
+    failures_left = 0
+
+    def do_GET(self):
+        StubHandler.log.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/flaky' and StubHandler.failures_left:
+            StubHandler.failures_left -= 1
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(TRACK_PAGE)))
+        self.end_headers()
+        self.wfile.write(TRACK_PAGE)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    StubHandler.log = []
+    StubHandler.failures_left = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_revisit_costs_a_304(stub_server, tmp_path):
+    client = HttpClient(cache=HttpCache(str(tmp_path / 'cache.db')))
+    first = client.get_conditional(f"{stub_server}/track/bubblin")
+    second = client.get_conditional(f"{stub_server}/track/bubblin")
+
+    assert first.status_code == second.status_code == 200
+    assert not first.from_cache and second.from_cache
+    assert second.content == TRACK_PAGE
+    assert StubHandler.log == [('/track/bubblin', None), ('/track/bubblin', '"v1"')]
+    assert (client.fetched, client.not_modified) == (1, 1)
+
+def test_retries_on_503_with_retry_after(stub_server):
+    StubHandler.failures_left = 2
+    client = HttpClient(retries=3, backoff_factor=0)
+    response = client.get(f"{stub_server}/flaky")
+    assert response.status_code == 200
+    assert len(StubHandler.log) == 3
+
+def test_gives_up_after_retry_budget(stub_server):
+    StubHandler.failures_left = 5
+    client = HttpClient(retries=1, backoff_factor=0)
+    assert client.get(f"{stub_server}/flaky").status_code == 503
+    assert len(StubHandler.log) == 2
+
+def test_bandcamp_revisit_uses_cached_page(offline_sync, stub_server):
+    url = f"{stub_server}/track/bubblin"
+    first = offline_sync.extract_bandcamp_info(url, 'post title')
+    second = offline_sync.extract_bandcamp_info(url, 'post title')
+    assert first == second
+    assert first['artist'] == 'Octex' and first['track'] == 'Bubblin'
+    assert offline_sync.http.not_modified == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
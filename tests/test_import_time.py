@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Test that importing the sync module and parsing titles stays cheap
+
+Runs in a fresh interpreter (this one has long since imported everything)
+without credentials and in an empty directory.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROBE = """
+import json, sys
+import overload_spotify_sync
+parsed = overload_spotify_sync.parse_title('Burial - Archangel (Four Tet Remix)')
+print(json.dumps({'parsed': parsed, 'modules': sorted(sys.modules)}, default=dict))
+"""
+
+def test_import_defers_clients_and_logging(tmp_path):
+    env = {key: value for key, value in os.environ.items() if not key.startswith(('REDDIT_', 'SPOTIFY_'))}
+    env['PYTHONPATH'] = ROOT
+    completed = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True,
+                               env=env, cwd=str(tmp_path), check=True)
+    result = json.loads(completed.stdout)
+
+    assert result['parsed']['artist'] == 'Burial' and result['parsed']['remixer'] == 'Four Tet'
+    for heavy in ('praw', 'spotipy', 'yt_dlp', 'bs4', 'requests'):
+        assert heavy not in result['modules'], f"{heavy} imported by overload_spotify_sync"
+    # The log file is opened by the CLI / a real sync, not by importing
+    assert not (tmp_path / 'overload_spotify_sync.log').exists()
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
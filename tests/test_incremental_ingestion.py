@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test that post ingestion only lists new submissions and refreshes known ones
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+class FakeSubreddit:
+    def __init__(self, submissions):
+        self.submissions = submissions
+        self.listed = 0
+    
+    def new(self, limit=None):
+        for submission in sorted(self.submissions, key=lambda s: s.created_utc, reverse=True):
+            self.listed += 1
+            yield submission
+
+class FakeReddit:
+    def __init__(self, submissions):
+        self.submissions = {s.id: s for s in submissions}
+        self.sub = FakeSubreddit(submissions)
+        self.info_requests = []
+    
+    def subreddit(self, name):
+        return self.sub
+    
+    def info(self, fullnames):
+        self.info_requests.append(list(fullnames))
+        return [self.submissions[name[3:]] for name in fullnames]
+
+def make_submission(sid, age_hours, score):
+    return SimpleNamespace(id=sid, title=f"Artist - Track {sid}", url=f"https://youtu.be/{sid}",
+                           score=score, created_utc=time.time() - age_hours * 3600)
+
+def test_incremental_ingestion(offline_sync):
+    submissions = [
+        make_submission('old', 24 * 8, 50),     # outside the 7 day window
+        make_submission('a', 48, 10),
+        make_submission('b', 24, 1),            # below MIN_UPVOTES for now
+    ]
+    reddit = FakeReddit(submissions)
+    sync = offline_sync
+    sync.reddit = reddit
+    
+    # First run walks back to the cutoff
+    posts = sync.get_recent_posts()
+    assert [p['id'] for p in posts] == ['a']
+    assert reddit.info_requests == []
+    
+    # Second run: one new post, and 'b' has since gained upvotes
+    submissions.append(make_submission('c', 1, 5))
+    reddit.submissions['c'] = submissions[-1]
+    reddit.submissions['b'].score = 7
+    reddit.sub.listed = 0
+    
+    posts = sync.get_recent_posts()
+    assert [p['id'] for p in posts] == ['c', 'b', 'a']
+    # Listing stopped at the high-water mark instead of re-reading old posts
+    assert reddit.sub.listed == 2
+    # Known posts were refreshed in a single bulk request
+    assert len(reddit.info_requests) == 1
+    assert sorted(reddit.info_requests[0]) == ['t3_a', 't3_b']
+
+def test_high_water_mark_waits_for_recording(offline_sync):
+    submissions = [make_submission('a', 48, 10), make_submission('b', 24, 10)]
+    reddit = FakeReddit(submissions)
+    offline_sync.reddit = reddit
+    
+    record_post = offline_sync.ingestion_state.record_post
+    def fail_on_b(sid, *args):
+        if sid == 'b':
+            raise RuntimeError('interrupted')
+        record_post(sid, *args)
+    offline_sync.ingestion_state.record_post = fail_on_b
+    with pytest.raises(RuntimeError):
+        offline_sync.get_recent_posts()
+    assert offline_sync.ingestion_state.high_water_mark() is None
+    
+    # The next run lists both again
+    offline_sync.ingestion_state.record_post = record_post
+    assert [p['id'] for p in offline_sync.get_recent_posts()] == ['b', 'a']
+    assert offline_sync.ingestion_state.high_water_mark()['id'] == 'b'
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test stage spans, counters and the run report outputs
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from instrumentation import Instrumentation, traced
+
+class Stage:
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+
+    @traced('stage.work')
+    def work(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+    @traced('stage.fail')
+    def fail(self):
+        raise RuntimeError('boom')
+
+def test_spans_and_counters():
+    instrumentation = Instrumentation()
+    stage = Stage(instrumentation)
+
+    assert stage.work(0.02) == 0.02
+    stage.work(0.01)
+    with pytest.raises(RuntimeError):
+        stage.fail()
+
+    threads = [threading.Thread(target=instrumentation.count, args=('calls',)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    instrumentation.add_time('reddit.more_comments', 0.3, count=3)
+    instrumentation.add_time('never', 0.0, count=0)
+
+    report = instrumentation.report(status='ok')
+    assert report['status'] == 'ok'
+    work = report['spans']['stage.work']
+    assert work['count'] == 2 and work['total_seconds'] >= 0.03 and work['max_seconds'] >= 0.02
+    assert report['spans']['stage.fail']['count'] == 1  # recorded even though it raised
+    assert report['spans']['reddit.more_comments']['mean_seconds'] == pytest.approx(0.1)
+    assert 'never' not in report['spans']
+    assert report['counters'] == {'calls': 10}
+
+def test_untraced_without_instrumentation():
+    stage = Stage(None)
+    assert stage.work(0) == 0
+
+def test_report_files(tmp_path):
+    instrumentation = Instrumentation()
+    with instrumentation.span('spotify.search'):
+        pass
+    instrumentation.set('search_cache.memory_hits', 4)
+    report = instrumentation.report(status='ok', mode='serial')
+
+    json_path = tmp_path / 'reports' / 'run_report.json'
+    instrumentation.write_json(str(json_path), report)
+    assert json.loads(json_path.read_text())['counters'] == {'search_cache.memory_hits': 4}
+
+    prom_path = tmp_path / 'overload_sync.prom'
+    instrumentation.write_prometheus(str(prom_path), report)
+    text = prom_path.read_text()
+    print(text)
+    assert 'overload_sync_run_success 1' in text
+    assert 'overload_sync_span_count{span="spotify.search"} 1' in text
+    assert 'overload_sync_search_cache_memory_hits 4' in text
+    assert not list(tmp_path.glob('*.tmp'))
+
+def test_sync_run_report(offline_sync, fake_spotify, tmp_path):
+    offline_sync.spotify = fake_spotify
+
+    for _ in range(3):
+        offline_sync.search_tracks('artist:"Artist" track:"Track"')
+    offline_sync.queries_per_resolution.extend([1, 1, 3])
+    offline_sync.write_run_report('ok', 'serial')
+
+    report = json.loads((tmp_path / 'run_report.json').read_text())
+    assert report['mode'] == 'serial'
+    assert report['spans']['spotify.search']['count'] == 1
+    assert report['counters']['search_cache.misses'] == 1
+    assert report['counters']['search_cache.memory_hits'] == 2
+    assert report['queries_per_resolution'] == {
+        'resolutions': 3, 'total': 5, 'mean': pytest.approx(1.667, abs=1e-3), 'max': 3,
+        'histogram': {'1': 2, '3': 1},
+    }
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the pooled, metadata-only yt-dlp extractor
+"""
+
+import threading
+
+import pytest
+import yt_dlp
+
+from media_metadata import YtDlpMetadataPool
+
+class FakeYoutubeDL:
+    """Stands in for yt_dlp.YoutubeDL; records instances and calls"""
+
+    instances = []
+
+    def __init__(self, options):
+        self.options = options
+        self.calls = []
+        FakeYoutubeDL.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True, process=True, ie_key=None):
+        assert not download and not process
+        self.calls.append(url)
+        if 'broken' in url:
+            raise RuntimeError('extraction failed')
+        if 'shortlink' in url:
+            return {'_type': 'url', 'url': 'https://youtube.com/watch?v=target', 'ie_key': 'Youtube'}
+        return {'title': f" Title of {url.rsplit('=', 1)[-1]} ", 'uploader': 'Uploader'}
+
+@pytest.fixture
+def fake_ytdlp(monkeypatch):
+    FakeYoutubeDL.instances = []
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+    return FakeYoutubeDL
+
+def test_empty_url_never_reaches_ytdlp(fake_ytdlp):
+    pool = YtDlpMetadataPool(workers=2)
+    assert pool.fetch('') is None
+    assert fake_ytdlp.instances == []
+
+def test_instances_are_reused_and_results_memoized(fake_ytdlp):
+    pool = YtDlpMetadataPool(workers=2, batch_size=3)
+    urls = [f"https://youtube.com/watch?v={i}" for i in range(10)]
+    futures = [pool.submit(url, 'youtube') for url in urls + urls]
+    results = [future.result() for future in futures]
+    pool.close()
+
+    assert results[0] == {'title': 'Title of 0', 'uploader': 'Uploader'}
+    assert results[:10] == results[10:]
+    assert len(fake_ytdlp.instances) == 2
+    assert sorted(call for ydl in fake_ytdlp.instances for call in ydl.calls) == sorted(urls)
+    assert pool.lookups == 10
+    assert pool.batches <= 10
+
+def test_workers_take_queued_urls_in_batches(fake_ytdlp):
+    release = threading.Event()
+
+    class SlowYoutubeDL(FakeYoutubeDL):
+        def extract_info(self, url, **kwargs):
+            release.wait(5)
+            return super().extract_info(url, **kwargs)
+
+    yt_dlp.YoutubeDL = SlowYoutubeDL
+    pool = YtDlpMetadataPool(workers=1, batch_size=4)
+    first = pool.submit('https://youtube.com/watch?v=first')
+    rest = [pool.submit(f"https://youtube.com/watch?v={i}") for i in range(4)]
+    release.set()
+    assert all(future.result() for future in [first] + rest)
+    pool.close()
+    # One batch for the first URL, then the four queued behind it together
+    assert pool.batches == 2
+
+def test_failures_and_redirects(fake_ytdlp):
+    pool = YtDlpMetadataPool(workers=1)
+    assert pool.fetch('https://youtube.com/watch?v=broken') is None
+    assert pool.fetch('https://youtu.be/shortlink')['title'] == 'Title of target'
+    pool.close()
+
+def test_extract_from_title_skips_ytdlp(offline_sync, fake_ytdlp):
+    info = offline_sync.extract_from_title('Dexter - Bubblin')
+    assert info['artist'] == 'Dexter' and info['track'] == 'Bubblin'
+    assert fake_ytdlp.instances == []
+
+def test_youtube_title_preferred_over_post_title(offline_sync, fake_ytdlp):
+    info = offline_sync.extract_youtube_info('https://youtube.com/watch?v=Octex - Bubblin', 'some post title')
+    offline_sync.ytdlp_pool.close()
+    assert info['artist'] == 'Title of Octex' and info['track'] == 'Bubblin'
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test the oEmbed -> yt-dlp metadata tiers against a local stub HTTP server
+"""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+import yt_dlp
+
+from media_metadata import (
+    EmbeddedMetadata, OEmbedClient, TieredMetadataResolver, YtDlpMetadataPool, embedded_metadata, is_ambiguous_title,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'metadata')
+
+# Recorded responses by endpoint and the media URL asked about
+ROUTES = {
+    ('/youtube/oembed', 'https://www.youtube.com/watch?v=abc123'): 'youtube_oembed.json',
+    ('/youtube/oembed', 'https://www.youtube.com/watch?v=trunc1'): 'truncated_oembed.json',
+    ('/soundcloud/oembed', 'https://soundcloud.com/octex/bubblin'): 'soundcloud_oembed.json',
+    ('/ytdlp', 'https://www.youtube.com/watch?v=trunc1'): 'ytdlp_info.json',
+    ('/ytdlp', 'https://www.youtube.com/watch?v=noembed'): 'ytdlp_info.json',
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        media_url = parse_qs(parsed.query).get('url', [''])[0]
+        StubHandler.requests_seen.append((parsed.path, media_url))
+        fixture = ROUTES.get((parsed.path, media_url))
+        if not fixture:
+            # YouTube answers 401 for videos with embedding disabled
+            self.send_response(401)
+            self.end_headers()
+            return
+        with open(os.path.join(FIXTURES, fixture), 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    StubHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def resolver(stub_server, monkeypatch):
+    """oEmbed tier and a yt-dlp pool replaying recorded info dicts from the stub server"""
+
+    class RecordedYoutubeDL:
+        def __init__(self, options):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=True, process=True, ie_key=None):
+            response = requests.get(f"{stub_server}/ytdlp", params={'url': url})
+            response.raise_for_status()
+            return response.json()
+
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', RecordedYoutubeDL)
+    oembed = OEmbedClient(endpoints={
+        'youtube': f"{stub_server}/youtube/oembed",
+        'soundcloud': f"{stub_server}/soundcloud/oembed",
+    })
+    pool = YtDlpMetadataPool(workers=1)
+    yield TieredMetadataResolver([('oembed', oembed.fetch), ('yt-dlp', pool.fetch)])
+    pool.close()
+
+def test_oembed_hit_skips_ytdlp(resolver):
+    metadata = resolver.resolve('https://www.youtube.com/watch?v=abc123', 'youtube')
+    assert metadata == {'title': "Dexter - I Don't Care (Klakson, 2000)", 'uploader': 'Electro Archive'}
+    assert resolver.stats['oembed']['hits'] == 1
+    assert resolver.stats['yt-dlp']['attempts'] == 0
+    assert not any(path == '/ytdlp' for path, _ in StubHandler.requests_seen)
+
+def test_soundcloud_title_matches_ytdlp_shape(resolver):
+    metadata = resolver.resolve('https://soundcloud.com/octex/bubblin', 'soundcloud')
+    assert metadata == {'title': 'Bubblin', 'uploader': 'Octex'}
+
+def test_failed_or_ambiguous_oembed_escalates(resolver):
+    # Embedding disabled: oEmbed answers 401
+    metadata = resolver.resolve('https://www.youtube.com/watch?v=noembed', 'youtube')
+    assert metadata['title'] == 'Drexciya - Bubble Metropolis (Underground Resistance, 1993)'
+
+    # Truncated title from oEmbed
+    metadata = resolver.resolve('https://www.youtube.com/watch?v=trunc1', 'youtube')
+    assert metadata['title'].endswith('1993)')
+
+    assert (resolver.stats['oembed']['attempts'], resolver.stats['oembed']['hits']) == (2, 0)
+    assert resolver.stats['yt-dlp']['hits'] == 2
+    assert 'oembed: 0/2 hits (0%)' in resolver.summary()
+
+def test_ambiguous_answer_kept_when_no_tier_does_better(stub_server):
+    oembed = OEmbedClient(endpoints={'youtube': f"{stub_server}/youtube/oembed"})
+    resolver = TieredMetadataResolver([('oembed', oembed.fetch), ('yt-dlp', lambda url, host: None)])
+    metadata = resolver.resolve('https://www.youtube.com/watch?v=trunc1', 'youtube')
+    assert metadata['title'].endswith('199...')
+
+def test_ambiguous_titles():
+    assert is_ambiguous_title('')
+    assert is_ambiguous_title('YouTube')
+    assert is_ambiguous_title('Some very long title that got cut…')
+    assert not is_ambiguous_title('Octex - Bubblin')
+
+def test_extract_youtube_info_uses_resolver(offline_sync, resolver):
+    offline_sync.metadata_resolver = resolver
+    info = offline_sync.extract_youtube_info('https://www.youtube.com/watch?v=abc123', 'post title')
+    assert info['artist'] == 'Dexter' and info['track'] == "I Don't Care"
+
+def test_reddit_embed_tier(resolver):
+    embeds = EmbeddedMetadata()
+    embeds.add('https://www.youtube.com/watch?v=emb1', embedded_metadata({'type': 'youtube.com', 'oembed': {
+        'title': 'Floating Points &amp; Pharoah Sanders - Promises', 'author_name': 'Luaka Bop'}}))
+    # Parses as a video title but not as artist/track: left to the later tiers
+    embeds.add('https://www.youtube.com/watch?v=abc123', {'title': 'Untitled upload', 'uploader': ''})
+    resolver = TieredMetadataResolver([('embed', embeds.fetch)] + resolver.tiers)
+
+    metadata = resolver.resolve('https://www.youtube.com/watch?v=emb1', 'youtube')
+    assert metadata['title'] == 'Floating Points & Pharoah Sanders - Promises'
+    assert resolver.stats['oembed']['attempts'] == 0
+
+    metadata = resolver.resolve('https://www.youtube.com/watch?v=abc123', 'youtube')
+    assert metadata['title'].startswith('Dexter')
+    assert (resolver.stats['embed']['attempts'], resolver.stats['embed']['hits']) == (2, 1)
+
+    # Bandcamp's "Track, by Artist" is turned around for the title parser
+    assert embedded_metadata({'oembed': {'title': 'Bubblin, by Octex', 'author_name': 'Octex'}}) == {
+        'title': 'Octex - Bubblin', 'uploader': 'Octex'}
+    assert embedded_metadata(None) is None and embedded_metadata({'type': 'imgur.com'}) is None
+
+def test_soundcloud_embed_drops_uploader():
+    def soundcloud(title, author):
+        return embedded_metadata({'type': 'soundcloud.com', 'oembed': {
+            'provider_name': 'SoundCloud', 'title': title, 'author_name': author}})
+
+    # "Track by Uploader" is not "Artist by Track": without the uploader it is left to the later tiers
+    assert soundcloud('Archangel by Burial', 'Burial') == {'title': 'Archangel', 'uploader': 'Burial'}
+    assert soundcloud('Burial - Archangel by Hyperdub', 'Hyperdub')['title'] == 'Burial - Archangel'
+
+    embeds = EmbeddedMetadata()
+    embeds.add('https://soundcloud.com/burial/archangel', soundcloud('Archangel by Burial', 'Burial'))
+    embeds.add('https://soundcloud.com/hyperdub/archangel', soundcloud('Burial - Archangel by Hyperdub', 'Hyperdub'))
+    assert embeds.fetch('https://soundcloud.com/burial/archangel', 'soundcloud') is None
+    assert embeds.fetch('https://soundcloud.com/hyperdub/archangel', 'soundcloud')['title'] == 'Burial - Archangel'
+
+def test_bandcamp_embed_skips_scrape(offline_sync):
+    def no_fetch(*args, **kwargs):
+        raise AssertionError("Bandcamp page fetched despite a usable embed")
+
+    offline_sync.http.get_conditional = no_fetch
+    url = 'https://octex.bandcamp.com/track/bubblin'
+    info = offline_sync.extract_music_info({'url': url, 'title': 'new one from octex', 'embed': embedded_metadata(
+        {'type': 'bandcamp.com', 'oembed': {'title': 'Bubblin (VIP Mix), by Octex', 'author_name': 'Octex'}})})
+    assert (info['artist'], info['track'], info['source']) == ('Octex', 'Bubblin', 'bandcamp')
+    assert info['is_remix'] and info['remixer'] == 'VIP'
+    assert offline_sync.instrumentation.counters['metadata.bandcamp.embed_hits'] == 1
+
+def test_bandcamp_album_embed_still_scraped(offline_sync):
+    fetched = []
+
+    def failing_fetch(url, **kwargs):
+        fetched.append(url)
+        raise ConnectionError("offline")
+
+    offline_sync.http.get_conditional = failing_fetch
+    url = 'https://drexciya.bandcamp.com/album/neptunes-lair'
+    info = offline_sync.extract_music_info({'url': url, 'title': 'Drexciya - Bubble Metropolis', 'embed': embedded_metadata(
+        {'type': 'bandcamp.com', 'oembed': {'title': "Neptune's Lair, by Drexciya", 'author_name': 'Drexciya'}})})
+    # The album's name is not a track: the page is fetched, and the post title used when that fails
+    assert fetched == [url]
+    assert (info['artist'], info['track']) == ('Drexciya', 'Bubble Metropolis')
+    assert 'metadata.bandcamp.embed_hits' not in offline_sync.instrumentation.counters
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test that playlist membership is served from the local snapshot-keyed index
+"""
+
+class FakePlaylistSpotify:
+    """Minimal append-only playlist supporting the calls the sync makes"""
+    
+    def __init__(self, track_ids):
+        self.track_ids = list(track_ids)
+        self.version = 0
+        self.page_requests = 0
+    
+    def playlist(self, playlist_id, fields=None):
+        return {'snapshot_id': f"snap{self.version}", 'tracks': {'total': len(self.track_ids)}}
+    
+    def _page(self, offset):
+        self.page_requests += 1
+        items = [{'track': {'id': tid}} for tid in self.track_ids[offset:offset + 100]]
+        next_offset = offset + 100 if offset + 100 < len(self.track_ids) else None
+        return {'items': items, 'next': next_offset}
+    
+    def playlist_items(self, playlist_id, fields=None, offset=0, additional_types=None):
+        assert fields == 'items(track(id)),next'
+        return self._page(offset)
+    
+    def next(self, results):
+        return self._page(results['next'])
+    
+    def playlist_add_items(self, playlist_id, items):
+        self.track_ids.extend(items)
+        self.version += 1
+        return {'snapshot_id': f"snap{self.version}"}
+
+def test_unchanged_snapshot_skips_paging(offline_sync):
+    spotify = FakePlaylistSpotify([f"t{i}" for i in range(250)])
+    offline_sync.spotify = spotify
+    
+    # First run builds the index (3 pages)
+    offline_sync.add_tracks_to_playlist('pl', ['t1', 'new1', 'new1'])
+    assert spotify.page_requests == 3
+    assert spotify.track_ids[-1] == 'new1' and spotify.track_ids.count('new1') == 1
+    
+    # Our own additions keep the index current, so no paging at all
+    offline_sync.add_tracks_to_playlist('pl', ['new1', 'new2'])
+    assert spotify.page_requests == 3
+    assert spotify.track_ids[-1] == 'new2'
+
+def test_changed_snapshot_reconciles_tail(offline_sync):
+    spotify = FakePlaylistSpotify([f"t{i}" for i in range(250)])
+    offline_sync.spotify = spotify
+    assert len(offline_sync.get_playlist_track_ids('pl')) == 250
+    
+    # Someone else appends tracks: only the tail is fetched
+    spotify.track_ids.extend(['x1', 'x2'])
+    spotify.version += 1
+    spotify.page_requests = 0
+    assert {'x1', 'x2'} <= offline_sync.get_playlist_track_ids('pl')
+    assert spotify.page_requests == 1
+    
+    # A removal breaks the known prefix and forces a full rebuild
+    spotify.track_ids.remove('t0')
+    spotify.track_ids.append('x3')
+    spotify.version += 1
+    spotify.page_requests = 0
+    ids = offline_sync.get_playlist_track_ids('pl')
+    assert 't0' not in ids and 'x3' in ids
+    assert spotify.page_requests == 1 + 3
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the non-music pre-filter: skipped posts cost no lookups, threads keep their comments
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from async_pipeline import AsyncPipeline
+from media_metadata import TieredMetadataResolver
+from title_parser import non_music_reason, source_type
+
+def make_posts(sync, reddit):
+    thread = [(f"c{i}", f"Comment Artist {i} - Comment Track {i}") for i in range(25)]
+    submissions = [
+        reddit.add('music', 'Burial - Archangel'),
+        reddit.add('video', 'Anyone know this one?', url='https://www.youtube.com/watch?v=abc'),
+        reddit.add('question', 'Anyone going to the party tonight?'),
+        reddit.add('party', 'Overmono - Printworks closing set', url='https://ra.co/events/1', flair='Event'),
+        reddit.add('thread', 'What are you listening to this week?', comments=thread),
+    ]
+    return [reddit.post(s.id, skip_reason=sync.non_music_reason(s)) for s in submissions]
+
+def test_non_music_reason():
+    assert non_music_reason('Burial - Archangel', 'title', is_self=True) is None
+    # A music link is always looked up, whatever the title says
+    assert non_music_reason('Anyone know this one?', 'youtube') is None
+    assert non_music_reason('Anyone going to the party tonight?', 'title', is_self=True) == 'non-music title'
+    assert non_music_reason('Burial - Archangel', 'title', flair='Event ') == 'flair: Event'
+    assert non_music_reason('Saw this in a record shop', 'title', is_self=True).startswith('self post')
+
+@pytest.mark.parametrize('title', [
+    "Basement Jaxx - Where's Your Head At",
+    'Moby - Why Does My Heart Feel So Bad',
+    'LCD Soundsystem - Tonight',
+])
+def test_artist_track_titles_are_not_non_music(title):
+    # Question words and "tonight" in a track name, linking to a store with no metadata tier
+    assert non_music_reason(title, source_type('https://www.beatport.com/track/x/1')) is None
+    assert non_music_reason(title, 'title', is_self=True) is None
+    assert non_music_reason(title, 'title', flair='Event') == 'flair: Event'
+
+@pytest.fixture
+def prefilter_sync(offline_sync, fake_spotify):
+    offline_sync.spotify = fake_spotify
+    offline_sync.metadata_resolver = TieredMetadataResolver([
+        ('fake', lambda url, host: {'title': 'Kode9 - Black Sun', 'uploader': ''}),
+    ])
+    return offline_sync
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_skipped_posts(prefilter_sync, fake_reddit, tmp_path, use_async):
+    prefilter_sync.reddit = fake_reddit
+    posts = make_posts(prefilter_sync, fake_reddit)
+    if use_async:
+        post_ids, comment_ids = asyncio.run(AsyncPipeline(prefilter_sync, queue_size=2).run(posts))
+    else:
+        post_ids, comment_ids = prefilter_sync.collect_track_ids(posts)
+
+    assert post_ids == ['Burial:Archangel', 'Kode9:Black Sun']
+    # The thread itself is skipped, but its comments are still read and resolved
+    assert len(comment_ids) == 25
+    assert not any('party' in q or 'Printworks' in q or 'listening' in q for q in prefilter_sync.spotify.queries)
+    assert prefilter_sync.resolution_cache.lookup('post:question', posts[2]['url']) is None
+
+    prefilter_sync.write_run_report('ok', 'serial')
+    report = json.loads((tmp_path / 'run_report.json').read_text())
+    assert report['counters']['posts.skipped_non_music'] == 3
+    assert sorted((p['id'], p['reason']) for p in report['skipped_posts']) == [
+        ('party', 'flair: Event'), ('question', 'non-music title'), ('thread', 'non-music title'),
+    ]
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test query deduplication, subsumption and the per-resolution query budget
+"""
+
+from overload_spotify_sync import ResolutionState
+
+def make_item(track_id, artist, name):
+    return {'id': track_id, 'name': name, 'artists': [{'name': artist}]}
+
+class FakeSpotify:
+    def __init__(self, responder):
+        self.responder = responder
+        self.queries = []
+    
+    def search(self, q, type, limit):
+        self.queries.append(q)
+        return {'tracks': {'items': self.responder(q)}}
+
+def test_query_family():
+    family = ResolutionState.query_family
+    assert family('artist:"Dexter" track:"Bubblin"') == family('dexter bubblin') == family('"Dexter" "Bubblin"')
+    assert family('"Bubblin"') != family('dexter bubblin')
+
+def test_repeated_result_pages_prune_looser_queries(offline_sync):
+    # Every query returns the same wrong-artist page
+    page = [make_item('x1', 'Someone Else', 'Unrelated'), make_item('x2', 'Another', 'Nope')]
+    offline_sync.spotify = FakeSpotify(lambda q: page)
+    
+    resolution = ResolutionState(budget=15)
+    music_info = {'artist': 'Octex', 'track': 'Bubblin', 'is_remix': False}
+    assert offline_sync.search_spotify(music_info, resolution) is None
+    
+    # Query 1 scores the page; query 2 (same family) sees nothing new and prunes
+    # the remaining artist+track variants; then the track-only family gets one query.
+    queries = offline_sync.spotify.queries
+    assert queries == ['artist:"Octex" track:"Bubblin"', '"Octex" "Bubblin"', 'track:"Bubblin"']
+    assert resolution.queries == 3
+
+def test_budget_caps_queries_across_fallbacks(offline_sync):
+    counter = iter(range(1000))
+    offline_sync.spotify = FakeSpotify(lambda q: [make_item(f"id{next(counter)}", 'Wrong', 'Wrong')])
+    
+    resolution = ResolutionState(budget=4)
+    music_info = {'artist': 'Dexter', 'track': "I Don't Care", 'is_remix': False, 'source': 'youtube'}
+    post = {'title': "Dexter - I Don't Care [Klakson, 2000]"}
+    assert offline_sync.search_spotify_with_fallback(music_info, post, resolution) is None
+    assert len(offline_sync.spotify.queries) == 4
+    
+    offline_sync.record_resolution_queries(resolution)
+    assert offline_sync.queries_per_resolution == [4]
+
+def test_query_summary(offline_sync, caplog):
+    offline_sync.log_query_summary()
+    assert offline_sync.query_summary()['resolutions'] == 0 and not caplog.records
+    
+    offline_sync.queries_per_resolution = [4, 1, 1, 12]
+    assert offline_sync.query_summary() == {
+        'resolutions': 4, 'total': 18, 'mean': 4.5, 'max': 12, 'histogram': {'1': 2, '4': 1, '12': 1}}
+    with caplog.at_level('INFO'):
+        offline_sync.log_query_summary()
+    assert caplog.records[-1].getMessage() == (
+        "Spotify queries per resolution: 18 total over 4 resolution(s), avg 4.5, max 12 (1q×2, 4q×1, 12q×1)")
+
+def test_match_still_found_after_pruning(offline_sync):
+    def responder(q):
+        if q == 'track:"Bubblin"':
+            return [make_item('hit', 'Octex', 'Bubblin')]
+        return []
+    offline_sync.spotify = FakeSpotify(responder)
+    
+    music_info = {'artist': 'Octex', 'track': 'Bubblin', 'is_remix': False}
+    assert offline_sync.search_spotify(music_info, ResolutionState(budget=15)) == 'hit'
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test per-host request pacing used by the extraction stage
+"""
+
+import threading
+import time
+
+import pytest
+from spotipy.exceptions import SpotifyException
+
+from rate_limit import HostRateLimiter, ThrottledSpotify, TokenBucket
+
+def test_host_rate_limit():
+    limiter = HostRateLimiter({'bandcamp': 0.05, 'youtube': 0.0})
+    
+    # Same host: requests are spaced by the configured interval
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.wait('bandcamp')
+    elapsed = time.monotonic() - start
+    print(f"4 bandcamp requests took {elapsed:.3f}s")
+    assert elapsed >= 0.15
+    
+    # Unlimited host never waits
+    assert limiter.wait('youtube') == 0.0
+    assert limiter.wait('unknown-host') == 0.0
+
+def test_concurrent_waiters_are_spaced():
+    limiter = HostRateLimiter({'spotify': 0.05})
+    stamps = []
+    lock = threading.Lock()
+    
+    def worker():
+        limiter.wait('spotify')
+        with lock:
+            stamps.append(time.monotonic())
+    
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    stamps.sort()
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    print(f"Gaps between concurrent requests: {[round(g, 3) for g in gaps]}")
+    assert all(gap >= 0.04 for gap in gaps)
+
+def test_token_bucket_burst_then_rate():
+    bucket = TokenBucket(rate=20, capacity=5)
+    
+    # The burst goes out immediately, the rest at 20/s
+    start = time.monotonic()
+    waits = [bucket.acquire() for _ in range(9)]
+    elapsed = time.monotonic() - start
+    print(f"9 acquisitions took {elapsed:.3f}s")
+    assert waits[:5] == [0.0] * 5
+    assert all(wait > 0 for wait in waits[5:])
+    assert elapsed >= 0.18
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=100, capacity=10)
+    bucket.pause_for(0.1)
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+class RateLimitedClient:
+    """Refuses the first `refusals` searches with 429 and Retry-After"""
+    
+    def __init__(self, refusals, retry_after='0.05'):
+        self.refusals = refusals
+        self.retry_after = retry_after
+        self.searches = 0
+        self.prefix = 'https://api.spotify.com/v1/'
+    
+    def search(self, q, type, limit):
+        self.searches += 1
+        if self.searches <= self.refusals:
+            raise SpotifyException(429, -1, 'rate limited', headers={'Retry-After': self.retry_after})
+        return {'tracks': {'items': [q]}}
+
+def test_throttled_spotify_retries_after_429():
+    client = RateLimitedClient(refusals=2)
+    spotify = ThrottledSpotify(client, TokenBucket(rate=1000, capacity=10))
+    
+    start = time.monotonic()
+    result = spotify.search(q='x', type='track', limit=1)
+    assert result == {'tracks': {'items': ['x']}}
+    assert time.monotonic() - start >= 0.1  # two Retry-After pauses
+    assert client.searches == 3
+    assert spotify.calls == 3 and spotify.rate_limited == 2
+    assert spotify.retry_after_seconds == pytest.approx(0.1)
+    
+    # Non-callable attributes pass straight through
+    assert spotify.prefix == client.prefix
+    print(spotify.summary())
+
+def test_throttled_spotify_gives_up():
+    client = RateLimitedClient(refusals=5, retry_after='0')
+    spotify = ThrottledSpotify(client, TokenBucket(rate=1000, capacity=10), max_retries=2)
+    with pytest.raises(SpotifyException):
+        spotify.search(q='x', type='track', limit=1)
+    assert client.searches == 3
+
+def test_throttled_spotify_counts_waits():
+    spotify = ThrottledSpotify(RateLimitedClient(refusals=0), TokenBucket(rate=50, capacity=1))
+    for _ in range(3):
+        spotify.search(q='x', type='track', limit=1)
+    assert spotify.calls == 3
+    assert spotify.throttled == 2
+    assert spotify.throttle_seconds >= 0.03
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test the compact post/comment/music_info records and that posts release their PRAW submission
+"""
+
+import gc
+import json
+import pickle
+
+import pytest
+
+from records import MusicInfo, Post
+from title_parser import parse_title
+
+def test_music_info_reads_like_a_dict():
+    info = parse_title('Burial - Archangel (Four Tet Remix)')
+    assert isinstance(info, MusicInfo)
+    assert info['artist'] == 'Burial' and info.get('remixer') == 'Four Tet' and info.get('spotify_id') is None
+    assert 'spotify_id' not in info and 'artist' in info
+    with pytest.raises(KeyError):
+        info['spotify_id']
+
+    info['spotify_id'] = 'abc'
+    copy = info.copy()
+    copy['source'] = 'comment_text'
+    assert info['source'] == 'youtube' and copy['spotify_id'] == 'abc'
+    assert copy.pop('spotify_id') == 'abc' and copy.pop('spotify_id', None) is None
+    with pytest.raises(KeyError):
+        info['no_such_field'] = 1
+
+    assert info == dict(info) and dict(info) == info and info != copy
+    assert json.loads(json.dumps(info, default=dict)) == info
+    assert pickle.loads(pickle.dumps(info)) == info
+
+def test_posts_release_submission(offline_sync, fake_reddit):
+    for sid, title, num_comments in (('song', 'Burial - Archangel', 3), ('thread', 'Weekly share thread', 30)):
+        fake_reddit.add(sid, title, comments=[(f"{sid}-{i}", f"Artist {i} - Track {i}") for i in range(num_comments)])
+    offline_sync.reddit = reddit = fake_reddit
+    posts = offline_sync.get_recent_posts()
+    assert all(isinstance(post, Post) and 'submission' not in post for post in posts)
+    assert {post['id']: post['num_comments'] for post in posts} == {'song': 3, 'thread': 30}
+
+    # Nothing keeps the listed submissions (or their comment forests) alive
+    gc.collect()
+    assert all(ref() is None for ref in reddit.listed)
+
+    # Only the discussion candidate is fetched again, to walk its comments
+    comments = list(offline_sync.iter_discussion_comments(posts))
+    assert reddit.fetched == ['thread']
+    assert len(comments) == 30 and comments[0]['parent_post_title'] == 'Weekly share thread'
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test recording a run's traffic and replaying it offline, and the frozen corpus
+"""
+
+import os
+import time
+
+import pytest
+
+from media_metadata import TieredMetadataResolver
+from overload_spotify_sync import OverloadSpotifySync
+from replay import (Recorder, ReplayMiss, ReplaySpotify, Tape, load_expected, replay_config, replay_run,
+                    score_resolutions)
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures', 'replay', 'synthetic')
+
+@pytest.fixture(autouse=True)
+def credentials(monkeypatch):
+    for var in ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET', 'SPOTIFY_CLIENT_ID', 'SPOTIFY_CLIENT_SECRET'):
+        monkeypatch.setenv(var, 'test')
+
+class LiveSpotify:
+    """Stands in for the live API while recording: search echoes the queried track"""
+
+    def search(self, q, type, limit):
+        if q.count('"') < 4:
+            return {'tracks': {'items': []}}
+        artist, track = q.split('"')[1], q.split('"')[3]
+        return {'tracks': {'items': [{'id': f"{artist}:{track}", 'name': track, 'artists': [{'name': artist}]}]}}
+
+    def playlist(self, playlist_id, fields=None):
+        return {'name': 'notes from r/theoverload', 'snapshot_id': 'live-1', 'tracks': {'total': 1}}
+
+    def playlist_items(self, playlist_id, fields=None, offset=0, additional_types=('track',)):
+        return {'items': [{'track': {'id': 'Burial:Archangel'}}], 'next': None}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        return {'snapshot_id': 'live-2'}
+
+class LiveSubmission:
+    def __init__(self, submission_id, title, url):
+        self.id = submission_id
+        self.title = title
+        self.url = url
+        self.score = 10
+        self.created_utc = time.time() - 60
+        self.num_comments = 0
+        self.comments = []
+
+class LiveReddit:
+    def __init__(self, submissions):
+        self.submissions = submissions
+
+    def subreddit(self, name):
+        return self
+
+    def new(self, limit=None):
+        return iter(self.submissions)
+
+    def info(self, fullnames):
+        return iter([])
+
+def test_record_then_replay(tmp_path):
+    submissions = [
+        LiveSubmission('a', 'Burial - Archangel', 'https://www.reddit.com/r/theoverload/comments/a/'),
+        LiveSubmission('b', 'Some video', 'https://www.youtube.com/watch?v=b'),
+        LiveSubmission('c', 'Anyone going to the party tonight?', 'https://www.reddit.com/r/theoverload/comments/c/'),
+    ]
+    live = OverloadSpotifySync(config=replay_config(str(tmp_path / 'live.db')),
+                               reddit=LiveReddit(submissions), spotify=LiveSpotify())
+    live.metadata_resolver = TieredMetadataResolver([
+        ('oembed', lambda url, host: {'title': 'Four Tet - Baby', 'uploader': ''}),
+    ])
+    recorder = Recorder(live)
+    live.run()
+    recorder.save(str(tmp_path / 'tape'))
+
+    recorded = recorder.resolutions
+    assert recorded['post:a'] == 'Burial:Archangel' and recorded['post:b'] == 'Four Tet:Baby'
+    assert load_expected(str(tmp_path / 'tape')) == recorded
+
+    result = replay_run(str(tmp_path / 'tape'), cache_dir=str(tmp_path))
+    assert result.resolutions == recorded
+    assert result.misses == []
+    # The playlist already holds Archangel, so only the new track is added
+    assert result.added == ['Four Tet:Baby']
+    assert result.report['spans']['spotify.search']['count'] >= 2
+
+def test_unrecorded_calls():
+    spotify = ReplaySpotify(Tape())
+    assert spotify.search(q='artist:"A" track:"B"', type='track', limit=20) == {'tracks': {'items': []}}
+    with pytest.raises(ReplayMiss):
+        spotify.tracks(['x'])
+    assert len(spotify.misses) == 2
+
+def test_frozen_corpus(tmp_path):
+    serial = replay_run(CORPUS, cache_dir=str(tmp_path / 'serial'))
+    score = score_resolutions(serial.resolutions, load_expected(CORPUS))
+    print(f"Corpus accuracy: {score['correct']}/{score['labeled']}")
+    for key, miss in score['wrong'].items():
+        print(f"  {key}: {miss}")
+
+    # Every call the current code makes is on the tape
+    assert serial.misses == []
+    assert score['accuracy'] >= 0.9
+
+    concurrent = replay_run(CORPUS, use_async=True, cache_dir=str(tmp_path / 'async'))
+    assert concurrent.added == serial.added
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
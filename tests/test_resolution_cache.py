@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the persistent resolution cache used to skip already-handled posts
+"""
+
+import time
+
+from sync_cache import ResolutionCache, normalize_url
+
+def test_normalize_url():
+    assert normalize_url('https://youtu.be/abc123?si=xyz') == 'youtube:abc123'
+    assert normalize_url('https://www.youtube.com/watch?v=abc123&feature=share') == 'youtube:abc123'
+    assert normalize_url('https://m.youtube.com/watch?v=abc123') == 'youtube:abc123'
+    assert (normalize_url('https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC?si=123')
+            == 'https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC')
+    assert normalize_url('') == ''
+
+def test_positive_and_negative_entries(tmp_path):
+    cache = ResolutionCache(str(tmp_path / 'cache.db'), negative_ttl=60)
+    music_info = {'artist': 'Dexter', 'track': "I Don't Care", 'source': 'youtube'}
+    
+    cache.store('post:abc', 'https://youtu.be/vid1', music_info, 'spotify123')
+    cache.store('post:def', 'https://example.com/event', None, None)
+    
+    # Hit by item ID and by the same link shared elsewhere
+    assert cache.lookup('post:abc')['track_id'] == 'spotify123'
+    assert cache.lookup('comment:zzz', 'https://www.youtube.com/watch?v=vid1')['music_info'] == music_info
+    
+    # Negative results are cached too
+    negative = cache.lookup('post:def')
+    assert negative == {'music_info': None, 'track_id': None}
+    
+    # A failed lookup never replaces a known-good URL mapping
+    cache.store('comment:other', 'https://youtu.be/vid1', music_info, None)
+    assert cache.lookup('comment:new', 'https://youtu.be/vid1')['track_id'] == 'spotify123'
+    
+    assert cache.lookup('post:unknown') is None
+    assert cache.hits == 4 and cache.misses == 1
+
+def test_negative_entries_expire(tmp_path):
+    cache = ResolutionCache(str(tmp_path / 'cache.db'), negative_ttl=0.01)
+    cache.store('post:def', '', None, None)
+    time.sleep(0.02)
+    assert cache.lookup('post:def') is None
+
+def test_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResolutionCache(path)
+    cache.store('post:abc', '', {'artist': 'A', 'track': 'B'}, 'id1')
+    cache.close()
+    
+    assert ResolutionCache(path).lookup('post:abc')['track_id'] == 'id1'
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_normalize_url()
+    for test in (test_positive_and_negative_entries, test_negative_entries_expire, test_cache_survives_reopen):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the memoizing Spotify search layer
+"""
+
+import threading
+import time
+
+from overload_spotify_sync import TrackMentions
+from records import Post
+from sync_cache import SearchCache
+from title_parser import parse_title
+
+def test_memory_and_disk_tiers(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SearchCache(path)
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        return {'tracks': {'items': [{'id': 'a'}]}}
+    
+    first = cache.get_or_fetch('Dexter  "I Don\'t Care"', 'track', 20, fetch)
+    # Normalized query (case/whitespace) hits memory
+    second = cache.get_or_fetch('dexter "i don\'t care"', 'track', 20, fetch)
+    assert first == second and len(calls) == 1
+    assert cache.memory_hits == 1
+    
+    # A different limit is a different search
+    cache.get_or_fetch('dexter "i don\'t care"', 'track', 10, fetch)
+    assert len(calls) == 2
+    
+    # A fresh process reads from disk
+    reopened = SearchCache(path)
+    reopened.get_or_fetch('Dexter "I Don\'t Care"', 'track', 20, fetch)
+    assert len(calls) == 2 and reopened.disk_hits == 1
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = SearchCache(str(tmp_path / 'cache.db'), ttl=0.05, max_memory_entries=2)
+    calls = []
+    fetch = lambda: calls.append(1) or {'tracks': {'items': [{'id': 'a'}]}}
+    
+    for query in ('a', 'b', 'c'):
+        cache.get_or_fetch(query, 'track', 20, fetch)
+    assert list(cache._memory) == ['track|20|b', 'track|20|c']
+    
+    time.sleep(0.06)
+    cache.get_or_fetch('c', 'track', 20, fetch)
+    assert len(calls) == 4
+    
+    cache.prune()
+    assert cache._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0] == 1
+
+def test_empty_results_use_negative_ttl(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SearchCache(path, negative_ttl=0.05)
+    calls = []
+    fetch = lambda: calls.append(1) or {'tracks': {'items': []}}
+    
+    cache.get_or_fetch('nothing', 'track', 20, fetch)
+    cache.get_or_fetch('nothing', 'track', 20, fetch)
+    assert len(calls) == 1
+    
+    # Never persisted, and gone from memory after the negative TTL
+    assert cache._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0] == 0
+    time.sleep(0.06)
+    cache.get_or_fetch('nothing', 'track', 20, fetch)
+    assert len(calls) == 2
+
+def test_expired_negative_resolution_searches_again(offline_sync):
+    queries = []
+    
+    class FakeSpotify:
+        def search(self, q, type, limit):
+            queries.append(q)
+            return {'tracks': {'items': []}}
+    
+    offline_sync.spotify = FakeSpotify()
+    offline_sync.resolution_cache.negative_ttl = 0.01
+    post = Post(title='Burial - Archangel', url='', score=5, id='p1', num_comments=0, cached=None)
+    assert offline_sync.resolve_post(post, parse_title(post['title'])) is None
+    searched = len(queries)
+    assert searched and offline_sync.resolution_cache.lookup('post:p1') is not None
+    
+    # The next run, after the negative entry has expired, asks Spotify again
+    time.sleep(0.02)
+    post['cached'] = offline_sync.resolution_cache.lookup('post:p1')
+    assert post['cached'] is None
+    offline_sync.search_cache = SearchCache(offline_sync.search_cache.path)
+    offline_sync.track_mentions = TrackMentions()
+    assert offline_sync.resolve_post(post, parse_title(post['title'])) is None
+    assert len(queries) == 2 * searched
+
+def test_in_flight_queries_are_deduplicated(tmp_path):
+    cache = SearchCache(str(tmp_path / 'cache.db'))
+    calls = []
+    release = threading.Event()
+    
+    def slow_fetch():
+        calls.append(1)
+        release.wait(1)
+        return {'tracks': {'items': [{'id': 'x'}]}}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch('same', 'track', 20, slow_fetch)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert len(results) == 5 and all(r == results[0] for r in results)
+
+def test_fallback_strategies_never_repeat_a_search(offline_sync):
+    queries = []
+    
+    class FakeSpotify:
+        def search(self, q, type, limit):
+            queries.append(q)
+            return {'tracks': {'items': []}}
+    
+    offline_sync.spotify = FakeSpotify()
+    music_info = offline_sync.extract_youtube_info('', 'Dexter - I Don\'t Care [Klakson, 2000]')
+    post = {'title': 'Dexter - I Don\'t Care [Klakson, 2000]', 'url': ''}
+    
+    assert offline_sync.search_spotify_with_fallback(music_info, post) is None
+    assert offline_sync.search_spotify(music_info) is None
+    assert len(queries) == len({SearchCache.make_key(q, 'track', 20) for q in queries})
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
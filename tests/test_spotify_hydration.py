@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test batched hydration of Spotify links found in posts and comments
+"""
+
+def make_track(track_id):
+    return {'id': track_id, 'name': f"Track {track_id}", 'artists': [{'name': f"Artist {track_id}"}]}
+
+class FakeSpotify:
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.track_requests = []
+        self.album_requests = []
+    
+    def tracks(self, track_ids):
+        self.track_requests.append(list(track_ids))
+        return {'tracks': [None if tid in self.missing else make_track(tid) for tid in track_ids]}
+    
+    def albums(self, album_ids):
+        self.album_requests.append(list(album_ids))
+        return {'albums': [{'id': aid, 'tracks': {'items': [{'id': f"first{aid}"}]}} for aid in album_ids]}
+
+def test_parse_spotify_urls(offline_sync):
+    parse = offline_sync.parse_spotify_url
+    assert parse('https://open.spotify.com/track/abc123?si=x')['spotify_id'] == 'abc123'
+    assert parse('https://open.spotify.com/intl-de/track/abc123')['spotify_id'] == 'abc123'
+    assert parse('spotify:track:abc123')['spotify_id'] == 'abc123'
+    assert parse('https://open.spotify.com/album/alb1?highlight=spotify:track:tr9')['spotify_id'] == 'tr9'
+    assert parse('https://open.spotify.com/album/alb1')['spotify_album_id'] == 'alb1'
+    assert parse('https://open.spotify.com/artist/xyz') is None
+
+def test_hydration_is_batched(offline_sync):
+    offline_sync.spotify = FakeSpotify(missing={'gone'})
+    
+    infos = [offline_sync.parse_spotify_url(f"https://open.spotify.com/track/t{i}") for i in range(120)]
+    infos.append(offline_sync.parse_spotify_url("https://open.spotify.com/album/a1"))
+    infos.append(offline_sync.parse_spotify_url("https://open.spotify.com/track/gone"))
+    infos.append(None)
+    infos.append({'artist': 'Dexter', 'track': "I Don't Care", 'source': 'youtube'})
+    
+    hydrated = offline_sync.hydrate_spotify_infos(infos)
+    
+    # 121 distinct tracks -> 3 requests of at most 50, albums looked up once
+    assert [len(batch) for batch in offline_sync.spotify.track_requests] == [50, 50, 22]
+    assert offline_sync.spotify.album_requests == [['a1']]
+    
+    assert hydrated[0] == {'artist': 'Artist t0', 'track': 'Track t0', 'source': 'spotify', 'spotify_id': 't0'}
+    assert hydrated[120]['spotify_id'] == 'firsta1' and 'spotify_album_id' not in hydrated[120]
+    assert hydrated[121] is None
+    assert hydrated[122] is None
+    assert hydrated[123]['artist'] == 'Dexter'
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, '-q'])
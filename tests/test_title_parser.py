@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test the stateless title parser and its batch API
+"""
+
+import pytest
+
+from patterns import BANDCAMP_TITLE_PATTERNS
+from title_parser import (
+    extract_remix_info, is_false_positive_remix, parse_many, parse_title, process_comment_text, split_artist_track,
+)
+
+def test_parse_title():
+    info = parse_title('Deadmau5 feat. Kaskade - I Remember (Caspa Remix) [Mau5trap, 2008]')
+    assert info['artist'] == 'Deadmau5 feat. Kaskade' and info['track'] == 'I Remember'
+    assert info['is_remix'] and info['remixer'] == 'Caspa' and info['remix_type'] == 'remix'
+    assert info['source'] == 'youtube'
+
+    # No layout matches: the whole title is the track
+    assert parse_title('Windowlicker')['artist'] == ''
+    # Bandcamp titles never use the quoted-track layout
+    assert parse_title('Burial "Archangel"', 'bandcamp', BANDCAMP_TITLE_PATTERNS)['artist'] == ''
+    assert split_artist_track('Burial "Archangel"') == ('Burial', 'Archangel')
+
+def test_remix_false_positives():
+    assert not extract_remix_info('Stardust - Music Sounds Better With You (Original Mix)')['is_remix']
+    assert is_false_positive_remix('Radio', 'Edit')
+    assert not is_false_positive_remix('What So Not', 'Remix')
+
+def test_process_comment_text():
+    assert process_comment_text('check out: now playing "Burial - Archangel"') == 'Burial - Archangel'
+
+def test_parse_many_matches_parse_title():
+    titles = ['Burial - Archangel', 'Four Tet - Baby (Floating Points Remix)', 'Anyone going tonight?'] * 40
+    expected = [parse_title(title) for title in titles]
+    assert parse_many(iter(titles), workers=1) == expected
+    # Small chunks so the batch really is split across worker processes
+    assert parse_many(titles, workers=2, chunksize=16) == expected
+    assert parse_many([]) == []
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
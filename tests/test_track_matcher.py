@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test single-pass candidate scoring in TrackMatcher
+"""
+
+import pytest
+
+from track_matcher import TrackMatcher, tracks_match_with_variations
+
+def make_item(track_id, artist, name):
+    return {'id': track_id, 'name': name, 'artists': [{'name': artist}]}
+
+def test_rejects_vague_queries():
+    assert TrackMatcher('', 'Bubblin').rejection_reason().startswith('Insufficient')
+    assert TrackMatcher('Dexter', 'Go').rejection_reason().startswith('Track info too vague')
+    assert TrackMatcher('Octex', 'Bubblin').rejection_reason() is None
+
+def test_artist_and_track_thresholds():
+    matcher = TrackMatcher('Octex', 'Bubblin')
+    assert matcher.score(make_item('a', 'Someone Else', 'Bubblin')) is None
+    assert matcher.score(make_item('b', 'Octex', 'Something Else')) is None
+    assert matcher.score(make_item('c', 'Octex', 'Bubblin')) == 18
+    assert matcher.score(make_item('d', 'Octex', 'Bubblin (2022)')) == 18
+
+def test_clean_query_prefers_unversioned_result():
+    matcher = TrackMatcher('Dexter', 'Ayoe')
+    candidates = [
+        make_item('v', 'Dexter', 'Ayoe - Extended Version'),
+        make_item('o', 'Dexter', 'Ayoe'),
+    ]
+    assert matcher.best_match(candidates)['id'] == 'o'
+
+def test_best_match_dedupes_and_keeps_first_on_ties():
+    matcher = TrackMatcher('Octex', 'Bubblin')
+    first, second = make_item('1', 'Octex', 'Bubblin'), make_item('2', 'Octex', 'Bubblin')
+    assert len(matcher.score_batch([first, first, second])) == 2
+    assert matcher.best_match([first, second]) is first
+    assert matcher.best_match([]) is None
+
+def test_variation_matching():
+    assert tracks_match_with_variations("i don't care (2022)", 'i don’t care (remastered)')
+    assert not tracks_match_with_variations('bubblin', 'ayoe')
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test that duplicate mentions of a track are resolved once and ranked by combined score
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from async_pipeline import AsyncPipeline
+from overload_spotify_sync import TrackMentions
+from records import Post
+from title_parser import parse_title, track_key
+
+def make_posts(reddit):
+    bodies = ['burial – archangel', 'Four Tet - Baby', 'Kode9 - Black Sun'] + [f"Artist {i} - Track {i}"
+                                                                               for i in range(22)]
+    reddit.add('p1', 'Burial - Archangel', score=12)
+    reddit.add('p2', 'Kode9 - Black Sun', score=5)
+    reddit.add('thread', 'Weekly thread', comments=[(f"c{i}", body, 30 if i == 1 else 3)
+                                                    for i, body in enumerate(bodies)])
+    return [reddit.post('p1'), reddit.post('p2'), reddit.post('thread', skip_reason='test')]
+
+def test_track_key():
+    assert track_key(parse_title('Burial - Archangel')) == track_key(parse_title('burial – ARCHANGEL'))
+    assert track_key(parse_title('Burial - Archangel')) != track_key(parse_title('Burial - Archangel (Kode9 Remix)'))
+    assert track_key({'spotify_id': 'abc', 'artist': '', 'track': ''}) == 'spotify:abc'
+    assert track_key({'artist': 'Burial', 'track': ''}) is None and track_key(None) is None
+    # Only punctuation: nothing left to key on
+    assert track_key({'artist': '!!!', 'track': '???'}) is None
+    assert track_key(parse_title('ＹＭＯ - ライディーン')) == track_key(parse_title('ymo - ライディーン'))
+
+def test_non_latin_titles_resolved_separately(offline_sync, fake_spotify):
+    offline_sync.spotify = spotify = fake_spotify
+    titles = ['坂本龍一 - 戦場のメリークリスマス', 'Кино - Группа крови', 'YMO - ライディーン', 'YMO - 君に、胸キュン。']
+    posts = [Post(title=title, url='', score=5, id=f"p{i}", num_comments=0, cached=None)
+             for i, title in enumerate(titles)]
+    assert len({track_key(parse_title(title)) for title in titles}) == 4
+
+    post_ids, _ = offline_sync.collect_track_ids(posts)
+    assert len(set(post_ids)) == 4 and offline_sync.track_mentions.shared == 0
+    assert set(spotify.searches.values()) == {1}
+
+def test_concurrent_mentions_share_one_search():
+    mentions = TrackMentions()
+    calls = []
+
+    def search():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'burial:archangel'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(mentions.resolve('burial|archangel||', search)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['burial:archangel'] * 5 and len(calls) == 1 and mentions.shared == 4
+
+    mentions.mention('a', 1)
+    mentions.mention('b', 3)
+    mentions.mention('a', 3)
+    mentions.mention(None, 100)
+    assert mentions.ranked(['c', 'b', 'a', 'b']) == ['a', 'b', 'c']
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_duplicates_resolved_once(offline_sync, fake_spotify, fake_reddit, use_async):
+    offline_sync.spotify = spotify = fake_spotify
+    offline_sync.reddit = fake_reddit
+    posts = make_posts(fake_reddit)
+    if use_async:
+        post_ids, comment_ids = asyncio.run(AsyncPipeline(offline_sync, queue_size=2).run(posts))
+    else:
+        post_ids, comment_ids = offline_sync.collect_track_ids(posts)
+
+    # Every mention still gets its track ID...
+    assert post_ids == ['Burial:Archangel', 'Kode9:Black Sun']
+    assert comment_ids[:3] == ['Burial:Archangel', 'Four Tet:Baby', 'Kode9:Black Sun']
+    # ...but each track was resolved once: 27 mentions, 25 resolutions
+    assert offline_sync.track_mentions.shared == 2
+    assert len(offline_sync.queries_per_resolution) == 25
+    assert spotify.searches['Burial:Archangel'] == 1
+    assert offline_sync.resolution_cache.lookup('comment:c0', '')['track_id'] == 'Burial:Archangel'
+
+    ranked = offline_sync.track_mentions.ranked(post_ids + comment_ids)
+    # Four Tet (30) > Burial (12 + 3) > Kode9 (5 + 3) > the rest (3 each, in order)
+    assert ranked[:4] == ['Four Tet:Baby', 'Burial:Archangel', 'Kode9:Black Sun', 'Artist 0:Track 0']
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-q'])
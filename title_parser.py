@@ -0,0 +1,245 @@
+"""
+Stateless parsing of post titles and comment text into artist/track/remix details
+
+Every function here is a pure function of its arguments: no API clients,
+config or credentials, and nothing beyond the compiled patterns in
+patterns.py and the MusicInfo record is imported. OverloadSpotifySync delegates to these for the
+text side of metadata extraction; parse_many runs parse_title over large
+batches (e.g. a subreddit's whole history) in a process pool.
+"""
+
+import os
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from patterns import (
+    ARTIST_TRACK_PATTERNS, COMMENT_PREFIX_PATTERN, METADATA_PATTERN, NON_MUSIC_PATTERN, NON_WORD_PATTERN,
+    REMIX_PATTERNS, REMIX_STRIP_PATTERNS, URL_PATTERN,
+)
+from records import MusicInfo
+
+# Remixer text that says the title is *not* a remix (but "Not" in names like "What So Not" is fine)
+NEGATIVE_REMIX_PHRASES = ('something not a', 'not a remix', 'not remix', 'no remix', 'never remix')
+
+# "<remixer> <type>" pairs that are versions of the original rather than remixes (exact matches)
+FALSE_POSITIVE_REMIXES = frozenset((
+    'radio edit',
+    'extended mix',
+    'club mix',
+    'original mix',
+    'vocal mix',
+    'instrumental mix',
+))
+
+# Post flairs that mark announcements, questions and other non-track posts
+NON_MUSIC_FLAIRS = frozenset(('discussion', 'question', 'event', 'events', 'meta', 'announcement', 'mod post',
+                              'news', 'meme'))
+
+# Below this many titles per worker a process pool costs more than it saves
+PARSE_MANY_CHUNKSIZE = 500
+
+
+def is_non_music_post(title: str) -> bool:
+    """Check if post is clearly not about music
+
+    See patterns.NON_MUSIC_PATTERN for the questions, event announcements,
+    meta posts and descriptive remix titles it recognises.
+    """
+    return bool(NON_MUSIC_PATTERN.search(title.lower()))
+
+
+def process_comment_text(text: str) -> str:
+    """Clean comment text for track extraction"""
+    # Remove common prefixes (repeatedly, so "check out: now playing ..." is fully stripped)
+    cleaned = text.strip()
+    while True:
+        stripped = COMMENT_PREFIX_PATTERN.sub('', cleaned, count=1)
+        if stripped == cleaned:
+            break
+        cleaned = stripped
+
+    # Remove quotes and clean up
+    return cleaned.strip('"\'')
+
+
+def find_comment_url(text: str) -> Optional[str]:
+    """Return the first URL in a comment, if any"""
+    url_match = URL_PATTERN.search(text)
+    return url_match.group(1) if url_match else None
+
+
+def is_false_positive_remix(remixer: str, remix_type: str) -> bool:
+    """Check if this is a false positive remix detection"""
+    remixer_lower = remixer.lower()
+    remix_type_lower = remix_type.lower()
+
+    if any(phrase in remixer_lower for phrase in NEGATIVE_REMIX_PHRASES):
+        return True
+
+    # "Original Mix" is typically not a remix
+    if remixer_lower == 'original' and remix_type_lower == 'mix':
+        return True
+
+    return f"{remixer_lower} {remix_type_lower}" in FALSE_POSITIVE_REMIXES
+
+
+def extract_remix_info(title: str) -> Dict:
+    """Extract remix information from title"""
+    for pattern in REMIX_PATTERNS:
+        match = pattern.search(title)
+        if not match:
+            continue
+        if len(match.groups()) == 2:  # Simple (Remixer Type) pattern
+            remixer = match.group(1).strip()
+            remix_type = match.group(2).strip()
+            if is_false_positive_remix(remixer, remix_type):
+                continue
+            return {
+                'is_remix': True,
+                'remixer': remixer,
+                'remix_type': remix_type.lower(),
+                'original_artist': None,
+                'original_track': None
+            }
+        elif len(match.groups()) == 3:  # feat. pattern
+            featured_artist = match.group(1).strip()
+            remixer = match.group(2).strip()
+            remix_type = match.group(3).strip()
+            if is_false_positive_remix(remixer, remix_type):
+                continue
+            return {
+                'is_remix': True,
+                'remixer': remixer,
+                'remix_type': remix_type.lower(),
+                'featured_artist': featured_artist,
+                'original_artist': None,
+                'original_track': None
+            }
+
+    return {
+        'is_remix': False,
+        'remixer': None,
+        'remix_type': None,
+        'featured_artist': None,
+        'original_artist': None,
+        'original_track': None
+    }
+
+
+def clean_title_for_parsing(title: str) -> str:
+    """Remove remix information and metadata to get clean artist - track"""
+    clean_title = title
+    for pattern in REMIX_STRIP_PATTERNS:
+        clean_title = pattern.sub('', clean_title)
+
+    # Remove common metadata patterns ([Label, 2000], (Some Records), ...)
+    clean_title = METADATA_PATTERN.sub('', clean_title)
+
+    return clean_title.strip()
+
+
+def split_artist_track(clean_title: str, patterns: Sequence = ARTIST_TRACK_PATTERNS) -> Tuple[str, str]:
+    """(artist, track) from the first layout that matches; ('', title) if none does"""
+    clean_title = clean_title.strip()
+    for pattern in patterns:
+        match = pattern.match(clean_title)
+        if match:
+            return match.group(1).strip(), match.group(2).strip()
+    return '', clean_title
+
+
+def has_artist_track(title: str, patterns: Sequence = ARTIST_TRACK_PATTERNS) -> bool:
+    """Whether a title splits into a non-empty artist and track"""
+    artist, track = split_artist_track(clean_title_for_parsing(title), patterns)
+    return bool(artist and track)
+
+
+def source_type(url: str) -> str:
+    """Classify a URL by the platform its metadata is fetched from ('title' if none)"""
+    if 'youtube.com' in url or 'youtu.be' in url:
+        return 'youtube'
+    elif 'spotify.com' in url:
+        return 'spotify'
+    elif 'soundcloud.com' in url:
+        return 'soundcloud'
+    elif 'bandcamp.com' in url:
+        return 'bandcamp'
+    return 'title'
+
+
+def non_music_reason(title: str, source_type: str, is_self: bool = False, flair: Optional[str] = None) -> Optional[str]:
+    """Why a post can be skipped without any metadata lookup or search, or None to process it
+
+    Posts linking to a music platform (source_type other than 'title') are
+    always processed; for the rest the flair and title decide. A title that
+    parses as "Artist - Track" is searched even if it contains words the
+    non-music pattern looks for ("Moby - Why Does My Heart Feel So Bad").
+    """
+    if source_type != 'title':
+        return None
+    if flair and flair.strip().lower() in NON_MUSIC_FLAIRS:
+        return f"flair: {flair.strip()}"
+    if has_artist_track(title):
+        return None
+    if is_non_music_post(title):
+        return 'non-music title'
+    return 'self post without "Artist - Track" title' if is_self else 'no music link or "Artist - Track" title'
+
+
+
+def parse_title(title: str, source: str = 'youtube', patterns: Sequence = ARTIST_TRACK_PATTERNS) -> MusicInfo:
+    """music_info (artist, track, source and remix details) parsed from a title
+
+    Never None: a title with no recognisable layout is all track, no artist.
+    """
+    remix_info = extract_remix_info(title)
+    artist, track = split_artist_track(clean_title_for_parsing(title), patterns)
+    result = MusicInfo(artist=artist, track=track, source=source)
+    result.update(remix_info)
+    return result
+
+
+def track_key(music_info: Optional[Dict]) -> Optional[str]:
+    """Canonical key shared by every mention of the same track, or None if there is nothing to search
+
+    Artist, track, remixer and remix type are NFKC-normalized and casefolded
+    with punctuation and spacing removed, in any script, so "Burial - Archangel"
+    and "burial – archangel" collapse while "Кино - Группа крови" keeps its
+    letters. Spotify links are keyed by their track ID. A mention whose artist
+    and track normalize to nothing gets None, so it shares no resolution.
+    """
+    if not music_info:
+        return None
+    if music_info.get('spotify_id'):
+        return f"spotify:{music_info['spotify_id']}"
+    if not music_info.get('track'):
+        return None
+    fields = [normalize_key_text(music_info.get(field) or '')
+              for field in ('artist', 'track', 'remixer', 'remix_type')]
+    if not (fields[0] or fields[1]):
+        return None
+    return '|'.join(fields)
+
+
+def normalize_key_text(text: str) -> str:
+    """NFKC-normalized, casefolded text with everything but letters and digits removed"""
+    return NON_WORD_PATTERN.sub('', unicodedata.normalize('NFKC', text).casefold())
+
+
+def parse_many(titles: Iterable[str], workers: Optional[int] = None,
+               chunksize: int = PARSE_MANY_CHUNKSIZE) -> List[MusicInfo]:
+    """parse_title over many titles, in input order
+
+    Batches bigger than one chunk are spread over a process pool of `workers`
+    processes (default: one per CPU); smaller ones, or workers=1, are parsed
+    in this process.
+    """
+    titles = list(titles)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(titles) <= chunksize:
+        return [parse_title(title) for title in titles]
+
+    workers = min(workers, -(-len(titles) // chunksize))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_title, titles, chunksize=chunksize))
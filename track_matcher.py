@@ -0,0 +1,183 @@
+"""
+Scoring of Spotify search candidates against extracted artist/track metadata
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from patterns import (
+    BRACKETED_CONTENT_PATTERN, NON_ALPHANUMERIC_PATTERN, SMART_QUOTES, TRACK_VARIATION_PATTERN,
+    VERSION_INDICATORS, VERSION_SUFFIX_PATTERN,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_for_matching(text: str) -> str:
+    """Normalize text for matching (remove spaces, punctuation, etc.)"""
+    return NON_ALPHANUMERIC_PATTERN.sub('', text.lower())
+
+
+def is_clean_title(title: str) -> bool:
+    """Check if a title is 'clean' (no version/remix info)"""
+    title_lower = title.lower()
+
+    # If it already has version indicators, it's not clean
+    if any(indicator in title_lower for indicator in VERSION_INDICATORS):
+        return False
+
+    # If it has parentheses or brackets with content, likely has version info
+    return not BRACKETED_CONTENT_PATTERN.search(title)
+
+
+def has_version_suffix(spotify_title: str) -> bool:
+    """Check if Spotify title has version/label suffix that wasn't in original query"""
+    return bool(VERSION_SUFFIX_PATTERN.search(spotify_title.lower()))
+
+
+def strip_track_variations(track: str) -> str:
+    """Remove years, remaster/original mix/radio edit tags and smart quotes"""
+    return TRACK_VARIATION_PATTERN.sub('', track.translate(SMART_QUOTES)).strip()
+
+
+def tracks_match_with_variations(track1: str, track2: str) -> bool:
+    """Check if tracks match allowing for common variations like years, versions, etc."""
+    clean1 = strip_track_variations(track1)
+    clean2 = strip_track_variations(track2)
+    return clean1 in clean2 or clean2 in clean1
+
+
+class TrackMatcher:
+    """Scores Spotify track candidates against one artist/track query
+
+    Everything derived from the query (lowercased/normalized artist, artist
+    words, cleaned track, clean-title flag) is computed once up front, so
+    scoring a candidate only does work on the candidate side. A matcher can be
+    reused for the result pages of several queries for the same metadata.
+    """
+
+    MIN_ARTIST_SCORE = 6
+    MIN_TRACK_SCORE = 2
+
+    def __init__(self, artist: str, track: str, debug: bool = False):
+        self.artist = artist
+        self.track = track
+        self.debug = debug
+
+        # Artist side
+        self.artist_lower = artist.lower()
+        self.artist_normalized = normalize_for_matching(self.artist_lower)
+        artist_words = artist.split()
+        self.artist_first_word = artist_words[0].lower() if len(artist_words) > 1 else None
+        self.artist_long_words = [word for word in self.artist_lower.split() if len(word) > 3]
+
+        # Track side
+        self.track_lower = track.lower().translate(SMART_QUOTES)
+        self.track_words = self.track_lower.split()
+        self.track_stripped = strip_track_variations(self.track_lower)
+        self.track_is_clean = is_clean_title(track)
+
+    def rejection_reason(self) -> Optional[str]:
+        """Why this query cannot be matched reliably, or None if it can"""
+        if not self.artist or not self.track:
+            return f"Insufficient track info for reliable matching: '{self.artist}' - '{self.track}'"
+        if len(self.track) <= 2 or (len(self.artist) <= 2 and len(self.track) <= 3):
+            return f"Track info too vague for reliable matching: '{self.artist}' - '{self.track}'"
+        return None
+
+    def artist_score(self, artist_names: List[str]) -> int:
+        """Score for the first credited artist that matches the query artist at all"""
+        for artist_name in artist_names:
+            # Direct substring matching
+            if self.artist_lower in artist_name or artist_name in self.artist_lower:
+                return 10
+            # Try normalized versions (remove spaces/punctuation)
+            if self.artist_normalized == normalize_for_matching(artist_name):
+                return 10
+            # Try matching first word of artist (e.g., "Deadmau5" from "Deadmau5 feat. Someone")
+            if self.artist_first_word and self.artist_first_word in artist_name:
+                return 8
+            # Try partial word matching
+            if any(word in artist_name for word in self.artist_long_words):
+                return 6
+        return 0
+
+    def track_score(self, spotify_name: str) -> int:
+        """Score how well a Spotify track name matches the query track"""
+        name_lower = spotify_name.lower().translate(SMART_QUOTES)
+
+        # Exact match
+        if self.track_lower in name_lower:
+            score = 8
+            # Pure title matching: a clean query shouldn't match a versioned result
+            if self.track_is_clean and has_version_suffix(spotify_name):
+                score -= 15
+                if self.debug:
+                    logger.debug(f"Final validation penalty (-15): '{self.track}' vs '{spotify_name}'")
+            return score
+
+        # Handle year/version variations - remove common suffixes
+        stripped = strip_track_variations(name_lower)
+        if self.track_stripped in stripped or stripped in self.track_stripped:
+            return 7
+
+        # Word-based matching; single word tracks are more lenient
+        if len(self.track_words) == 1:
+            if any(self.track_lower in word for word in name_lower.split()):
+                return 6
+            return 0
+
+        # Multi-word tracks need better overlap
+        matching_words = sum(1 for word in self.track_words if word in name_lower and len(word) > 3)
+        if matching_words >= len(self.track_words) * 0.7:  # 70% of words match
+            return matching_words * 2
+        return matching_words
+
+    def score(self, candidate: Dict) -> Optional[int]:
+        """Total score for a candidate, or None if it fails the artist/track thresholds"""
+        artist_names = [a['name'].lower() for a in candidate['artists']]
+        label = f"{candidate['artists'][0]['name']} - {candidate['name']}"
+
+        # Require GOOD artist match (prevents wrong artists)
+        artist_score = self.artist_score(artist_names)
+        if artist_score < self.MIN_ARTIST_SCORE:
+            if self.debug:
+                logger.debug(f"Rejected {label}: artist score {artist_score} < {self.MIN_ARTIST_SCORE}")
+            return None
+
+        # More flexible track match (handles "Bubblin (2022)" vs "Bubblin")
+        track_score = self.track_score(candidate['name'])
+        if track_score < self.MIN_TRACK_SCORE:
+            if self.debug:
+                logger.debug(f"Rejected {label}: track score {track_score} < {self.MIN_TRACK_SCORE}")
+            return None
+
+        total = artist_score + track_score
+        if self.debug:
+            logger.debug(f"Match candidate: {label} (artist: {artist_score}, track: {track_score}, total: {total})")
+        return total
+
+    def score_batch(self, candidates: Iterable[Dict]) -> List[Tuple[int, Dict]]:
+        """Score candidates (possibly pooled from several queries) in one pass
+
+        Candidates are de-duplicated by track ID, keeping the first occurrence.
+        Returns (score, candidate) pairs for accepted candidates in input order.
+        """
+        seen = set()
+        scored = []
+        for candidate in candidates:
+            if candidate['id'] in seen:
+                continue
+            seen.add(candidate['id'])
+            score = self.score(candidate)
+            if score is not None:
+                scored.append((score, candidate))
+        return scored
+
+    def best_match(self, candidates: Iterable[Dict]) -> Optional[Dict]:
+        """Highest scoring accepted candidate (earliest wins ties), or None"""
+        best_score, best = None, None
+        for score, candidate in self.score_batch(candidates):
+            if best_score is None or score > best_score:
+                best_score, best = score, candidate
+        return best